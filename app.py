@@ -1,14 +1,15 @@
+import click
 from flask import Flask, jsonify
 from flask_jwt_extended import JWTManager
 
-from db import db
+from db import db, init_engines
 from config import Config
 import os
 from flask_cors import CORS
 from flask_migrate import Migrate
 
 from models import User, Volunteer, Resume, Commander, HR, Job, JobQuestion, JobApplication, ApplicationAnswer, \
-    Interview
+    Interview, volunteer_search
 
 from dotenv import load_dotenv
 
@@ -24,7 +25,9 @@ def create_app():
     migrate = Migrate()
 
     db.init_app(app)
-    migrate.init_app(app, db)
+    init_engines(app)
+    # SQLite needs batch mode for ALTER; the FTS search tables are left out of autogenerate
+    migrate.init_app(app, db, render_as_batch=True, include_name=volunteer_search.include_name)
 
     jwt = JWTManager(app)
     # CORS(app, resources={r"/api/*": {"origins": "http://localhost:4200"}})
@@ -67,6 +70,20 @@ def create_app():
     app.register_blueprint(commander_bp, url_prefix='/api/commander')
     app.register_blueprint(hr_bp, url_prefix='/api/hr')
 
+    from cli import register_commands
+    register_commands(app)
+
+    # Invitations queued before a restart must not wait for the next enqueue. Workers start
+    # with the app, except under `flask <command>` (migrations, `flask invitations work`);
+    # the per-request call starts them in workers forked after the app was created.
+    from services.invitation_service import start_workers
+    if click.get_current_context(silent=True) is None:
+        start_workers(app)
+    app.before_request(lambda: start_workers(app))
+
+    from utils.events import warn_if_in_process
+    warn_if_in_process(app)
+
     # Create upload directories
     os.makedirs(os.path.join('uploads', 'resumes'), exist_ok=True)
 
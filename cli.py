@@ -0,0 +1,362 @@
+import os
+import random
+import tempfile
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.exc import OperationalError
+
+from db import db, set_sqlite_pragmas
+from models import User, Volunteer, Commander, Job, JobApplication, Interview
+
+bench_cli = AppGroup('bench', help='Micro-benchmarks against a throwaway seeded database.')
+calendar_cli = AppGroup('calendar', help='Google Calendar credentials.')
+invitations_cli = AppGroup('invitations', help='Queued interview invitations.')
+replica_cli = AppGroup('replica', help='Local SQLite read replicas.')
+matches_cli = AppGroup('matches', help='Precomputed job/volunteer matches.')
+resumes_cli = AppGroup('resumes', help='Content-addressed resume storage.')
+stats_cli = AppGroup('stats', help='Incrementally maintained HR statistics.')
+
+
+def register_commands(app):
+    app.cli.add_command(bench_cli)
+    app.cli.add_command(calendar_cli)
+    app.cli.add_command(invitations_cli)
+    app.cli.add_command(replica_cli)
+    app.cli.add_command(matches_cli)
+    app.cli.add_command(resumes_cli)
+    app.cli.add_command(stats_cli)
+
+
+@stats_cli.command('rebuild')
+@click.option('--check', is_flag=True, help='Only report counters that differ from a full recount.')
+def stats_rebuild(check):
+    """Recompute the hr_stats counters from jobs and applications."""
+    from services.stats_service import StatsService
+
+    differences = StatsService.rebuild(check_only=check)
+    for (metric, key, subkey), (stored, expected) in sorted(differences.items()):
+        click.echo(f'{metric} {key!r} {subkey!r}: stored {stored}, expected {expected}')
+    if check:
+        click.echo(f'{len(differences)} counter(s) out of date')
+        if differences:
+            raise SystemExit(1)
+    else:
+        click.echo(f'Rebuilt hr_stats, {len(differences)} counter(s) corrected')
+
+
+@resumes_cli.command('gc')
+@click.option('--grace-minutes', default=60, show_default=True,
+              help='Leave unreferenced blobs and stray files younger than this alone.')
+@click.option('--dry-run', is_flag=True, help='Only report what would be deleted.')
+def resumes_gc(grace_minutes, dry_run):
+    """Delete resume blobs no resume references any more, and stray files from failed uploads."""
+    from datetime import timedelta
+    from services.resume_service import ResumeService
+
+    blobs, files = ResumeService.collect_garbage(timedelta(minutes=grace_minutes), dry_run=dry_run)
+    verb = 'Would remove' if dry_run else 'Removed'
+    click.echo(f'{verb} {blobs} unreferenced blob(s) and {files} stray file(s)')
+
+
+@matches_cli.command('rebuild')
+@click.option('--top', default=50, show_default=True, help='Candidates stored per job.')
+@click.option('--workers', default=None, type=int, help='Scoring processes (default: one per CPU).')
+@click.option('--chunk-size', default=100, show_default=True, help='Jobs scored per task.')
+def matches_rebuild(top, workers, chunk_size):
+    """Score every open job against every volunteer and refresh the job_matches table."""
+    try:
+        import numpy, scipy  # noqa: F401
+    except ImportError:
+        raise click.ClickException('numpy and scipy are required: pip install numpy scipy')
+    from services.matching_service import MatchingService
+
+    started = time.perf_counter()
+    jobs, rows = MatchingService.rebuild_job_matches(top, workers, chunk_size)
+    click.echo(f'Scored {jobs} open jobs, stored {rows} matches in {time.perf_counter() - started:.1f}s')
+
+
+@replica_cli.command('sync')
+def replica_sync():
+    """Copy the primary SQLite database over every SQLite replica in DATABASE_REPLICA_URLS."""
+    import sqlite3
+    from db import REPLICA_BIND_PREFIX
+
+    primary = db.engines[None]
+    replicas = {key: engine for key, engine in db.engines.items() if key and key.startswith(REPLICA_BIND_PREFIX)}
+    if primary.dialect.name != 'sqlite' or not replicas:
+        raise click.ClickException('Needs a SQLite primary and at least one replica in DATABASE_REPLICA_URLS')
+    for key, engine in replicas.items():
+        if engine.dialect.name != 'sqlite':
+            click.echo(f'Skipping {key}: not SQLite')
+            continue
+        engine.dispose()  # drop pooled connections to the old copy
+        source = sqlite3.connect(primary.url.database)
+        target = sqlite3.connect(engine.url.database)
+        try:
+            # online backup: consistent even while the app is writing to the primary
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        click.echo(f'{key}: copied {primary.url.database} -> {engine.url.database}')
+
+
+@invitations_cli.command('work')
+@click.option('--poll-interval', default=2.0, show_default=True, help='Seconds to sleep when the queue is empty.')
+def invitations_work(poll_interval):
+    """Send queued invitations from this process until interrupted (use with INVITATION_WORKERS=0)."""
+    from services.invitation_service import InvitationService
+
+    click.echo('Sending queued interview invitations, Ctrl+C to stop')
+    while True:
+        if not InvitationService.run_pending():
+            time.sleep(poll_interval)
+        db.session.remove()
+
+
+@invitations_cli.command('send-pending')
+def invitations_send_pending():
+    """Send every invitation that is due right now and exit."""
+    from services.invitation_service import InvitationService
+
+    click.echo(f'Handled {InvitationService.run_pending()} invitation(s)')
+
+
+@calendar_cli.command('authorize')
+def calendar_authorize():
+    """Run the OAuth consent flow once and store the token used by the invitation endpoints."""
+    from google_auth_oauthlib.flow import Flow
+    from utils import google_calendar
+
+    flow = Flow.from_client_secrets_file(
+        google_calendar.client_secret_file(),
+        scopes=google_calendar.SCOPES,
+        redirect_uri=google_calendar.REDIRECT_URI
+    )
+    # offline access so the server can refresh the token without re-prompting
+    authorization_url, _ = flow.authorization_url(access_type='offline', include_granted_scopes='true',
+                                                  prompt='consent')
+    click.echo(f'Visit this URL and authorize the application:\n{authorization_url}')
+    authorization_response = click.prompt('Paste the FULL redirect URL')
+    flow.fetch_token(authorization_response=authorization_response)
+    google_calendar.save_credentials(flow.credentials)
+    click.echo(f'Credentials saved to {google_calendar.TOKEN_FILE}')
+
+
+@bench_cli.command('logins')
+@click.option('--requests', 'total', default=200, show_default=True, help='Logins per run.')
+@click.option('--concurrency', default=8, show_default=True, help='Concurrent request threads (e.g. gthread threads).')
+@click.option('--method', default=None, help='Hash method to benchmark; defaults to PASSWORD_HASH_METHOD.')
+def bench_logins(total, concurrency, method):
+    """Logins per second one app worker sustains, verifying inline vs. in the verification pool."""
+    from concurrent.futures import ThreadPoolExecutor
+    from utils import passwords
+
+    app = current_app._get_current_object()
+    config = app.config
+    saved = {key: config.get(key) for key in ('PASSWORD_HASH_METHOD', 'PASSWORD_VERIFY_WORKERS')}
+    if method:
+        config['PASSWORD_HASH_METHOD'] = method
+    stored = passwords.hash_password('correct horse battery staple')
+    pool_workers = saved['PASSWORD_VERIFY_WORKERS'] or os.cpu_count() or 1
+
+    def login():
+        with app.app_context():
+            started = time.perf_counter()
+            try:
+                passwords.verify_password(stored, 'correct horse battery staple')
+            except passwords.PasswordQueueFull:
+                return None
+            return time.perf_counter() - started
+
+    click.echo(f"{passwords.hash_method()}: {total} logins, {concurrency} concurrent")
+    click.echo(f"{'mode':<16}{'logins/s':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'rejected':>10}")
+    try:
+        for label, workers in (('inline', 0), (f'pool x{pool_workers}', pool_workers)):
+            config['PASSWORD_VERIFY_WORKERS'] = workers
+            if workers:
+                login()  # start the pool outside the timing
+            started = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as executor:
+                results = list(executor.map(lambda _: login(), range(total)))
+            elapsed = time.perf_counter() - started
+            latencies = sorted(r for r in results if r is not None)
+            rejected = total - len(latencies)
+            p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+            p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+            click.echo(f'{label:<16}{len(latencies) / elapsed:>10.1f}{p50:>10.1f}{p95:>10.1f}{rejected:>10}')
+    finally:
+        config.update(saved)
+
+
+def _seed(engine, volunteers, jobs, applications_per_volunteer):
+    commanders = max(1, jobs // 10)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {'id': i, 'email': f'user{i}@example.com', 'password_hash': 'x',
+             'role': 'commander' if i <= commanders else 'volunteer'}
+            for i in range(1, commanders + volunteers + 1)
+        ])
+        conn.execute(insert(Commander), [
+            {'id': i, 'user_id': i, 'name': f'Commander {i}'} for i in range(1, commanders + 1)
+        ])
+        conn.execute(insert(Volunteer), [
+            {'id': i, 'user_id': commanders + i, 'full_name': f'Volunteer {i}', 'national_id': str(100000 + i)}
+            for i in range(1, volunteers + 1)
+        ])
+        conn.execute(insert(Job), [
+            {'id': i, 'commander_id': random.randint(1, commanders), 'title': f'Job {i}'}
+            for i in range(1, jobs + 1)
+        ])
+        rows = []
+        for volunteer_id in range(1, volunteers + 1):
+            for job_id in random.sample(range(1, jobs + 1), min(jobs, applications_per_volunteer)):
+                rows.append({'job_id': job_id, 'volunteer_id': volunteer_id, 'status': 'PENDING'})
+        conn.execute(insert(JobApplication), rows)
+        conn.execute(insert(Interview), [
+            {'application_id': i} for i in range(1, len(rows) + 1, 3)
+        ])
+    return commanders, len(rows)
+
+
+def _time_lookups(engine, lookups, repeat):
+    results = {}
+    with engine.connect() as conn:
+        for label, sql, make_params in lookups:
+            statement = text(sql)
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(statement, make_params()).fetchall()
+            results[label] = (time.perf_counter() - started) / repeat * 1e6
+    return results
+
+
+@bench_cli.command('lookups')
+@click.option('--volunteers', default=20000, show_default=True)
+@click.option('--jobs', default=500, show_default=True)
+@click.option('--applications-per-volunteer', default=5, show_default=True)
+@click.option('--repeat', default=200, show_default=True, help='Executions per lookup.')
+def bench_lookups(volunteers, jobs, applications_per_volunteer, repeat):
+    """Time the hot foreign-key lookups with and without their indexes."""
+    fd, path = tempfile.mkstemp(suffix='.db')
+    os.close(fd)
+    engine = create_engine(f'sqlite:///{path}')
+    try:
+        db.metadata.create_all(engine)
+        commanders, applications = _seed(engine, volunteers, jobs, applications_per_volunteer)
+        click.echo(f'Seeded {volunteers} volunteers, {jobs} jobs, {applications} applications')
+
+        lookups = [
+            ('application by (job, volunteer)',
+             'SELECT id FROM job_applications WHERE job_id = :j AND volunteer_id = :v',
+             lambda: {'j': random.randint(1, jobs), 'v': random.randint(1, volunteers)}),
+            ('applications by volunteer',
+             'SELECT id FROM job_applications WHERE volunteer_id = :v',
+             lambda: {'v': random.randint(1, volunteers)}),
+            ('applications by job',
+             'SELECT id FROM job_applications WHERE job_id = :j',
+             lambda: {'j': random.randint(1, jobs)}),
+            ('volunteer by user_id',
+             'SELECT id FROM volunteers WHERE user_id = :u',
+             lambda: {'u': commanders + random.randint(1, volunteers)}),
+            ('jobs by commander',
+             'SELECT id FROM jobs WHERE commander_id = :c',
+             lambda: {'c': random.randint(1, commanders)}),
+            ('interview by application',
+             'SELECT id FROM interviews WHERE application_id = :a',
+             lambda: {'a': random.randint(1, applications)}),
+        ]
+
+        indexes = [index for table in db.metadata.sorted_tables for index in table.indexes]
+        for index in indexes:
+            index.drop(engine)
+        before = _time_lookups(engine, lookups, repeat)
+        for index in indexes:
+            index.create(engine)
+        with engine.begin() as conn:
+            conn.execute(text('ANALYZE'))
+        after = _time_lookups(engine, lookups, repeat)
+
+        click.echo(f"{'lookup':<34}{'no index (us)':>15}{'indexed (us)':>15}{'speedup':>10}")
+        for label, _, _ in lookups:
+            click.echo(f'{label:<34}{before[label]:>15.1f}{after[label]:>15.1f}{before[label] / after[label]:>9.1f}x')
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+
+def _run_mixed_load(engine, threads, seconds, write_ratio, jobs, applications):
+    """Hammer `engine` from `threads` threads with list reads and status writes for `seconds`."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    read = text('SELECT a.id, a.status, v.full_name FROM job_applications a '
+                'JOIN volunteers v ON v.id = a.volunteer_id WHERE a.job_id = :j')
+    write = text('UPDATE job_applications SET status = :s WHERE id = :a')
+    deadline = time.perf_counter() + seconds
+
+    def worker(_):
+        done, errors, latencies = 0, 0, []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if random.random() < write_ratio:
+                    with engine.begin() as conn:
+                        conn.execute(write, {'s': random.choice(['PENDING', 'REJECTED']),
+                                             'a': random.randint(1, applications)})
+                else:
+                    with engine.connect() as conn:
+                        conn.execute(read, {'j': random.randint(1, jobs)}).fetchall()
+                done += 1
+                latencies.append(time.perf_counter() - started)
+            except OperationalError:  # 'database is locked', pool timeouts
+                errors += 1
+        return done, errors, latencies
+
+    with ThreadPoolExecutor(threads) as executor:
+        results = list(executor.map(worker, range(threads)))
+    latencies = sorted(latency for _, _, worker_latencies in results for latency in worker_latencies)
+    p95 = latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0
+    return sum(r[0] for r in results) / seconds, sum(r[1] for r in results), p95
+
+
+@bench_cli.command('concurrency')
+@click.option('--threads', default=16, show_default=True, help='Concurrent connections (think: app worker threads).')
+@click.option('--seconds', default=5.0, show_default=True, help='Duration of each run.')
+@click.option('--write-ratio', default=0.2, show_default=True, help='Fraction of operations that write.')
+@click.option('--url', default=None, help='Scratch server database to benchmark instead of a temporary SQLite file. '
+                                          'Its tables are created and dropped!')
+def bench_concurrency(threads, seconds, write_ratio, url):
+    """Mixed read/write throughput with default engine settings vs. the configured DB_PROFILE."""
+    from config import ENGINE_PROFILES, SQLITE_PRAGMAS
+
+    volunteers, jobs = 2000, 100
+    profile = current_app.config['DB_PROFILE'] if url else 'sqlite'
+    runs = [('default settings', {}, {}),
+            (f'{profile} profile', ENGINE_PROFILES[profile], SQLITE_PRAGMAS if profile == 'sqlite' else {})]
+    click.echo(f'{threads} threads, {seconds:g}s per run, {write_ratio:.0%} writes')
+    click.echo(f"{'engine':<20}{'ops/s':>10}{'p95 (ms)':>10}{'errors':>8}")
+    for label, options, pragmas in runs:
+        path = None
+        if url is None:
+            fd, path = tempfile.mkstemp(suffix='.db')
+            os.close(fd)
+        engine = create_engine(url or f'sqlite:///{path}', **options)
+        set_sqlite_pragmas(engine, pragmas)
+        try:
+            db.metadata.drop_all(engine)
+            db.metadata.create_all(engine)
+            _, applications = _seed(engine, volunteers, jobs, 5)
+            ops, errors, p95 = _run_mixed_load(engine, threads, seconds, write_ratio, jobs, applications)
+            click.echo(f'{label:<20}{ops:>10.0f}{p95:>10.1f}{errors:>8}')
+            if url:
+                db.metadata.drop_all(engine)
+        finally:
+            engine.dispose()
+            if path:
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(path + suffix):
+                        os.remove(path + suffix)
@@ -7,10 +7,45 @@ from datetime import timedelta
 #     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
 #     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
 
+# Engine settings per DB_PROFILE. 'sqlite' is the file database the app has always used;
+# 'server' is for PostgreSQL/MySQL behind DATABASE_URL, with several app workers sharing it.
+ENGINE_PROFILES = {
+    'sqlite': {},
+    'server': {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+        'pool_pre_ping': True,  # drop connections the server or a proxy closed while idle
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    },
+}
+
+# Set on every new SQLite connection (see db.init_engines). WAL lets readers run alongside the
+# single writer, busy_timeout makes a writer wait for the lock instead of failing with
+# 'database is locked', and synchronous=NORMAL is durable enough under WAL at far fewer fsyncs.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 10000)),
+    'synchronous': 'NORMAL',
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)),  # negative = KiB
+}
+
+
 class Config:
     # Absolute path to the database file
     db_path = os.path.join(os.getcwd(), 'volunteer_system.db')
-    SQLALCHEMY_DATABASE_URI = f'sqlite:///{db_path}'
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', f'sqlite:///{db_path}')
+    DB_PROFILE = os.getenv('DB_PROFILE', 'sqlite')
+    if DB_PROFILE not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE {DB_PROFILE!r}, expected one of {', '.join(ENGINE_PROFILES)}")
+    SQLALCHEMY_ENGINE_OPTIONS = ENGINE_PROFILES[DB_PROFILE]
+    SQLITE_PRAGMAS = SQLITE_PRAGMAS if DB_PROFILE == 'sqlite' else {}
+    # Comma separated read replica URLs; GET requests read from them (see db.RoutingSession).
+    # Locally a copy of the SQLite file works, refreshed with `flask replica sync`.
+    SQLALCHEMY_BINDS = {f'replica_{i}': url.strip()
+                        for i, url in enumerate(os.getenv('DATABASE_REPLICA_URLS', '').split(','))
+                        if url.strip()}
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key' # Use SECRET_KEY for JWT
@@ -29,3 +64,36 @@ class Config:
     UPLOAD_FOLDER = os.path.join(os.path.abspath(os.path.dirname(__file__)), 'uploads')
     RESUMES_FOLDER = os.path.join(UPLOAD_FOLDER, 'resumes')  # Subfolder for resumes
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10 MB limit
+    # How resume downloads are sent: '' streams them from the app worker, 'x-accel-redirect'
+    # hands nginx an internal URI (RESUME_ACCEL_PREFIX + stored path, mapped to RESUMES_FOLDER
+    # by an `internal` location), 'x-sendfile' hands Apache/lighttpd the absolute path
+    RESUME_SENDFILE = os.getenv('RESUME_SENDFILE', '').lower()
+    RESUME_ACCEL_PREFIX = os.getenv('RESUME_ACCEL_PREFIX', '/protected/resumes/')
+
+    # Background threads per process that send queued interview invitations.
+    # Set to 0 and run `flask invitations work` to send from a dedicated process instead.
+    INVITATION_WORKERS = int(os.getenv('INVITATION_WORKERS', 1))
+    # Callable returning a Calendar API client; None means utils.google_calendar.get_calendar_service
+    CALENDAR_SERVICE_FACTORY = None
+    # Override the Calendar HTTP batch endpoint (e.g. a local stub); None uses Google's
+    CALENDAR_BATCH_URI = os.getenv('CALENDAR_BATCH_URI')
+
+    # werkzeug hash method for new passwords; older hashes are upgraded on the next login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    # Processes used to hash passwords for bulk imports; None means one per CPU
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 0)) or None
+    # Processes per app worker that verify login passwords (0 verifies inline), and how many
+    # more logins may wait for them before new ones get a 503
+    PASSWORD_VERIFY_WORKERS = int(os.getenv('PASSWORD_VERIFY_WORKERS', 2))
+    PASSWORD_VERIFY_QUEUE_LIMIT = int(os.getenv('PASSWORD_VERIFY_QUEUE_LIMIT', 32))
+
+    # Server-sent event streams (/api/<role>/events). Unset, events reach only streams held by
+    # the same process; with several workers set a redis:// URL (pip install redis), or a
+    # factory(app, broker) returning a backend of your own (see utils.events.get_backend)
+    EVENT_BACKEND_URL = os.getenv('EVENT_BACKEND_URL')
+    EVENT_BACKEND_FACTORY = None
+    # Each open stream holds a worker thread: run threaded/gevent workers. Streams end after
+    # SSE_MAX_SECONDS and the browser reconnects on its own.
+    SSE_KEEPALIVE_SECONDS = int(os.getenv('SSE_KEEPALIVE_SECONDS', 15))
+    SSE_MAX_SECONDS = int(os.getenv('SSE_MAX_SECONDS', 600))
+    SSE_QUEUE_SIZE = 100  # events buffered per stream before it is told to resync
@@ -2,9 +2,7 @@ from datetime import date
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import get_jwt_identity
 from services.auth_service import AuthService
-from services.commander_service import CommanderService
-from services.hr_service import HRService
-from services.volunteer_service import VolunteerService
+from utils.passwords import PasswordQueueFull
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -38,22 +36,27 @@ def login():
     if not email or not password:
         return jsonify({'message': 'Missing email or password'}), 400
         
-    token, role, user_id = AuthService.login(email, password)
+    try:
+        token, user = AuthService.login(email, password)
+    except PasswordQueueFull:
+        return jsonify({'message': 'Too many logins in progress, please try again'}), 503, {'Retry-After': '1'}
     
     if not token:
         return jsonify({'message': 'Invalid credentials'}), 401
         
+    role = user.role
     response = {
         'access_token': token,
         'role': role
     }
     
+    # user and its profile were loaded together by AuthService.login; no further queries here
     if role == 'volunteer':
-        volunteer = VolunteerService.get_user_info(user_id)
+        volunteer = user.volunteer
         if volunteer:
             response['user'] = {
-                'email': volunteer.user.email,
-                'phone': volunteer.user.phone,
+                'email': user.email,
+                'phone': user.phone,
                 'id': volunteer.id,
                 'full_name': volunteer.full_name,
                 'national_id': volunteer.national_id,
@@ -70,28 +73,16 @@ def login():
                 'languages': volunteer.languages,
                 'interests': volunteer.interests,
                 'personal_summary': volunteer.personal_summary,
-                'imageUrl': volunteer.user.image_url
-            }
-    elif role == 'hr':
-        hr = HRService.get_hr_user_info(user_id)
-        if hr:
-            response['user'] = {
-                'id': hr.id,
-                'full_name': hr.full_name,
-                'email': hr.email,
-                'imageUrl': hr.image_url
-
+                'imageUrl': user.image_url
             }
-    elif role == 'commander':
-        commander = CommanderService.get_commander_user_info(user_id)
-        if commander:
-            response['user'] = {
-                'id': commander.id,
-                'full_name': commander.full_name,
-                'email': commander.email,
-                'imageUrl': commander.image_url
+    elif role in ('hr', 'commander'):
+        response['user'] = {
+            'id': user.id,
+            'full_name': user.full_name,
+            'email': user.email,
+            'imageUrl': user.image_url
 
-            }
+        }
     
     return jsonify(response), 200
 
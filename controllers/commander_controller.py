@@ -1,237 +1,98 @@
-import os
 from datetime import date
-from flask import Blueprint, request, jsonify, send_file, current_app, send_from_directory
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, url_for, Response, stream_with_context
 from werkzeug.exceptions import BadRequest
 
-from models import Resume, JobApplication
+from models.application import ApplicationStatus
+from models.job import JobStatus
 from services.commander_service import CommanderService
-from models.user import User
-import io
+from services.event_service import EventService, commander_channel
+from services.matching_service import MatchingService
+from services.resume_service import ResumeService
+from services.scheduling_service import SchedulingService
+from utils.auth import role_required, current_profile, STREAM_TOKEN_LOCATIONS
 
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow, Flow
+import json
 
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import pickle
-from datetime import datetime, timedelta
-import pytz
+from services.invitation_service import InvitationService
+from utils.google_calendar import parse_interview_time, CalendarUnavailable
 
 commander_bp = Blueprint('commander', __name__)
 
-SCOPES = ['https://www.googleapis.com/auth/calendar']
-
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-CLIENT_SECRET_FILE = os.getenv("GOOGLE_CLIENT_SECRET")
-if not CLIENT_SECRET_FILE:
-    raise RuntimeError("GOOGLE_CLIENT_SECRET environment variable is not set!")
-CLIENT_SECRET_FILE = os.path.join(BASE_DIR, 'utils', CLIENT_SECRET_FILE)
-TOKEN_FILE = os.path.join(BASE_DIR, 'utils', 'token1.pickle')
-REDIRECT_URI = 'http://localhost:8080/'
-
-
-# def get_calendar_service():
-#     """Get or create Calendar API service"""
-#     creds = None
-#
-#     # Check if token file exists
-#     if os.path.exists(TOKEN_FILE):
-#         with open(TOKEN_FILE, 'rb') as token:
-#             creds = pickle.load(token)
-#
-#     # If no valid credentials available, let the user log in
-#     if not creds or not creds.valid:
-#         if creds and creds.expired and creds.refresh_token:
-#             creds.refresh(Request())
-#         else:
-#             if not os.path.exists(CLIENT_SECRET_FILE):
-#                 raise FileNotFoundError(
-#                     f"Client secret file not found at {CLIENT_SECRET_FILE}. "
-#                     "Please download it from Google Cloud Console and place it in the config directory."
-#                 )
-#
-#             flow = InstalledAppFlow.from_client_secrets_file(
-#                 CLIENT_SECRET_FILE,
-#                 SCOPES,
-#                 redirect_uri=REDIRECT_URI
-#             )
-#             creds = flow.run_local_server(port=8080)
-#
-#             # Save the credentials for future use
-#             os.makedirs(os.path.dirname(TOKEN_FILE), exist_ok=True)
-#             with open(TOKEN_FILE, 'wb') as token:
-#                 pickle.dump(creds, token)
-#
-#     return build('calendar', 'v3', credentials=creds)
-def get_calendar_service():
-    """Get or create Calendar API service for server-side authentication"""
-    TOKEN_FILE = os.path.join(BASE_DIR, 'utils', 'token1.pickle')
-    CLIENT_SECRET_FILE = os.path.join(BASE_DIR, 'utils', 'client_secret.json')
-    SCOPES = ['https://www.googleapis.com/auth/calendar']
-    REDIRECT_URI = 'http://localhost:8080/'  # Or your actual redirect URI
-
-    creds = None
-
-    # Check if token file exists
-    if os.path.exists(TOKEN_FILE):
-        with open(TOKEN_FILE, 'rb') as token:
-            creds = pickle.load(token)
-
-    # If no valid credentials available, go through authorization flow
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            # Create the flow
-            flow = Flow.from_client_secrets_file(
-                CLIENT_SECRET_FILE,
-                scopes=SCOPES,
-                redirect_uri=REDIRECT_URI
-            )
-
-            # Generate authorization URL
-            authorization_url, state = flow.authorization_url(
-                # Enable offline access so that you can refresh an access token without
-                # re-prompting the user for permission. Recommended for web server apps.
-                access_type='offline',
-                # Enable incremental authorization. Recommended as a best practice.
-                include_granted_scopes='true'
-            )
-
-            print("Authorization URL:", authorization_url)
-            print("Please visit this URL in your browser and authorize the application.")
-            print("Then enter the authorization code from the redirect URL.")
-
-            # Manually input the full redirect URL
-            authorization_response = input("Enter the FULL redirect URL: ")
-
-            # Fetch the token
-            flow.fetch_token(authorization_response=authorization_response)
-            creds = flow.credentials
-
-            # Save the credentials for future use
-            os.makedirs(os.path.dirname(TOKEN_FILE), exist_ok=True)
-            with open(TOKEN_FILE, 'wb') as token:
-                pickle.dump(creds, token)
-
-    return build('calendar', 'v3', credentials=creds)
+MAX_BATCH_INVITATIONS = 500
+MAX_MATCHES = 100
+MAX_BULK_STATUS_UPDATES = 1000
+DEFAULT_DASHBOARD_INTERVIEWS = 20
+MAX_DASHBOARD_INTERVIEWS = 200
+
 
 @commander_bp.route('/send-interview-invitation', methods=['POST'])
-@jwt_required()
+@role_required('commander')
 def invite_interview():
-    """Schedule an interview and send calendar invitations to both candidate and commander"""
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
+    """Queue calendar invitations to both candidate and commander; a background worker sends them"""
+    try:
+        job = InvitationService.enqueue(current_profile().id, request.get_json())
+    except BadRequest as e:
+        return jsonify({'error': e.description}), 400
+
+    return jsonify({
+        'message': 'Interview invitation queued',
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': url_for('commander.get_invitation_status', job_id=job.id)
+    }), 202
+
+
+@commander_bp.route('/send-interview-invitations/batch', methods=['POST'])
+@role_required('commander')
+def invite_interviews_batch():
+    """Send many interview invitations in one Calendar batch round trip and report each one"""
+    data = request.get_json() or {}
+    invitations = data.get('invitations')
+    if not isinstance(invitations, list) or not invitations:
+        return jsonify({'error': "'invitations' must be a non-empty list"}), 400
+    if len(invitations) > MAX_BATCH_INVITATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_INVITATIONS} invitations per request'}), 400
 
     try:
-        # Get the calendar service using our configuration
-        service = get_calendar_service()
-
-        data = request.get_json()
-        required_fields = ['candidate_email', 'commander_email', 'job_title', 'interview_time']
-        if not all(field in data for field in required_fields):
-            print({'error': 'Missing required fields'})
-            return jsonify({'error': 'Missing required fields'}), 400
-
-        # Parse the interview time
-        try:
-            interview_time = datetime.fromisoformat(data['interview_time'].replace('Z', ''))
-            # interview_time = datetime.fromisoformat(data['interview_time'].replace('Z', '+00:00'))
-        except ValueError:
-            print({'error': 'Invalid interview time format. Use ISO 8601 format'})
-            return jsonify({'error': 'Invalid interview time format. Use ISO 8601 format'}), 400
-
-        # Set interview duration
-        interview_end = interview_time + timedelta(hours=1)
-
-        event = {
-            'summary': f'Interview for {data["job_title"]} Position',
-            'location': 'Online',
-            'description': f'''Interview for the position of {data["job_title"]}
-
-        Commander: {data.get("commander_name", "Interview Commander")}
-        Candidate: {data.get("candidate_name", "Candidate")}
-
-        Additional Info: {data.get("additional_info", "")}''',
-            'start': {
-                'dateTime': interview_time.isoformat(),
-                'timeZone': 'Asia/Jerusalem',
-            },
-            'end': {
-                'dateTime': interview_end.isoformat(),
-                'timeZone': 'Asia/Jerusalem',
-            },
-            'attendees': [
-                {
-                    'email': data['commander_email'],
-                    'responseStatus': 'accepted',  # Auto-accept for organizer
-                    'optional': False  # Mark as required attendee
-                },
-                {
-                    'email': data['candidate_email'],
-                    'responseStatus': 'needsAction',
-                    'optional': False  # Mark as required attendee
-                }
-            ],
-            'reminders': {
-                'useDefault': False,
-                'overrides': [
-                    {'method': 'email', 'minutes': 24 * 60},
-                    {'method': 'popup', 'minutes': 30}
-                ]
-            },
-            'guestsCanModify': False,  # Prevents attendees from modifying the event
-            'guestsCanInviteOthers': False,  # Prevents attendees from inviting others
-            'sendNotifications': True  # Explicitly request notifications
-        }
-
-        if data.get('include_meet_link', True):
-            event['conferenceData'] = {
-                'createRequest': {
-                    'requestId': f"interview-{datetime.now().timestamp()}",
-                    'conferenceSolutionKey': {'type': 'hangoutsMeet'}
-                }
-            }
-
-        try:
-            event_result = service.events().insert(
-                calendarId='primary',
-                body=event,
-                conferenceDataVersion=1,
-                sendUpdates='all',  # This ensures all attendees get notifications
-                sendNotifications=True  # Additional parameter to force notifications
-            ).execute()
+        results = InvitationService.send_batch(invitations)
+    except CalendarUnavailable as e:
+        return jsonify({'error': f'Calendar is not available: {str(e)}'}), 503
 
-            return jsonify({
-                'message': 'Interview scheduled successfully',
-                'event_link': event_result.get('htmlLink'),
-                'meeting_link': event_result.get('conferenceData', {}).get('entryPoints', [{}])[0].get('uri', None),
-                'scheduled_time': interview_time.isoformat()
-            }), 201
+    return jsonify({
+        'sent': sum(1 for r in results if r['status'] == 'sent'),
+        'failed': sum(1 for r in results if r['status'] != 'sent'),
+        'results': results
+    }), 200
 
-        except HttpError as error:
-            print(str(error))
-            print(str(error))
-            return jsonify({'error': f'Calendar API error: {str(error)}'}), 500
 
-    except Exception as e:
-        print(str(e))
-        print(str(e))
-        return jsonify({'error': str(e)}), 500
+@commander_bp.route('/interview-invitations/<int:job_id>', methods=['GET'])
+@role_required('commander')
+def get_invitation_status(job_id):
+    job = InvitationService.get_job(job_id, current_profile().id)
+    if not job:
+        return jsonify({'message': 'Invitation not found'}), 404
+
+    return jsonify(invitation_payload(job)), 200
+
+
+def invitation_payload(job):
+    return {
+        'job_id': job.id,
+        'status': job.status,  # queued, sending, sent, failed
+        'attempts': job.attempts,
+        'next_attempt_at': job.next_attempt_at.isoformat() if job.status == 'queued' else None,
+        'error': job.last_error,
+        'event_link': job.event_link,
+        'meeting_link': job.meeting_link,
+        'scheduled_time': parse_interview_time(json.loads(job.payload)['interview_time']).isoformat()
+    }
 
 
 @commander_bp.route('/jobs', methods=['POST'])
-@jwt_required()
+@role_required('commander')
 def create_job():
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     data = request.get_json()
-    job = CommanderService.create_job(current_user.commander.id, data)
+    job = CommanderService.create_job(current_profile().id, data)
 
     return jsonify({
         'message': 'Job created successfully',
@@ -239,15 +100,8 @@ def create_job():
     }), 201
 
 
-@commander_bp.route('/jobs', methods=['GET'])
-@jwt_required()
-def get_jobs():
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
-    jobs = CommanderService.get_commander_jobs(current_user.commander.id)
-    payload = [{
+def job_payload(job, candidate_count, status_counts):
+    return {
         'id': str(job.id),
         'jobName': job.title,
         'jobCategory': job.category,
@@ -270,23 +124,89 @@ def get_jobs():
         'techSkills': job.tech_skills,
         'workExperience': job.experience,
         'passedCourses': job.passed_courses,
-        'candidateCount': len(job.applications),
+        'candidateCount': candidate_count,
+        'statusCounts': status_counts,
         'status': job.status.name,
         'department': job.commander.department if job.commander else None,  # Get department from job
         'commanderId': job.commander_id,
-        'applications_count': len(job.applications)
-    } for job in jobs]
+        'applications_count': candidate_count
+    }
 
-    return jsonify(payload), 200
+
+@commander_bp.route('/jobs', methods=['GET'])
+@role_required('commander')
+def get_jobs():
+    jobs = CommanderService.get_commander_jobs(current_profile().id)
+    return jsonify([job_payload(row[0], *CommanderService.application_counts(row)) for row in jobs]), 200
+
+
+@commander_bp.route('/events', methods=['GET'])
+@role_required('commander', locations=STREAM_TOKEN_LOCATIONS)
+def stream_events():
+    """Server-sent events for applications to, and interviews for, this commander's jobs"""
+    return EventService.stream(commander_channel(current_profile().id))
+
+
+@commander_bp.route('/dashboard', methods=['GET'])
+@role_required('commander')
+def get_dashboard():
+    try:
+        limit = int(request.args.get('upcoming', DEFAULT_DASHBOARD_INTERVIEWS))
+    except ValueError:
+        return jsonify({'message': 'upcoming must be an integer'}), 400
+    if not 0 <= limit <= MAX_DASHBOARD_INTERVIEWS:
+        return jsonify({'message': f'upcoming must be between 0 and {MAX_DASHBOARD_INTERVIEWS}'}), 400
+
+    jobs, counts, upcoming_counts, interviews = CommanderService.get_dashboard(current_profile().id, limit)
+
+    job_rows = []
+    totals = {status.value: 0 for status in ApplicationStatus}
+    open_positions = 0
+    for job in jobs:
+        status_counts = {status.value: counts.get(job.id, {}).get(status, 0) for status in ApplicationStatus}
+        for status, count in status_counts.items():
+            totals[status] += count
+        # vacant_positions already drops with every hire (see HRService.assign_volunteer_to_job)
+        remaining = (job.vacant_positions or 0) if job.status == JobStatus.OPEN else 0
+        open_positions += remaining
+        job_rows.append({
+            'id': str(job.id),
+            'jobName': job.title,
+            'jobCategory': job.category,
+            'unit': job.unit,
+            'status': job.status.name if job.status else None,
+            'positions': job.vacant_positions,
+            'openPositions': remaining,
+            'candidateCount': sum(status_counts.values()),
+            'statusCounts': status_counts,
+            'upcomingInterviews': upcoming_counts.get(job.id, 0)
+        })
+
+    return jsonify({
+        'jobs': job_rows,
+        'totals': {
+            'jobs': len(jobs),
+            'openJobs': sum(1 for job in jobs if job.status == JobStatus.OPEN),
+            'openPositions': open_positions,
+            'candidateCount': sum(totals.values()),
+            'statusCounts': totals,
+            'upcomingInterviews': sum(upcoming_counts.values())
+        },
+        'upcomingInterviews': [{
+            'interviewId': interview.id,
+            'jobId': str(interview.job_id),
+            'candidateId': str(interview.volunteer_id),
+            'candidateName': interview.full_name,
+            'interviewDate': interview.scheduled_date.isoformat(),
+            'durationMinutes': interview.duration_minutes,
+            'status': interview.status
+        } for interview in interviews]
+    }), 200
 
 
 @commander_bp.route('/jobs/<int:job_id>', methods=['PATCH'])
-@jwt_required()
+@role_required('commander')
 def patch_job_route(job_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     job = CommanderService.get_job_by_id(job_id)
     if not job:
         return jsonify({'message': 'Job not found'}), 404
@@ -294,34 +214,10 @@ def patch_job_route(job_id):
     data = request.get_json()
 
     updated_job = CommanderService.patch_job(job, data)
+    row = CommanderService.get_job_with_application_counts(updated_job.id)
 
-    return jsonify({'message': 'Job updated successfully', 'job': {
-        'id': str(updated_job.id),
-        'jobName': updated_job.title,
-        'jobCategory': updated_job.category,
-        'unit': updated_job.unit,
-        'address': updated_job.address,
-        'positions': updated_job.vacant_positions,
-        'openBase': updated_job.is_open_base,
-        'closedBase': not updated_job.is_open_base,
-        'jobDescription': updated_job.description,
-        'additionalInfo': updated_job.additional_info,
-        'questions': [{
-            'id': question.id,
-            'job_id': question.job_id,
-            'question_text': question.question_text,
-            'answer_text': question.answer_text
-        } for question in job.questions] if job.questions else [],
-        'education': updated_job.education,
-        'techSkills': updated_job.tech_skills,
-        'workExperience': updated_job.experience,
-        'passedCourses': updated_job.passed_courses,
-        'candidateCount': len(updated_job.applications),
-        'status': updated_job.status.name,
-        'department': updated_job.commander.department if updated_job.commander else None,  # Get department from job
-        'commanderId': updated_job.commander_id,
-        'applications_count': len(updated_job.applications)
-    }}), 200
+    return jsonify({'message': 'Job updated successfully',
+                    'job': job_payload(updated_job, *CommanderService.application_counts(row))}), 200
 
 
 def calculate_age(born):
@@ -337,13 +233,11 @@ def calculate_age(born):
 
 
 @commander_bp.route('/jobs/<int:job_id>/applications', methods=['GET'])
-@jwt_required()
+@role_required('commander')
 def get_job_applications(job_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
-    applications = CommanderService.get_job_applications(job_id, current_user.commander.id)
+    applications = CommanderService.get_job_applications(job_id, current_profile().id)
+    if applications is None:
+        return jsonify({'message': 'Job not found'}), 404
     return jsonify([{
         'candidateUserId': app.volunteer.id,
         'name': app.volunteer.full_name,
@@ -353,15 +247,54 @@ def get_job_applications(job_id):
     } for app in applications]), 200
 
 
+@commander_bp.route('/jobs/<int:job_id>/matches', methods=['GET'])
+@role_required('commander')
+def get_job_matches(job_id):
+    """Top k volunteers whose languages, courses, experience and education best fit the job"""
+    try:
+        k = int(request.args.get('k', 20))
+    except ValueError:
+        return jsonify({'message': 'k must be an integer'}), 400
+    if not 1 <= k <= MAX_MATCHES:
+        return jsonify({'message': f'k must be between 1 and {MAX_MATCHES}'}), 400
+
+    matches = MatchingService.get_job_matches(job_id, current_profile().id, k)
+    if matches is None:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify([{
+        'candidateUserId': volunteer.id,
+        'name': volunteer.full_name,
+        'age': calculate_age(volunteer.date_of_birth) if volunteer.date_of_birth else None,
+        'imageUrl': volunteer.user.image_url,
+        'score': round(score, 4),
+        'matched': matched
+    } for volunteer, score, matched in matches]), 200
+
+
+@commander_bp.route('/jobs/<int:job_id>/matches/batch', methods=['GET'])
+@role_required('commander')
+def get_job_batch_matches(job_id):
+    """Top candidates for the job from the last `flask matches rebuild` run"""
+    matches = MatchingService.get_batch_matches(job_id, current_profile().id)
+    if matches is None:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify([{
+        'candidateUserId': match.volunteer.id,
+        'name': match.volunteer.full_name,
+        'age': calculate_age(match.volunteer.date_of_birth) if match.volunteer.date_of_birth else None,
+        'imageUrl': match.volunteer.user.image_url,
+        'rank': match.rank,
+        'score': match.score,
+        'computedAt': match.computed_at.isoformat()
+    } for match in matches]), 200
+
+
 @commander_bp.route('/jobs/<int:job_id>/volunteers/<int:volunteer_id>', methods=['PATCH'])
-@jwt_required()
+@role_required('commander')
 def update_job_application_status(job_id, volunteer_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     try:
-        updated_application = CommanderService.patch_job_application_status(job_id, volunteer_id, request.get_json())
+        updated_application = CommanderService.patch_job_application_status(job_id, volunteer_id,
+                                                                            current_profile().id, request.get_json())
         return jsonify({'message': 'Job application status updated successfully', 'application': {
             'id': str(updated_application.id),
             'status': updated_application.status.name,
@@ -370,13 +303,34 @@ def update_job_application_status(job_id, volunteer_id):
         return jsonify({"message": str(e)}), 400
 
 
+@commander_bp.route('/jobs/<int:job_id>/volunteers/status', methods=['PATCH'])
+@role_required('commander')
+def bulk_update_job_application_status(job_id):
+    """Move many candidates of one job at once: {"updates": [{"volunteerId": 12, "status": "preferred"}, ...]}"""
+    updates = (request.get_json() or {}).get('updates')
+    if not isinstance(updates, list) or not updates:
+        return jsonify({'message': "'updates' must be a non-empty list"}), 400
+    if len(updates) > MAX_BULK_STATUS_UPDATES:
+        return jsonify({'message': f'At most {MAX_BULK_STATUS_UPDATES} updates per request'}), 400
+
+    try:
+        result = CommanderService.bulk_update_application_status(job_id, current_profile().id, updates)
+    except BadRequest as e:
+        return jsonify({'message': e.description}), 400
+    if result is None:
+        return jsonify({'message': 'Job not found'}), 404
+
+    by_status, missing = result
+    return jsonify({
+        'message': 'Job application statuses updated successfully',
+        'updated': {status.value: volunteer_ids for status, volunteer_ids in by_status.items()},
+        'notFound': missing
+    }), 200
+
+
 @commander_bp.route('/jobs/<int:job_id>/volunteers/<int:user_id>/interviews', methods=['POST', 'GET', 'PATCH', 'DELETE'])
-@jwt_required()
+@role_required('commander')
 def interview_management(job_id, user_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     try:
         if request.method == 'POST':
             data = request.get_json()
@@ -427,14 +381,36 @@ def interview_management(job_id, user_id):
         return jsonify({"message": "An error occurred: " + str(e)}), 500
 
 
+@commander_bp.route('/jobs/<int:job_id>/interviews/schedule', methods=['POST'])
+@role_required('commander')
+def schedule_interviews(job_id):
+    """Book candidates into free slots of the given availability windows (see SchedulingService.schedule)"""
+    data = request.get_json() or {}
+    try:
+        result = SchedulingService.schedule(job_id, current_profile().id, data)
+    except BadRequest as e:
+        return jsonify({'message': e.description}), 400
+    if result is None:
+        return jsonify({'message': 'Job not found'}), 404
+
+    interviews, unscheduled = result
+    return jsonify({
+        'scheduled': [{
+            'candidateId': str(volunteer_id),
+            'jobId': str(job_id),
+            'interviewId': interview.id,
+            'interviewDate': interview.scheduled_date.isoformat(),
+            'durationMinutes': interview.duration_minutes
+        } for volunteer_id, interview in interviews],
+        'unscheduled': unscheduled,
+        'dryRun': bool(data.get('dryRun'))
+    }), 200 if data.get('dryRun') else 201
+
+
 @commander_bp.route('/volunteers/<int:volunteer_id>', methods=['GET'])
-@jwt_required()
+@role_required('commander')
 def get_volunteer(volunteer_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
-    current_commander_id = current_user.id
+    current_commander_id = current_profile().id
     print('id of commander is', current_commander_id)
     volunteer = CommanderService.get_volunteer_if_applied_to_commander_jobs(current_commander_id, volunteer_id)
 
@@ -469,32 +445,24 @@ def get_volunteer(volunteer_id):
 
 
 @commander_bp.route('/applications/<int:application_id>/status', methods=['PUT'])
-@jwt_required()
+@role_required('commander')
 def update_application_status(application_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     data = request.get_json()
     application = CommanderService.update_application_status(
         application_id,
-        current_user.commander.id,
+        current_profile().id,
         data['status']
     )
     return jsonify({'message': 'Status updated successfully'}), 200
 
 
 @commander_bp.route('/applications/<int:application_id>/interview', methods=['POST'])
-@jwt_required()
+@role_required('commander')
 def schedule_interview(application_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     data = request.get_json()
     interview = CommanderService.schedule_interview(
         application_id,
-        current_user.commander.id,
+        current_profile().id,
         data
     )
     return jsonify({
@@ -504,59 +472,33 @@ def schedule_interview(application_id):
 
 
 @commander_bp.route('/jobs/<int:job_id>/volunteers/<int:user_id>/resume', methods=['GET'])
-@jwt_required()
+@role_required('commander')
 def get_resume_for_application(job_id, user_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
-    application = JobApplication.query.filter_by(job_id=job_id, volunteer_id=user_id).first()
-    if not application:
+    row = ResumeService.get_for_application(job_id, user_id)
+    if row is None:
         return jsonify({'message': 'Application not found'}), 404
 
-    resume = Resume.query.filter_by(application_id=application.id).first()
-    if not resume:
+    _, resume, blob = row
+    if resume is None:
         return jsonify({'message': 'Resume not found for this application'}), 404
 
-    resumes_folder = current_app.config['RESUMES_FOLDER']
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    full_path = os.path.join(upload_folder, resumes_folder, resume.file_path)
-
-    if not os.path.exists(full_path):
+    response = ResumeService.send(resume, blob)
+    if response is None:
         return jsonify({'message': 'File not found on server'}), 404
-
-    uploads_path = os.path.join(current_app.root_path, current_app.config['UPLOAD_FOLDER'])
-    resumes_path = os.path.join(uploads_path, current_app.config['RESUMES_FOLDER'])
-    filename = resume.file_path
-    try:
-        return send_from_directory(resumes_path, filename)
-        # return send_from_directory(resumes_path, filename, as_attachment=True, download_name="resume.pdf")
-    except FileNotFoundError:
-        return jsonify({'message': 'File not found on server'}), 404
-    except Exception as e:
-        return jsonify({'message': f'An unexpected error occurred: {str(e)}'}), 500  # Return JSON error
-    # return jsonify({
-    #     'file_path': resume.file_path,
-    #     'application_id': resume.application_id,
-    #     # ... other resume details
-    # }), 200
+    return response
 
 
 @commander_bp.route('/jobs/<int:job_id>/applications/export', methods=['GET'])
-@jwt_required()
+@role_required('commander')
 def export_applications(job_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'commander':
-        return jsonify({'message': 'Unauthorized'}), 403
-
-    csv_data = CommanderService.generate_applications_csv(job_id, current_user.commander.id)
-    if not csv_data:
+    csv_chunks = CommanderService.generate_applications_csv(job_id, current_profile().id)
+    if csv_chunks is None:
+        return jsonify({'message': 'Job not found'}), 404
+    if not csv_chunks:
         return jsonify({'message': 'No applications found'}), 404
 
-    output = io.StringIO(csv_data)
-    return send_file(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+    return Response(
+        stream_with_context(csv_chunks),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'applications_job_{job_id}.csv'
+        headers={'Content-Disposition': f'attachment; filename=applications_job_{job_id}.csv'}
     )
@@ -1,8 +1,16 @@
 # controllers/hr_controller.py
+import csv
+import io
+
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.exceptions import BadRequest
+from services.commander_service import CommanderService
 from services.hr_service import HRService
-from models import User
+from services.stats_service import StatsService
+from services.event_service import EventService, HR_CHANNEL
+from utils.pagination import parse_page_size
+from utils.streaming import stream_format, stream_query
+from utils.auth import role_required, STREAM_TOKEN_LOCATIONS
 from datetime import datetime, date, timedelta
 
 hr_bp = Blueprint('hr', __name__)
@@ -23,13 +31,9 @@ def create_hr():
 
 
 @hr_bp.route('/volunteers', methods=['POST'])
-@jwt_required()
+@role_required('hr')
 def create_volunteer():
     """Create a new volunteer user"""
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'hr':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     try:
         data = request.get_json()
         volunteer, error = HRService.create_volunteer(data)
@@ -48,6 +52,36 @@ def create_volunteer():
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+@hr_bp.route('/volunteers/import', methods=['POST'])
+@role_required('hr')
+def import_volunteers():
+    """
+    Bulk-create volunteers from a CSV upload (multipart field 'file', header row with the
+    create_volunteer field names) or a JSON list / {"volunteers": [...]}. Returns a per-row report.
+    """
+    upload = request.files.get('file')
+    if upload:
+        try:
+            rows = list(csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig')))
+        except (UnicodeDecodeError, csv.Error) as e:
+            return jsonify({'error': f'Could not read CSV file: {e}'}), 400
+    else:
+        data = request.get_json(silent=True)
+        rows = data.get('volunteers') if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            return jsonify({'error': 'Expected a CSV file or a JSON list of volunteers'}), 400
+    if not rows:
+        return jsonify({'error': 'No volunteers to import'}), 400
+
+    report = HRService.import_volunteers(rows)
+    created = sum(1 for row in report if row['status'] == 'created')
+    return jsonify({
+        'created': created,
+        'failed': len(report) - created,
+        'rows': report
+    }), 200
+
+
 def calculate_age(born):
     today = date.today()
     try:
@@ -59,24 +93,10 @@ def calculate_age(born):
     else:
         return today.year - born.year
 
-@hr_bp.route('/volunteers', methods=['GET'])
-@jwt_required()
-def get_volunteers():
-    """Get all volunteers"""
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'hr':
-        return jsonify({'message': 'Unauthorized'}), 403
-
-    volunteers = HRService.get_all_volunteers()
-    # return jsonify([{
-    #     'id': v.id,
-    #     'full_name': v.full_name,
-    #     'email': v.user.email,
-    #     'phone': v.phone,
-    #     'education': v.education,
-    #     'primary_profession': v.primary_profession
-    # } for v in volunteers]), 200
-    payload = [{
+
+def volunteer_payload(v):
+    """Serialize a volunteer loaded through HRService.volunteer_list_query"""
+    return {
         'id': v.id,
         'fullName': v.full_name,
         'idNumber': v.national_id,  # Assuming national_id is the same as idNumber
@@ -94,58 +114,66 @@ def get_volunteers():
         'interests': v.interests,
         'personalSummary': v.personal_summary,
         'jobStatuses': {str(job_app.job_id): job_app.status.value
-                         for job_app in v.applications},  # Map job application status
+                        for job_app in v.applications},  # Map job application status
         'imageUrl': v.user.image_url if v.user.image_url else None  # Handle potential null values
-    } for v in volunteers]
+    }
+
+
+@hr_bp.route('/volunteers', methods=['GET'])
+@role_required('hr')
+def get_volunteers():
+    """
+    Get volunteers, optionally filtered and paginated.
+
+    Filters: minAge, maxAge, gender, profile (comma separated), education, languages (comma separated).
+    Sorting: sort=id|fullName|age, prefix with '-' for descending.
+    Pagination: limit and cursor; when either is given the response is {items, nextCursor}.
+    Streaming: stream=json|ndjson streams the full filtered list instead (pagination is ignored).
+    """
+    try:
+        fmt = stream_format(request.args)
+        if fmt:
+            return stream_query(HRService.ordered_volunteers(request.args), volunteer_payload, fmt)
+        volunteers, next_cursor = HRService.search_volunteers(request.args)
+    except BadRequest as e:
+        return jsonify({'message': e.description}), 400
+
+    items = [volunteer_payload(v) for v in volunteers]
+    if 'limit' in request.args or 'cursor' in request.args:
+        return jsonify({'items': items, 'nextCursor': next_cursor}), 200
+    return jsonify(items), 200
+
+@hr_bp.route('/volunteers/search', methods=['GET'])
+@role_required('hr')
+def search_volunteers():
+    """
+    Free-text volunteer search: q (words, all must match) and limit.
+    Items are volunteer payloads plus a relevance score and a highlighted snippet.
+    """
+    try:
+        limit = parse_page_size(request.args.get('limit', 20))
+        results = HRService.search_volunteer_text(request.args.get('q'), limit)
+    except BadRequest as e:
+        return jsonify({'message': e.description}), 400
+    return jsonify([dict(volunteer_payload(v), score=score, snippet=snippet)
+                    for v, score, snippet in results]), 200
 
-    return jsonify(payload), 200
 
 @hr_bp.route('/volunteers/<int:volunteer_id>', methods=['GET'])
-@jwt_required()
+@role_required('hr')
 def get_volunteer(volunteer_id):
     """Get specific volunteer details"""
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'hr':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     volunteer = HRService.get_volunteer_by_id(volunteer_id)
-    payload = {
-        'id': volunteer.id,
-        'fullName': volunteer.full_name,
-        'idNumber': volunteer.national_id,  # Assuming national_id is the same as idNumber
-        'dateOfBirth': volunteer.date_of_birth.strftime('%Y-%m-%d') if volunteer.date_of_birth else None,
-        # Format dateOfBirth
-        'age': calculate_age(volunteer.date_of_birth) if volunteer.date_of_birth else None,
-        # Function to calculate age (optional)
-        'gender': volunteer.gender.value if volunteer.gender else None,  # Handle potential null values
-        'profile': volunteer.profile,
-        'phone': volunteer.user.phone,
-        'email': volunteer.user.email,
-        'address': volunteer.address,
-        'experience': volunteer.experience,
-        'education': volunteer.education,
-        'courses': volunteer.courses,
-        'languages': volunteer.languages,  # Function to extract languages (optional)
-        'interests': volunteer.interests,
-        'personalSummary': volunteer.personal_summary,
-        'jobStatuses': {str(job_app.job_id): job_app.status.value
-                        for job_app in volunteer.applications},  # Map job application status
-        'imageUrl': volunteer.user.image_url if volunteer.user.image_url else None  # Handle potential null values
-    }
+    if not volunteer:
+        return jsonify({'message': 'Volunteer not found'}), 404
+    return jsonify(volunteer_payload(volunteer)), 200
 
-    return jsonify(payload), 200
 
-
-@hr_bp.route('/jobs', methods=['GET'])
-@jwt_required()
-def get_jobs():
-    """Get all jobs"""
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'hr':
-        return jsonify({'message': 'Unauthorized'}), 403
-
-    jobs = HRService.get_all_jobs()
-    payload = [{
+def job_payload(row):
+    """Serialize a (Job, application counts...) row from HRService.job_list_query"""
+    job = row[0]
+    candidate_count, status_counts = CommanderService.application_counts(row)
+    return {
         'id': str(job.id),
         'jobName': job.title,
         'jobCategory': job.category,
@@ -162,24 +190,50 @@ def get_jobs():
         'techSkills': job.tech_skills,
         'workExperience': job.experience,
         'passedCourses': job.passed_courses,
-        'candidateCount': len(job.applications),
+        'candidateCount': candidate_count,
+        'statusCounts': status_counts,
         'status': job.status.name,
         'department':job.commander.department if job.commander else None,   # Get department from job
         'commanderId': job.commander_id,
-        'applications_count': len(job.applications)
-    } for job in jobs]
+        'applications_count': candidate_count
+    }
 
-    return jsonify(payload), 200
+
+@hr_bp.route('/jobs', methods=['GET'])
+@role_required('hr')
+def get_jobs():
+    """Get all jobs"""
+    fmt = stream_format(request.args)
+    if fmt:
+        return stream_query(HRService.job_list_query(), job_payload, fmt)
+
+    jobs = HRService.get_all_jobs()
+    return jsonify([job_payload(row) for row in jobs]), 200
+
+
+@hr_bp.route('/stats', methods=['GET'])
+@role_required('hr')
+def get_stats():
+    """Hires per unit, open positions per category and applications per status per department"""
+    stats = StatsService.get_stats()
+    return jsonify({
+        'hiresByUnit': stats['hires_by_unit'],
+        'openPositionsByCategory': stats['open_positions_by_category'],
+        'applicationsByDepartment': stats['applications_by_department']
+    }), 200
+
+
+@hr_bp.route('/events', methods=['GET'])
+@role_required('hr', locations=STREAM_TOKEN_LOCATIONS)
+def stream_events():
+    """Server-sent events for every application status and interview change"""
+    return EventService.stream(HR_CHANNEL)
 
 
 @hr_bp.route('/assignments', methods=['POST'])
-@jwt_required()
+@role_required('hr')
 def assign_volunteer():
     """Assign a volunteer to a job"""
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'hr':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     try:
         data = request.get_json()
         application = HRService.assign_volunteer_to_job(
@@ -195,13 +249,9 @@ def assign_volunteer():
 
 
 @hr_bp.route('/volunteers/<int:volunteer_id>/applications', methods=['GET'])
-@jwt_required()
+@role_required('hr')
 def get_volunteer_applications(volunteer_id):
     """Get all applications for a specific volunteer"""
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'hr':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     applications = HRService.get_volunteer_applications(volunteer_id)
     return jsonify([{
         'id': app.id,
@@ -212,13 +262,9 @@ def get_volunteer_applications(volunteer_id):
 
 
 @hr_bp.route('/jobs/<int:job_id>/applications', methods=['GET'])
-@jwt_required()
+@role_required('hr')
 def get_job_applications(job_id):
     """Get all applications for a specific job"""
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'hr':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     applications = HRService.get_job_applications(job_id)
     return jsonify([{
         'id': app.id,
@@ -229,13 +275,9 @@ def get_job_applications(job_id):
 
 
 @hr_bp.route('/volunteers/<int:volunteer_id>', methods=['PUT'])
-@jwt_required()
+@role_required('hr')
 def update_volunteer(volunteer_id):
     """Update volunteer information"""
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'hr':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     try:
         data = request.get_json()
         volunteer = HRService.update_volunteer(volunteer_id, data)
@@ -1,20 +1,21 @@
 from datetime import datetime
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from sqlalchemy.orm import selectinload
 from werkzeug.exceptions import BadRequest
 
+from services.event_service import EventService, volunteer_channel
 from services.volunteer_service import VolunteerService
-from models import User, Job
+from models import Job
+from utils.auth import role_required, current_user, current_profile, STREAM_TOKEN_LOCATIONS
 from utils.helpers import calculate_age
+from utils.streaming import stream_format, stream_query
 
 volunteer_bp = Blueprint('volunteer', __name__)
 
 
-@volunteer_bp.route('/jobs', methods=['GET'])
-@jwt_required()
-def get_available_jobs():
-    jobs = Job.query.filter_by(is_active=True).all()
-    return jsonify([{
+def available_job_payload(job):
+    return {
         'id': job.id,
         'title': job.title,
         'description': job.description,
@@ -34,21 +35,26 @@ def get_available_jobs():
         'tech_skills': job.tech_skills,
         'unit': job.unit,
         'status': job.status.name
+    }
 
-    } for job in jobs]), 200
+
+@volunteer_bp.route('/jobs', methods=['GET'])
+@jwt_required()
+def get_available_jobs():
+    query = Job.query.options(selectinload(Job.questions)).filter_by(is_active=True).order_by(Job.id)
+    fmt = stream_format(request.args)
+    if fmt:
+        return stream_query(query, available_job_payload, fmt)
+    return jsonify([available_job_payload(job) for job in query.all()]), 200
 
 
 @volunteer_bp.route('/jobs/<int:job_id>/apply', methods=['POST', 'DELETE'])
-@jwt_required()
+@role_required('volunteer')
 def apply_for_job(job_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'volunteer':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     if request.method == 'POST':
         try:
             data = request.get_json()
-            application = VolunteerService.apply_for_job(current_user.volunteer.id, job_id, data)
+            application = VolunteerService.apply_for_job(current_profile().id, job_id, data)
             return jsonify({'message': 'Application submitted successfully'}), 201
         except BadRequest as e:
             return jsonify({'message': str(e)}), 400
@@ -56,7 +62,7 @@ def apply_for_job(job_id):
             return jsonify({'message': 'An error occurred: ' + str(e)}), 500
 
     elif request.method == 'DELETE':
-        application = VolunteerService.delete_application(current_user.volunteer.id, job_id)
+        application = VolunteerService.delete_application(current_profile().id, job_id)
         if application:
             return jsonify({'message': 'Application deleted successfully'}), 200
         else:
@@ -77,11 +83,9 @@ def format_date_of_birth(data):
 
 
 @volunteer_bp.route('/<int:volunteer_id>', methods=['PATCH'])
-@jwt_required()
+@role_required('volunteer')
 def update_volunteer(volunteer_id):
-    current_user = User.query.get(get_jwt_identity())
-
-    if current_user.volunteer.id != volunteer_id:
+    if current_profile().id != volunteer_id:
         return jsonify({'message': 'Unauthorized'}), 403
     try:
         data = request.get_json()
@@ -123,12 +127,8 @@ def update_volunteer(volunteer_id):
 
 
 @volunteer_bp.route('/jobs/<int:job_id>/resume', methods=['POST'])
-@jwt_required()
+@role_required('volunteer')
 def upload_resume(job_id):
-    current_user = User.query.get(get_jwt_identity())
-    if current_user.role != 'volunteer':
-        return jsonify({'message': 'Unauthorized'}), 403
-
     if 'resume' not in request.files:
         return jsonify({'message': 'No resume file uploaded'}), 400
 
@@ -136,7 +136,7 @@ def upload_resume(job_id):
     original_filename = resume_file.filename  # Access the original filename
 
     try:
-        resume = VolunteerService.upload_resume(current_user.volunteer.id, job_id, resume_file)
+        resume = VolunteerService.upload_resume(current_profile().id, job_id, resume_file)
         # You can potentially use the original_filename in the service call
         return jsonify({'message': 'Resume uploaded successfully', 'resume_id': resume.id}), 201
     except BadRequest as e:
@@ -147,29 +147,29 @@ def upload_resume(job_id):
 
 
 @volunteer_bp.route('/jobs/<int:job_id>/check-application', methods=['GET'])
-@jwt_required()
+@role_required('volunteer')
 def check_application(job_id):
-    current_user = User.query.get(get_jwt_identity())
-    already_applied = VolunteerService.check_if_applied(current_user.volunteer.id, job_id)
+    already_applied = VolunteerService.check_if_applied(current_profile().id, job_id)
     return jsonify({'alreadyApplied': already_applied}), 200
 
 
 
+@volunteer_bp.route('/events', methods=['GET'])
+@role_required('volunteer', locations=STREAM_TOKEN_LOCATIONS)
+def stream_events():
+    """Server-sent events when this volunteer's applications or interviews change"""
+    return EventService.stream(volunteer_channel(current_profile().id))
+
+
 @volunteer_bp.route('/get-profile-details', methods=['GET'])
-@jwt_required()
+@role_required('volunteer')
 def get_profile_details():
-    current_user_id = get_jwt_identity()
-    print(f"User ID from JWT: {current_user_id}")
-
     try:
-        user = User.query.get(int(current_user_id))
+        user = current_user()
         if not user:
             return jsonify({'message': 'User not found'}), 404
 
-        if user.role != 'volunteer':
-            return jsonify({'message': 'User is not a volunteer'}), 403
-
-        volunteer = VolunteerService.get_user_info(user.id)
+        volunteer = current_profile()
         if not volunteer:
             return jsonify({'message': 'Volunteer profile not found'}), 404
 
@@ -1,3 +1,59 @@
+import random
+
+from flask import g, has_request_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+# SQLALCHEMY_BINDS keys starting with this are read replicas of the default database
+REPLICA_BIND_PREFIX = 'replica'
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingSession(Session):
+    """
+    Sends the SELECTs of read-only (GET) requests to a random replica bind, everything else
+    to the primary. Once a request writes anything it sticks to the primary for the rest of
+    the request, so it always reads its own writes. Outside requests (CLI, background
+    workers) everything goes to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or not getattr(clause, 'is_select', False):
+                # flushes, UPDATE/INSERT/DELETE and raw SQL all go to the primary
+                g.db_use_primary = True
+            elif request.method in READ_ONLY_METHODS and not g.get('db_use_primary'):
+                replicas = [engine for key, engine in self._db.engines.items()
+                            if key and key.startswith(REPLICA_BIND_PREFIX)]
+                if replicas:
+                    return random.choice(replicas)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+def use_primary():
+    """Read from the primary for the rest of this request (e.g. right after another request wrote)."""
+    g.db_use_primary = True
+
+
+def set_sqlite_pragmas(engine, pragmas):
+    """Run `PRAGMA name = value` for every new DBAPI connection of a SQLite engine."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.close()
+
 
-db = SQLAlchemy()
+def init_engines(app):
+    """Apply the engine profile's connect-time settings to every engine Flask-SQLAlchemy made."""
+    with app.app_context():
+        for engine in db.engines.values():
+            set_sqlite_pragmas(engine, app.config.get('SQLITE_PRAGMAS'))
@@ -0,0 +1,41 @@
+"""add indexes and unique constraints on hot lookup columns
+
+Revision ID: 05eeb7421b27
+Revises: 061b4bdb7422
+Create Date: 2026-10-18 09:12:41.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '05eeb7421b27'
+down_revision = '061b4bdb7422'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (job_id, volunteer_id) serves both the duplicate-application check and per-job scans
+    op.create_index('uq_job_applications_job_volunteer', 'job_applications', ['job_id', 'volunteer_id'], unique=True)
+    op.create_index('ix_job_applications_volunteer_id', 'job_applications', ['volunteer_id'], unique=False)
+    op.create_index('ix_volunteers_user_id', 'volunteers', ['user_id'], unique=True)
+    op.create_index('ix_commanders_user_id', 'commanders', ['user_id'], unique=True)
+    op.create_index('ix_hr_staff_user_id', 'hr_staff', ['user_id'], unique=True)
+    op.create_index('ix_jobs_commander_id', 'jobs', ['commander_id'], unique=False)
+    op.create_index('ix_job_questions_job_id', 'job_questions', ['job_id'], unique=False)
+    op.create_index('ix_interviews_application_id', 'interviews', ['application_id'], unique=True)
+    op.create_index('ix_resumes_application_id', 'resumes', ['application_id'], unique=True)
+
+
+def downgrade():
+    op.drop_index('ix_resumes_application_id', table_name='resumes')
+    op.drop_index('ix_interviews_application_id', table_name='interviews')
+    op.drop_index('ix_job_questions_job_id', table_name='job_questions')
+    op.drop_index('ix_jobs_commander_id', table_name='jobs')
+    op.drop_index('ix_hr_staff_user_id', table_name='hr_staff')
+    op.drop_index('ix_commanders_user_id', table_name='commanders')
+    op.drop_index('ix_volunteers_user_id', table_name='volunteers')
+    op.drop_index('ix_job_applications_volunteer_id', table_name='job_applications')
+    op.drop_index('uq_job_applications_job_volunteer', table_name='job_applications')
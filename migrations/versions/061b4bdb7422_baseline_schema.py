@@ -0,0 +1,28 @@
+"""baseline schema
+
+Revision ID: 061b4bdb7422
+Revises:
+Create Date: 2025-02-03 00:00:00.000000
+
+Existing databases were created with db.create_all() and stamped with this
+revision. It records that starting point so later migrations have a parent;
+fresh databases should run db.create_all() and then `flask db stamp head`.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '061b4bdb7422'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pass
+
+
+def downgrade():
+    pass
@@ -0,0 +1,45 @@
+"""add volunteer_search FTS5 index
+
+Revision ID: 3d7a1c5e9f02
+Revises: 9c2f4e1a7b30
+Create Date: 2026-10-18 14:12:40.118305
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7a1c5e9f02'
+down_revision = '9c2f4e1a7b30'
+branch_labels = None
+depends_on = None
+
+COLUMNS = 'experience, courses, languages, interests, personal_summary, education'
+NEW = ', '.join(f'new.{c.strip()}' for c in COLUMNS.split(','))
+OLD = ', '.join(f'old.{c.strip()}' for c in COLUMNS.split(','))
+
+
+def upgrade():
+    # SQLite only; other databases search with LIKE and need no index table
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(f"CREATE VIRTUAL TABLE volunteer_search USING fts5({COLUMNS}, content='volunteers', "
+               f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+    op.execute(f"CREATE TRIGGER volunteer_search_ai AFTER INSERT ON volunteers BEGIN "
+               f"INSERT INTO volunteer_search(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END")
+    op.execute(f"CREATE TRIGGER volunteer_search_ad AFTER DELETE ON volunteers BEGIN "
+               f"INSERT INTO volunteer_search(volunteer_search, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); END")
+    op.execute(f"CREATE TRIGGER volunteer_search_au AFTER UPDATE OF {COLUMNS} ON volunteers BEGIN "
+               f"INSERT INTO volunteer_search(volunteer_search, rowid, {COLUMNS}) VALUES ('delete', old.id, {OLD}); "
+               f"INSERT INTO volunteer_search(rowid, {COLUMNS}) VALUES (new.id, {NEW}); END")
+    # index the volunteers that already exist
+    op.execute("INSERT INTO volunteer_search(volunteer_search) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute('DROP TRIGGER IF EXISTS volunteer_search_au')
+    op.execute('DROP TRIGGER IF EXISTS volunteer_search_ad')
+    op.execute('DROP TRIGGER IF EXISTS volunteer_search_ai')
+    op.execute('DROP TABLE IF EXISTS volunteer_search')
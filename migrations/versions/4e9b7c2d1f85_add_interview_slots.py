@@ -0,0 +1,28 @@
+"""index interviews.scheduled_date, add duration_minutes
+
+Revision ID: 4e9b7c2d1f85
+Revises: c81f5a3e0d47
+Create Date: 2026-10-18 18:02:41.530918
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e9b7c2d1f85'
+down_revision = 'c81f5a3e0d47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('interviews', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duration_minutes', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_interviews_scheduled_date'), ['scheduled_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('interviews', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_interviews_scheduled_date'))
+        batch_op.drop_column('duration_minutes')
@@ -0,0 +1,39 @@
+"""add job_matches table for precomputed candidates
+
+Revision ID: 7b4e2d9a1c63
+Revises: 3d7a1c5e9f02
+Create Date: 2026-10-18 16:03:55.201947
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b4e2d9a1c63'
+down_revision = '3d7a1c5e9f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job_matches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('volunteer_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['volunteer_id'], ['volunteers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('job_matches', schema=None) as batch_op:
+        batch_op.create_index('ix_job_matches_job_rank', ['job_id', 'rank'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('job_matches', schema=None) as batch_op:
+        batch_op.drop_index('ix_job_matches_job_rank')
+
+    op.drop_table('job_matches')
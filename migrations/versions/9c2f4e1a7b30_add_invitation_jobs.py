@@ -0,0 +1,44 @@
+"""add invitation_jobs queue table
+
+Revision ID: 9c2f4e1a7b30
+Revises: 05eeb7421b27
+Create Date: 2026-10-18 10:41:07.552913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c2f4e1a7b30'
+down_revision = '05eeb7421b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('invitation_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('commander_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('event_id', sa.String(length=64), nullable=True),
+    sa.Column('event_link', sa.String(length=255), nullable=True),
+    sa.Column('meeting_link', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['commander_id'], ['commanders.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_invitation_jobs_commander_id', 'invitation_jobs', ['commander_id'], unique=False)
+    op.create_index('ix_invitation_jobs_status_next_attempt', 'invitation_jobs', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_invitation_jobs_status_next_attempt', table_name='invitation_jobs')
+    op.drop_index('ix_invitation_jobs_commander_id', table_name='invitation_jobs')
+    op.drop_table('invitation_jobs')
@@ -0,0 +1,62 @@
+"""add hr_stats summary counters
+
+Revision ID: a5d3f8e61b27
+Revises: 4e9b7c2d1f85
+Create Date: 2026-10-18 18:47:09.114352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5d3f8e61b27'
+down_revision = '4e9b7c2d1f85'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('hr_stats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('metric', sa.String(length=50), nullable=False),
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('subkey', sa.String(length=50), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('metric', 'key', 'subkey', name='uq_hr_stats_metric_key_subkey')
+    )
+
+    # backfill from the existing rows; the app keeps them current from here on
+    # (same numbers as `flask stats rebuild`, which can verify them later)
+    hr_stats = sa.table('hr_stats', sa.column('metric'), sa.column('key'), sa.column('subkey'), sa.column('value'))
+    jobs = sa.table('jobs', sa.column('id'), sa.column('commander_id'), sa.column('status'),
+                    sa.column('vacant_positions'), sa.column('category'), sa.column('unit'))
+    applications = sa.table('job_applications', sa.column('job_id'), sa.column('status'))
+    commanders = sa.table('commanders', sa.column('id'), sa.column('department'))
+    columns = ['metric', 'key', 'subkey', 'value']
+
+    category = sa.func.coalesce(jobs.c.category, '')
+    op.execute(hr_stats.insert().from_select(columns, sa.select(
+        sa.literal('open_positions_by_category'), category, sa.literal(''), sa.func.sum(jobs.c.vacant_positions)
+    ).where(sa.or_(jobs.c.status == 'OPEN', jobs.c.status.is_(None)), jobs.c.vacant_positions > 0)
+     .group_by(category)))
+
+    # enum columns hold the member names; the counters use the values, which are the names lowercased
+    status = sa.func.lower(sa.func.coalesce(applications.c.status, 'PENDING'))
+    department = sa.func.coalesce(commanders.c.department, '')
+    op.execute(hr_stats.insert().from_select(columns, sa.select(
+        sa.literal('applications_by_department'), department, status, sa.func.count()
+    ).select_from(applications.join(jobs, applications.c.job_id == jobs.c.id)
+                  .outerjoin(commanders, jobs.c.commander_id == commanders.c.id))
+     .group_by(department, status)))
+
+    unit = sa.func.coalesce(jobs.c.unit, '')
+    op.execute(hr_stats.insert().from_select(columns, sa.select(
+        sa.literal('hires_by_unit'), unit, sa.literal(''), sa.func.count()
+    ).select_from(applications.join(jobs, applications.c.job_id == jobs.c.id))
+     .where(applications.c.status == 'HIRED').group_by(unit)))
+
+
+def downgrade():
+    op.drop_table('hr_stats')
@@ -0,0 +1,53 @@
+"""add content-addressed resume_blobs
+
+Revision ID: c81f5a3e0d47
+Revises: 7b4e2d9a1c63
+Create Date: 2026-10-18 17:25:12.774210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f5a3e0d47'
+down_revision = '7b4e2d9a1c63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('resume_blobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('storage_path', sa.String(length=255), nullable=False),
+    sa.Column('content_type', sa.String(length=100), nullable=True),
+    sa.Column('encoding', sa.String(length=20), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('stored_size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('resume_blobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_resume_blobs_sha256'), ['sha256'], unique=True)
+
+    with op.batch_alter_table('resumes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('original_filename', sa.String(length=255), nullable=True))
+        batch_op.create_index(batch_op.f('ix_resumes_blob_id'), ['blob_id'], unique=False)
+        batch_op.create_foreign_key('fk_resumes_blob_id_resume_blobs', 'resume_blobs', ['blob_id'], ['id'])
+
+
+def downgrade():
+    with op.batch_alter_table('resumes', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_resumes_blob_id_resume_blobs', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_resumes_blob_id'))
+        batch_op.drop_column('original_filename')
+        batch_op.drop_column('blob_id')
+
+    with op.batch_alter_table('resume_blobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_resume_blobs_sha256'))
+
+    op.drop_table('resume_blobs')
@@ -0,0 +1,25 @@
+"""add an index on volunteers.date_of_birth
+
+Revision ID: e3a9c1f7b25d
+Revises: a5d3f8e61b27
+Create Date: 2026-10-18 16:40:12.503871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3a9c1f7b25d'
+down_revision = 'a5d3f8e61b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # serves the minAge/maxAge filters and keyset pages of the HR volunteer list sorted by age
+    op.create_index('ix_volunteers_date_of_birth', 'volunteers', ['date_of_birth'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_volunteers_date_of_birth', table_name='volunteers')
@@ -1,8 +1,12 @@
 from .user import User
 from .volunteer import Volunteer
-from . volunteer import Resume
+from . volunteer import Resume, ResumeBlob
+from . import volunteer_search
 from .commander import Commander
 from .hr import HR
 from .job import Job, JobQuestion
 from .application import JobApplication, ApplicationAnswer
 from .interview import Interview
+from .invitation import InvitationJob
+from .job_match import JobMatch
+from .hr_stat import HRStat
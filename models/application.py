@@ -17,9 +17,14 @@ class ApplicationStatus(enum.Enum):
 
 class JobApplication(db.Model):
     __tablename__ = 'job_applications'
+    # One application per (job, volunteer); the unique index doubles as the lookup path
+    # for every filter_by(job_id=..., volunteer_id=...) and for per-job scans.
+    __table_args__ = (
+        db.Index('uq_job_applications_job_volunteer', 'job_id', 'volunteer_id', unique=True),
+    )
     id = db.Column(db.Integer, primary_key=True)
     job_id = db.Column(db.Integer, db.ForeignKey('jobs.id'), nullable=False)
-    volunteer_id = db.Column(db.Integer, db.ForeignKey('volunteers.id'), nullable=False)
+    volunteer_id = db.Column(db.Integer, db.ForeignKey('volunteers.id'), nullable=False, index=True)
     status = db.Column(db.Enum(ApplicationStatus), default=ApplicationStatus.PENDING)
     application_date = db.Column(db.DateTime, default=datetime.utcnow)
     # resume = db.relationship('Resume', uselist=False, backref='application')
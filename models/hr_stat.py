@@ -0,0 +1,17 @@
+from db import db
+
+
+class HRStat(db.Model):
+    """
+    One pre-aggregated HR reporting counter, kept current by services.stats_service in the
+    same transaction as the change it counts. `key`/`subkey` are '' when not applicable.
+    """
+    __tablename__ = 'hr_stats'
+    __table_args__ = (
+        db.UniqueConstraint('metric', 'key', 'subkey', name='uq_hr_stats_metric_key_subkey'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    metric = db.Column(db.String(50), nullable=False)
+    key = db.Column(db.String(100), nullable=False, default='')
+    subkey = db.Column(db.String(50), nullable=False, default='')
+    value = db.Column(db.Integer, nullable=False, default=0)
@@ -4,8 +4,10 @@ from datetime import datetime
 class Interview(db.Model):
     __tablename__ = 'interviews'
     id = db.Column(db.Integer, primary_key=True)
-    application_id = db.Column(db.Integer, db.ForeignKey('job_applications.id'), nullable=False)
-    scheduled_date = db.Column(db.DateTime)
+    application_id = db.Column(db.Integer, db.ForeignKey('job_applications.id'), nullable=False, unique=True,
+                               index=True)
+    scheduled_date = db.Column(db.DateTime, index=True)  # range scans by the slot scheduler
+    duration_minutes = db.Column(db.Integer)  # NULL: booked by hand, counted as DEFAULT_INTERVIEW_MINUTES
     general_info = db.Column(db.Text)
     schedule = db.Column(db.Text)
     management_results = db.Column(db.Text)
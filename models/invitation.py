@@ -0,0 +1,24 @@
+from db import db
+from datetime import datetime
+
+
+class InvitationJob(db.Model):
+    """A queued interview invitation, sent to Google Calendar by the invitation workers."""
+    __tablename__ = 'invitation_jobs'
+    __table_args__ = (
+        # the workers poll for the oldest due job in a given state
+        db.Index('ix_invitation_jobs_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    commander_id = db.Column(db.Integer, db.ForeignKey('commanders.id'), nullable=False, index=True)
+    payload = db.Column(db.Text, nullable=False)  # JSON of the original invitation request
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)  # lease held by the worker currently sending it
+    last_error = db.Column(db.Text)
+    event_id = db.Column(db.String(64))
+    event_link = db.Column(db.String(255))
+    meeting_link = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
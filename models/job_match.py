@@ -0,0 +1,19 @@
+from db import db
+from datetime import datetime
+
+
+class JobMatch(db.Model):
+    """One precomputed top candidate for a job, written by `flask matches rebuild`."""
+    __tablename__ = 'job_matches'
+    __table_args__ = (
+        # the commander UI reads a job's candidates in rank order
+        db.Index('ix_job_matches_job_rank', 'job_id', 'rank'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('jobs.id', ondelete='CASCADE'), nullable=False)
+    volunteer_id = db.Column(db.Integer, db.ForeignKey('volunteers.id', ondelete='CASCADE'), nullable=False)
+    rank = db.Column(db.Integer, nullable=False)  # 1 = best
+    score = db.Column(db.Float, nullable=False)  # cosine similarity of the TF-IDF vectors, 0..1
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    volunteer = db.relationship('Volunteer')
@@ -1,5 +1,6 @@
 from db import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+from utils.passwords import hash_password
 
 
 class User(db.Model):
@@ -21,7 +22,7 @@ class User(db.Model):
     hr = db.relationship('HR', backref='user', uselist=False)
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
\ No newline at end of file
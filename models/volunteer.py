@@ -14,7 +14,7 @@ class Gender(enum.Enum):
 class Volunteer(db.Model):
     __tablename__ = 'volunteers'
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, unique=True, index=True)
     full_name = db.Column(db.String(100), nullable=False)
     national_id = db.Column(db.String(20), unique=True, nullable=False)
     join_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -26,7 +26,7 @@ class Volunteer(db.Model):
 
     # New columns:
     profile= db.Column(db.Integer)
-    date_of_birth = db.Column(db.Date)
+    date_of_birth = db.Column(db.Date, index=True)  # age filters and the age sort
     gender = db.Column(db.Enum(Gender)) #Gender as enum
     experience = db.Column(db.Text)
     courses = db.Column(db.Text)
@@ -46,10 +46,31 @@ class Resume(db.Model):
     # volunteer_id = db.Column(db.Integer, db.ForeignKey('volunteers.id'), nullable=False)
     # application_id = db.Column(db.Integer, db.ForeignKey('job_applications.id'), nullable=False) # changed
     # application = db.relationship('JobApplication', backref=db.backref('resumes', cascade="all, delete-orphan", uselist=False))
-    application_id = db.Column(db.Integer, ForeignKey('job_applications.id', ondelete="CASCADE"), nullable=False)
+    application_id = db.Column(db.Integer, ForeignKey('job_applications.id', ondelete="CASCADE"), nullable=False,
+                               unique=True, index=True)
     application = db.relationship('JobApplication', back_populates='resume')
 
     # application = db.relationship('JobApplication', foreign_keys=[application_id],
     #                               backref=db.backref('resumes', cascade="all, delete-orphan", uselist=False))
     file_path = db.Column(db.String(255))
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
+    # content-addressed file shared by every resume with the same bytes; NULL for files
+    # uploaded before resumes were deduplicated (those live directly under RESUMES_FOLDER)
+    blob_id = db.Column(db.Integer, db.ForeignKey('resume_blobs.id'), index=True)
+    blob = db.relationship('ResumeBlob')
+    original_filename = db.Column(db.String(255))
+
+
+class ResumeBlob(db.Model):
+    """One stored resume file, named by the SHA-256 of its (uncompressed) content."""
+    __tablename__ = 'resume_blobs'
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), nullable=False, unique=True, index=True)
+    storage_path = db.Column(db.String(255), nullable=False)  # relative to RESUMES_FOLDER
+    content_type = db.Column(db.String(100))
+    encoding = db.Column(db.String(20))  # 'gzip' when stored compressed, else NULL
+    size = db.Column(db.Integer, nullable=False)  # original bytes
+    stored_size = db.Column(db.Integer, nullable=False)  # bytes on disk
+    ref_count = db.Column(db.Integer, nullable=False, default=0)  # Resume rows pointing here
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,39 @@
+from sqlalchemy import DDL, event
+
+from .volunteer import Volunteer
+
+# SQLite FTS5 index over the volunteers' free-text fields. It is an external-content table:
+# the text lives only in `volunteers`, the index is kept in sync by the triggers below.
+# Other databases have no such table and search falls back to LIKE (HRService.search_volunteer_text).
+VOLUNTEER_SEARCH_TABLE = 'volunteer_search'
+VOLUNTEER_SEARCH_COLUMNS = ['experience', 'courses', 'languages', 'interests', 'personal_summary', 'education']
+
+_columns = ', '.join(VOLUNTEER_SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{c}' for c in VOLUNTEER_SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{c}' for c in VOLUNTEER_SEARCH_COLUMNS)
+
+VOLUNTEER_SEARCH_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {VOLUNTEER_SEARCH_TABLE} USING fts5("
+    f"{_columns}, content='volunteers', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS volunteer_search_ai AFTER INSERT ON volunteers BEGIN "
+    f"INSERT INTO {VOLUNTEER_SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS volunteer_search_ad AFTER DELETE ON volunteers BEGIN "
+    f"INSERT INTO {VOLUNTEER_SEARCH_TABLE}({VOLUNTEER_SEARCH_TABLE}, rowid, {_columns}) "
+    f"VALUES ('delete', old.id, {_old_values}); END",
+    # only when an indexed column changed, so status-only updates do not touch the index
+    f"CREATE TRIGGER IF NOT EXISTS volunteer_search_au AFTER UPDATE OF {_columns} ON volunteers BEGIN "
+    f"INSERT INTO {VOLUNTEER_SEARCH_TABLE}({VOLUNTEER_SEARCH_TABLE}, rowid, {_columns}) "
+    f"VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO {VOLUNTEER_SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+]
+
+# db.create_all() builds the index along with the volunteers table, db.drop_all() removes it
+for _statement in VOLUNTEER_SEARCH_DDL:
+    event.listen(Volunteer.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Volunteer.__table__, 'before_drop',
+             DDL(f'DROP TABLE IF EXISTS {VOLUNTEER_SEARCH_TABLE}').execute_if(dialect='sqlite'))
+
+
+def include_name(name, type_, parent_names):
+    """Alembic filter: the FTS table and its shadow tables are managed by hand, not autogenerate."""
+    return not (type_ == 'table' and name.startswith(VOLUNTEER_SEARCH_TABLE))
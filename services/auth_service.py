@@ -1,19 +1,36 @@
 from datetime import datetime
 
 from flask_jwt_extended import create_access_token
+from sqlalchemy.orm import joinedload
 
 from db import db
 from models import *
+from utils.auth import PROFILE_RELATIONSHIPS
+from utils.passwords import verify_password
 
 
 class AuthService:
     @staticmethod
     def login(email, password):
-        user = User.query.filter_by(email=email).first()
-        if user and user.check_password(password):
-            access_token = AuthService.generate_token(user)
-            return access_token, user.role, user.id
-        return None, None, None
+        """
+        Returns (token, user), or (None, None) for bad credentials. The user comes with its
+        role profile (user.volunteer / .commander / .hr) already loaded by the same query.
+        """
+        # the role is not known before the row is read, so join every profile table; each is a
+        # unique user_id lookup and at most one of them matches
+        user = User.query.options(*(joinedload(relationship) for relationship in PROFILE_RELATIONSHIPS.values())) \
+            .filter_by(email=email).first()
+        if not user:
+            return None, None
+        # runs in the verification pool; may raise PasswordQueueFull under load
+        matches, new_hash = verify_password(user.password_hash, password)
+        if not matches:
+            return None, None
+        if new_hash:
+            # PASSWORD_HASH_METHOD changed since this hash was made; upgrade it transparently
+            user.password_hash = new_hash
+            db.session.commit()
+        return AuthService.generate_token(user), user
 
     @staticmethod
     def generate_token(user):
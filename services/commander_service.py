@@ -1,4 +1,3 @@
-from flask_jwt_extended import get_jwt_identity
 
 from models import Volunteer
 from models.commander import Commander
@@ -10,8 +9,13 @@ from datetime import datetime
 from flask import abort
 import csv
 import io
+from sqlalchemy import case, func, or_, update
+from sqlalchemy.orm import joinedload, selectinload
 from werkzeug.exceptions import BadRequest
 from models.user import User
+from services.scheduling_service import CANCELLED, SchedulingService, parse_datetime
+from services.event_service import application_event, queue_event
+from services.stats_service import StatsService
 
 
 class CommanderService:
@@ -63,7 +67,74 @@ class CommanderService:
 
     @staticmethod
     def get_commander_jobs(commander_id):
-        return Job.query.filter_by(commander_id=commander_id).all()
+        return CommanderService.jobs_with_application_counts(
+            Job.query.options(joinedload(Job.commander), selectinload(Job.questions))
+            .filter_by(commander_id=commander_id)
+            .order_by(Job.id)
+        ).all()
+
+    @staticmethod
+    def jobs_with_application_counts(job_query):
+        """
+        Attach application counts to a Job query. Rows come back as (Job, total, <one column per
+        ApplicationStatus>) from a single GROUP BY subquery, so no JobApplication rows are loaded.
+        The subquery only counts applications to the jobs `job_query` selects, so one job's
+        counts do not cost a pass over every application.
+        Use application_counts(row) to turn a row into the payload dict.
+        """
+        per_status = [func.sum(case((JobApplication.status == status, 1), else_=0)).label(status.value)
+                      for status in ApplicationStatus]
+        job_ids = job_query.with_entities(Job.id).order_by(None)
+        counts = db.session.query(
+            JobApplication.job_id.label('job_id'),
+            func.count(JobApplication.id).label('total'),
+            *per_status
+        ).filter(JobApplication.job_id.in_(job_ids)).group_by(JobApplication.job_id).subquery()
+
+        return job_query.outerjoin(counts, counts.c.job_id == Job.id).add_columns(
+            counts.c.total, *[counts.c[status.value] for status in ApplicationStatus]
+        )
+
+    @staticmethod
+    def application_counts(row):
+        """(Job, total, per-status...) row -> (total, {status: count})"""
+        by_status = {status.value: row[i + 2] or 0 for i, status in enumerate(ApplicationStatus)}
+        return row[1] or 0, by_status
+
+    @staticmethod
+    def get_dashboard(commander_id, upcoming_limit):
+        """
+        Everything the commander dashboard shows, from four queries whatever the number of jobs
+        and applicants: the jobs, application counts grouped by (job, status), upcoming
+        interview counts grouped by job, and the next `upcoming_limit` interviews.
+        Returns (jobs, counts by job id, upcoming counts by job id, upcoming interview rows).
+        """
+        now = datetime.utcnow()
+        jobs = db.session.query(Job.id, Job.title, Job.status, Job.vacant_positions, Job.category, Job.unit) \
+            .filter(Job.commander_id == commander_id).order_by(Job.id).all()
+
+        counts = {}
+        for job_id, status, count in db.session.query(JobApplication.job_id, JobApplication.status,
+                                                      func.count(JobApplication.id)) \
+                .join(Job, JobApplication.job_id == Job.id).filter(Job.commander_id == commander_id) \
+                .group_by(JobApplication.job_id, JobApplication.status):
+            counts.setdefault(job_id, {})[status] = count
+
+        upcoming = Interview.query.join(JobApplication, Interview.application_id == JobApplication.id) \
+            .join(Job, JobApplication.job_id == Job.id) \
+            .filter(Job.commander_id == commander_id, Interview.scheduled_date >= now,
+                    or_(Interview.status.is_(None), Interview.status != CANCELLED))
+        upcoming_counts = dict(upcoming.with_entities(JobApplication.job_id, func.count(Interview.id))
+                               .group_by(JobApplication.job_id))
+        interviews = upcoming.join(Volunteer, JobApplication.volunteer_id == Volunteer.id) \
+            .with_entities(Interview.id, Interview.scheduled_date, Interview.duration_minutes, Interview.status,
+                           JobApplication.job_id, JobApplication.volunteer_id, Volunteer.full_name) \
+            .order_by(Interview.scheduled_date).limit(upcoming_limit).all()
+        return jobs, counts, upcoming_counts, interviews
+
+    @staticmethod
+    def get_job_with_application_counts(job_id):
+        return CommanderService.jobs_with_application_counts(Job.query.filter(Job.id == job_id)).first()
 
     @staticmethod
     def get_job_by_id(job_id):
@@ -185,9 +256,10 @@ class CommanderService:
 
     @staticmethod
     def get_job_applications(job_id, commander_id):
+        """The job's applications, or None when the job is not this commander's."""
         job = Job.query.filter_by(id=job_id, commander_id=commander_id).first()
         if not job:
-            abort(404)
+            return None
         return JobApplication.query.filter_by(job_id=job_id).all()
 
     @staticmethod
@@ -200,7 +272,7 @@ class CommanderService:
         return application
 
     @staticmethod
-    def patch_job_application_status(job_id, volunteer_id, data):
+    def patch_job_application_status(job_id, volunteer_id, commander_id, data):
         if 'status' not in data:
             raise BadRequest("Missing 'status' field in request data.")
 
@@ -214,16 +286,67 @@ class CommanderService:
         if not application:
             raise BadRequest('Job application not found')
 
-        commander_id = get_jwt_identity()
-        job = Job.query.get(job_id)
-
-        if not job or str(job.commander_id) != str(commander_id):
+        # the JWT identity is the user id; jobs belong to the commander profile
+        if application.job.commander_id != commander_id:
             raise BadRequest("You don't have permission to update this application.")
 
         application.status = status_value
         db.session.commit()
         return application
 
+    @staticmethod
+    def bulk_update_application_status(job_id, commander_id, updates):
+        """
+        Set the status of many applications to one job in a single transaction: one ownership
+        check, one lookup, then one UPDATE per target status. `updates` is a list of
+        {'volunteerId', 'status'}. Returns None when the job is not this commander's, else
+        (updated volunteer ids by status, volunteer ids with no application to this job).
+        """
+        targets = {}
+        for i, item in enumerate(updates):
+            if not isinstance(item, dict) or 'volunteerId' not in item or 'status' not in item:
+                raise BadRequest(f"Update {i} needs 'volunteerId' and 'status'")
+            try:
+                volunteer_id = int(item['volunteerId'])
+                status_value = ApplicationStatus(item['status'])
+            except (TypeError, ValueError):
+                raise BadRequest(f"Invalid update {i}: {item}")
+            if targets.setdefault(volunteer_id, status_value) != status_value:
+                raise BadRequest(f"Conflicting statuses for volunteer {volunteer_id}")
+
+        owner = db.session.query(Job.commander_id).filter(Job.id == job_id).scalar()
+        if owner is None or owner != commander_id:
+            return None
+
+        current = {volunteer_id: (application_id, status) for volunteer_id, application_id, status in
+                   db.session.query(JobApplication.volunteer_id, JobApplication.id, JobApplication.status)
+                   .filter(JobApplication.job_id == job_id, JobApplication.volunteer_id.in_(targets))}
+        missing = [volunteer_id for volunteer_id in targets if volunteer_id not in current]
+
+        # only rows whose status actually changes, grouped by the status they move to
+        by_status = {}
+        for volunteer_id, status_value in targets.items():
+            if volunteer_id in current and current[volunteer_id][1] != status_value:
+                by_status.setdefault(status_value, []).append(volunteer_id)
+
+        for status_value, volunteer_ids in by_status.items():
+            db.session.execute(
+                update(JobApplication)
+                .where(JobApplication.job_id == job_id, JobApplication.volunteer_id.in_(volunteer_ids))
+                .values(status=status_value),
+                execution_options={'synchronize_session': False})
+        StatsService.record_status_changes(job_id, [(current[volunteer_id][1], status_value)
+                                                    for status_value, volunteer_ids in by_status.items()
+                                                    for volunteer_id in volunteer_ids])
+        # the UPDATEs bypass the flush that normally queues these
+        for status_value, volunteer_ids in by_status.items():
+            for volunteer_id in volunteer_ids:
+                application_id, previous = current[volunteer_id]
+                queue_event(db.session, application_event('status', application_id, job_id, volunteer_id,
+                                                          status_value, previous), volunteer_id, commander_id)
+        db.session.commit()
+        return by_status, missing
+
     @staticmethod
     def create_interview(job_id, user_id, data):
         user = User.query.get(user_id)
@@ -234,11 +357,10 @@ class CommanderService:
         scheduled_date_str = data.get('interviewDate')
         scheduled_date = None  # Default to None if no date is provided
         if scheduled_date_str:
-            try:
-                # scheduled_date = datetime.fromisoformat(scheduled_date_str)  # convert to datetime
-                scheduled_date = datetime.fromisoformat(scheduled_date_str.replace('Z', '+00:00'))  # convert to datetime
-            except ValueError:
-                raise BadRequest("Invalid date format. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SS).")
+            scheduled_date = parse_datetime(scheduled_date_str, 'date format')
+            busy_until = SchedulingService.find_conflict(application.job.commander_id, scheduled_date)
+            if busy_until is not None:
+                raise BadRequest(f"The commander has another interview until {busy_until.isoformat()}")
 
         interview = Interview(
             application_id=application.id,
@@ -343,33 +465,65 @@ class CommanderService:
         return interview
 
     @staticmethod
-    def generate_applications_csv(job_id, commander_id):
-        applications = JobApplication.query.filter_by(job_id=job_id).all()
-        if not applications:
+    def generate_applications_csv(job_id, commander_id, rows_per_chunk=500):
+        """
+        CSV export of a job's applications as a generator of text chunks; an empty list when the
+        job has none, None when the job is not this commander's.
+        Rows come from one joined, column-only query iterated with yield_per, so memory stays flat
+        and the first chunk can go out before the last row is read.
+        """
+        job = Job.query.filter_by(id=job_id, commander_id=commander_id).first()
+        if not job:
             return None
+        if not db.session.query(JobApplication.id).filter_by(job_id=job_id).first():
+            return []
+
+        rows = db.session.query(
+            JobApplication.id,
+            Volunteer.full_name,
+            JobApplication.status,
+            JobApplication.application_date,
+            User.phone,
+            User.email,
+            Volunteer.education,
+            Interview.status
+        ).join(Volunteer, JobApplication.volunteer_id == Volunteer.id) \
+            .join(User, Volunteer.user_id == User.id) \
+            .outerjoin(Interview, Interview.application_id == JobApplication.id) \
+            .filter(JobApplication.job_id == job_id) \
+            .order_by(JobApplication.id) \
+            .yield_per(rows_per_chunk)
+
+        def generate():
+            output = io.StringIO()
+            writer = csv.writer(output)
+
+            # Write header
+            writer.writerow(['Application ID', 'Volunteer Name', 'Status', 'Application Date',
+                             'Phone', 'Email', 'Education', 'Interview Status'])
+
+            # Write data
+            for i, (app_id, full_name, status, application_date, phone, email, education,
+                    interview_status) in enumerate(rows, 1):
+                writer.writerow([
+                    app_id,
+                    full_name,
+                    status,
+                    application_date.strftime('%Y-%m-%d') if application_date else '',
+                    phone,
+                    email,
+                    education,
+                    interview_status if interview_status else 'No interview'
+                ])
+                if i % rows_per_chunk == 0:
+                    yield output.getvalue()
+                    output.seek(0)
+                    output.truncate(0)
+
+            yield output.getvalue()
+
+        return generate()
 
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Write header
-        writer.writerow(['Application ID', 'Volunteer Name', 'Status', 'Application Date',
-                         'Phone', 'Email', 'Education', 'Interview Status'])
-
-        # Write data
-        for app in applications:
-            writer.writerow([
-                app.id,
-                app.volunteer.full_name,
-                app.status,
-                app.application_date.strftime('%Y-%m-%d'),
-                app.volunteer.phone,
-                app.volunteer.user.email,
-                app.volunteer.education,
-                app.interview.status if app.interview else 'No interview'
-            ])
-
-        return output.getvalue()
-    
     @staticmethod
     def get_commander_user_info(user_id):
         return User.query.filter_by(id=user_id).first()
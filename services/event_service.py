@@ -0,0 +1,120 @@
+import logging
+
+from flask import has_app_context
+from sqlalchemy import event, inspect
+
+from db import RoutingSession, db
+from models import Interview, Job, JobApplication
+from models.application import ApplicationStatus
+from utils import events
+
+logger = logging.getLogger(__name__)
+
+HR_CHANNEL = 'hr'
+
+
+def volunteer_channel(volunteer_id):
+    return f'volunteer:{volunteer_id}'
+
+
+def commander_channel(commander_id):
+    return f'commander:{commander_id}'
+
+
+def _status(value):
+    """'preferred' for ApplicationStatus.PREFERRED, 'PREFERRED' or 'preferred' as set in code."""
+    if value is None or isinstance(value, ApplicationStatus):
+        return value.value if value else None
+    try:
+        return ApplicationStatus[value].value
+    except KeyError:
+        return str(value)
+
+
+def application_event(kind, application_id, job_id, volunteer_id, status, previous_status=None):
+    payload = {'type': f'application.{kind}', 'applicationId': application_id, 'jobId': job_id,
+               'volunteerId': volunteer_id, 'status': _status(status)}
+    if kind == 'status':
+        payload['previousStatus'] = _status(previous_status)
+    return payload
+
+
+def queue_event(session, payload, volunteer_id, commander_id):
+    """Publish `payload` to the volunteer, the job's commander and HR once `session` commits."""
+    session.info.setdefault('pending_events', []).append((payload, volunteer_id, commander_id))
+
+
+def _commander_id(session, job_id):
+    job = session.get(Job, job_id) if job_id is not None else None
+    return job.commander_id if job else None
+
+
+def _collect_application(session, application, kind):
+    previous = None
+    if kind == 'updated':
+        history = inspect(application).attrs.status.history
+        if not history.has_changes():
+            return
+        kind, previous = 'status', history.deleted[0] if history.deleted else None
+    job = application.__dict__.get('job')
+    commander_id = job.commander_id if job is not None else _commander_id(session, application.job_id)
+    queue_event(session, application_event(kind, application.id, application.job_id, application.volunteer_id,
+                                           application.status, previous),
+                application.volunteer_id, commander_id)
+
+
+def _collect_interview(session, interview, kind):
+    application = interview.__dict__.get('application') or session.get(JobApplication, interview.application_id)
+    if application is None:
+        return  # removed together with its application, which sends its own event
+    queue_event(session, {
+        'type': f'interview.{kind}',
+        'interviewId': interview.id,
+        'applicationId': application.id,
+        'jobId': application.job_id,
+        'volunteerId': application.volunteer_id,
+        'interviewDate': interview.scheduled_date.isoformat() if interview.scheduled_date else None,
+        'status': interview.status
+    }, application.volunteer_id, _commander_id(session, application.job_id))
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_events(session, flush_context):
+    changes = [(obj, 'created') for obj in session.new] + [(obj, 'updated') for obj in session.dirty] + \
+              [(obj, 'deleted') for obj in session.deleted]
+    with session.no_autoflush:
+        for obj, kind in changes:
+            if isinstance(obj, JobApplication):
+                _collect_application(session, obj, kind)
+            elif isinstance(obj, Interview) and (kind != 'updated' or session.is_modified(obj)):
+                _collect_interview(session, obj, kind)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _publish_events(session):
+    pending = session.info.pop('pending_events', None)
+    if not pending or not has_app_context():
+        return
+    for payload, volunteer_id, commander_id in pending:
+        channels = [volunteer_channel(volunteer_id), HR_CHANNEL]
+        if commander_id is not None:
+            channels.append(commander_channel(commander_id))
+        try:
+            for channel in channels:
+                events.publish(channel, payload)
+        except Exception:
+            # the change is committed either way; clients fall back to refetching
+            logger.exception('Could not publish %s', payload['type'])
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _drop_events(session):
+    session.info.pop('pending_events', None)
+
+
+class EventService:
+    @staticmethod
+    def stream(*channels):
+        """SSE response for `channels`; the database session is released first, the stream never needs it."""
+        db.session.close()
+        return events.event_stream(channels)
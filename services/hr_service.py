@@ -1,11 +1,46 @@
 # services/hr_service.py
-from datetime import datetime
+import logging
+import re
+from datetime import datetime, date
 from random import randint
 from models import User, HR, Volunteer, JobApplication, Job
 from models.volunteer import Gender
+from models.volunteer_search import VOLUNTEER_SEARCH_COLUMNS, VOLUNTEER_SEARCH_TABLE
 from services.auth_service import AuthService
+from services.commander_service import CommanderService
+from services.matching_service import match_index
 from db import db
 from flask import abort, jsonify
+from sqlalchemy import Float, Integer, String, column, insert, or_, text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import joinedload, selectinload
+from werkzeug.exceptions import BadRequest
+from utils.helpers import date_years_ago
+from utils.pagination import keyset_page, parse_page_size
+from utils.passwords import hash_passwords
+
+
+# sort key -> (column, ascending, cursor value parser, row value getter)
+# Volunteers without a birth date sort as the oldest: SQLite orders NULL before every date.
+VOLUNTEER_SORT_KEYS = {
+    'id': (Volunteer.id, True, int, lambda v: v.id),
+    'fullName': (Volunteer.full_name, True, str, lambda v: v.full_name),
+    'age': (Volunteer.date_of_birth, False, date.fromisoformat, lambda v: v.date_of_birth),
+}
+
+logger = logging.getLogger(__name__)
+
+# bm25 weight per VOLUNTEER_SEARCH_COLUMNS entry: a hit in experience or courses counts most
+SEARCH_COLUMN_WEIGHTS = [3.0, 2.0, 1.0, 1.0, 1.0, 1.0]
+SEARCH_SNIPPET_TOKENS = 12
+
+# Bulk import: rows per INSERT transaction, and values per IN (...) duplicate lookup
+IMPORT_BATCH_SIZE = 1000
+LOOKUP_CHUNK_SIZE = 500
+IMPORT_REQUIRED_FIELDS = ['email', 'full_name', 'national_id']
+IMPORT_VOLUNTEER_FIELDS = ['address', 'primary_profession', 'education', 'area_of_interest',
+                           'contact_reference', 'experience', 'courses', 'languages', 'interests',
+                           'personal_summary']
 
 
 class HRService:
@@ -94,18 +129,290 @@ class HRService:
             db.session.rollback()
             return None, str(e)
 
+    @staticmethod
+    def _import_row(data):
+        """Validate one import row; returns (user_fields, volunteer_fields) or raises ValueError."""
+        if not isinstance(data, dict):
+            raise ValueError('Row must be an object')
+        data = {k: v.strip() if isinstance(v, str) else v for k, v in data.items()}
+        missing = [field for field in IMPORT_REQUIRED_FIELDS if not data.get(field)]
+        if missing:
+            raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+        email = str(data['email'])
+        national_id = str(data['national_id'])
+        user_fields = {
+            'email': email,
+            'role': 'volunteer',
+            'phone': data.get('phone') or None,
+            'full_name': data['full_name'],
+            'image_url': f"https://mighty.tools/mockmind-api/content/human/{randint(1, 130)}.jpg"
+        }
+        volunteer_fields = {
+            'full_name': data['full_name'],
+            'national_id': national_id,
+            'join_date': datetime.utcnow(),
+            'profile': None,
+            'date_of_birth': None,
+            'gender': None,
+        }
+        for field in IMPORT_VOLUNTEER_FIELDS:
+            volunteer_fields[field] = data.get(field) or None
+
+        if data.get('profile') not in (None, ''):
+            try:
+                volunteer_fields['profile'] = int(data['profile'])
+            except (ValueError, TypeError):
+                raise ValueError('Invalid profile value (must be an integer)')
+        if data.get('date_of_birth'):
+            try:
+                volunteer_fields['date_of_birth'] = datetime.fromisoformat(
+                    str(data['date_of_birth']).replace('Z', '+00:00')).date()
+            except ValueError:
+                raise ValueError('Invalid date format')
+        if data.get('gender'):
+            try:
+                volunteer_fields['gender'] = Gender(str(data['gender']).title())
+            except ValueError:
+                raise ValueError(f"Invalid gender: {data['gender']}")
+        return user_fields, volunteer_fields
+
+    @staticmethod
+    def _existing_values(column, values):
+        """The subset of `values` already stored in `column`, looked up with chunked IN queries."""
+        values = list(values)
+        found = set()
+        for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+            chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+            found.update(value for (value,) in db.session.query(column).filter(column.in_(chunk)))
+        return found
+
+    @staticmethod
+    def _ids_by(id_column, key_column, keys):
+        """{key: id} for rows whose `key_column` is in `keys`, with chunked IN queries."""
+        ids = {}
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            ids.update((key, id_) for id_, key in db.session.query(id_column, key_column).filter(key_column.in_(chunk)))
+        return ids
+
+    @staticmethod
+    def import_volunteers(rows):
+        """
+        Create many volunteers at once. Every row is validated and checked for duplicate emails
+        and national ids (within the file and against the database) before anything is written;
+        passwords (the national id, like create_volunteer) are hashed in a process pool and the
+        valid rows are inserted IMPORT_BATCH_SIZE at a time, one transaction per batch.
+        Returns one report dict per input row, in order.
+        """
+        report = [None] * len(rows)
+        valid = []  # (index, user_fields, volunteer_fields)
+        for index, data in enumerate(rows):
+            try:
+                user_fields, volunteer_fields = HRService._import_row(data)
+            except ValueError as e:
+                report[index] = {'row': index + 1, 'email': data.get('email') if isinstance(data, dict) else None,
+                                 'status': 'error', 'error': str(e)}
+                continue
+            valid.append((index, user_fields, volunteer_fields))
+
+        existing_emails = HRService._existing_values(User.email, {u['email'] for _, u, _ in valid})
+        existing_ids = HRService._existing_values(Volunteer.national_id, {v['national_id'] for _, _, v in valid})
+        seen_emails, seen_ids, accepted = set(), set(), []
+        for index, user_fields, volunteer_fields in valid:
+            email, national_id = user_fields['email'], volunteer_fields['national_id']
+            if email in existing_emails:
+                error = f'User with email {email} already exists'
+            elif national_id in existing_ids:
+                error = f'Volunteer with national ID {national_id} already exists'
+            elif email in seen_emails:
+                error = f'Duplicate email {email} in import'
+            elif national_id in seen_ids:
+                error = f'Duplicate national ID {national_id} in import'
+            else:
+                seen_emails.add(email)
+                seen_ids.add(national_id)
+                accepted.append((index, user_fields, volunteer_fields))
+                continue
+            report[index] = {'row': index + 1, 'email': email, 'status': 'error', 'error': error}
+
+        hashes = hash_passwords(v['national_id'] for _, _, v in accepted)
+        for (_, user_fields, volunteer_fields), password_hash in zip(accepted, hashes):
+            user_fields['password_hash'] = password_hash
+
+        for start in range(0, len(accepted), IMPORT_BATCH_SIZE):
+            batch = accepted[start:start + IMPORT_BATCH_SIZE]
+            try:
+                # executemany INSERTs; ids are read back by their unique keys rather than with
+                # RETURNING, which SQLite cannot do in bulk while keeping rows in parameter order
+                db.session.execute(insert(User), [user_fields for _, user_fields, _ in batch])
+                user_ids = HRService._ids_by(User.id, User.email, [u['email'] for _, u, _ in batch])
+                for _, user_fields, volunteer_fields in batch:
+                    volunteer_fields['user_id'] = user_ids[user_fields['email']]
+                db.session.execute(insert(Volunteer), [volunteer_fields for _, _, volunteer_fields in batch])
+                volunteer_ids = HRService._ids_by(Volunteer.id, Volunteer.user_id, list(user_ids.values()))
+                db.session.commit()
+            except SQLAlchemyError as e:
+                # e.g. a concurrent request created one of these users after our duplicate check
+                db.session.rollback()
+                for index, user_fields, _ in batch:
+                    report[index] = {'row': index + 1, 'email': user_fields['email'], 'status': 'error',
+                                     'error': f'Database error: {e.__class__.__name__}'}
+                continue
+            # Core INSERTs skip the ORM session hooks, so tell the match index directly
+            match_index.mark_dirty(volunteer_ids.values())
+            for index, user_fields, _ in batch:
+                user_id = user_ids[user_fields['email']]
+                report[index] = {'row': index + 1, 'email': user_fields['email'], 'status': 'created',
+                                 'user_id': user_id, 'volunteer_id': volunteer_ids[user_id]}
+        return report
+
+
+    @staticmethod
+    def volunteer_list_query():
+        # User is many-to-one so it rides along in the same SELECT; applications are
+        # fetched with one extra IN query for the whole page instead of one per volunteer.
+        return Volunteer.query.options(
+            joinedload(Volunteer.user),
+            selectinload(Volunteer.applications).load_only(JobApplication.job_id, JobApplication.status)
+        )
 
     @staticmethod
     def get_all_volunteers():
-        return Volunteer.query.all()
+        return HRService.volunteer_list_query().all()
+
+    @staticmethod
+    def filter_volunteers(args):
+        """
+        Build the filtered volunteer query from request query args.
+        Returns (query, sort) where sort is the VOLUNTEER_SORT_KEYS entry with the
+        requested direction already applied to `ascending`.
+        """
+        query = HRService.volunteer_list_query()
+
+        try:
+            min_age = int(args['minAge']) if args.get('minAge') else None
+            max_age = int(args['maxAge']) if args.get('maxAge') else None
+        except ValueError:
+            raise BadRequest('minAge and maxAge must be integers')
+        # age bounds become date_of_birth bounds so the database can do the filtering
+        if min_age is not None:
+            query = query.filter(Volunteer.date_of_birth <= date_years_ago(min_age))
+        if max_age is not None:
+            query = query.filter(Volunteer.date_of_birth > date_years_ago(max_age + 1))
+
+        if args.get('gender'):
+            try:
+                query = query.filter(Volunteer.gender == Gender(args['gender'].title()))
+            except ValueError:
+                raise BadRequest(f"Invalid gender: {args['gender']}")
+
+        if args.get('profile'):
+            try:
+                profiles = [int(p) for p in args['profile'].split(',') if p.strip()]
+            except ValueError:
+                raise BadRequest('profile must be a comma separated list of integers')
+            query = query.filter(Volunteer.profile.in_(profiles))
+
+        if args.get('education'):
+            query = query.filter(Volunteer.education.ilike(f"%{args['education'].strip()}%"))
+
+        if args.get('languages'):
+            for language in args['languages'].split(','):
+                if language.strip():
+                    query = query.filter(Volunteer.languages.ilike(f'%{language.strip()}%'))
+
+        sort = args.get('sort', 'id')
+        if sort.lstrip('-') not in VOLUNTEER_SORT_KEYS:
+            raise BadRequest(f"Invalid sort key: {sort}. Allowed: {', '.join(VOLUNTEER_SORT_KEYS)}")
+        column, ascending, parse_key, key_of = VOLUNTEER_SORT_KEYS[sort.lstrip('-')]
+        if sort.startswith('-'):
+            ascending = not ascending
+        return query, (column, ascending, parse_key, key_of)
+
+    @staticmethod
+    def ordered_volunteers(args):
+        """Filtered and sorted volunteer query without pagination (used for streaming)."""
+        query, (column, ascending, _, _) = HRService.filter_volunteers(args)
+        if ascending:
+            return query.order_by(column.asc(), Volunteer.id.asc())
+        return query.order_by(column.desc(), Volunteer.id.desc())
+
+    @staticmethod
+    def search_volunteers(args):
+        """
+        Filter, sort and optionally paginate volunteers from request query args.
+        Returns (volunteers, next_cursor); next_cursor is None on the last page or when
+        no limit was requested.
+        """
+        if not args.get('limit') and not args.get('cursor'):
+            return HRService.ordered_volunteers(args).all(), None
+
+        query, (column, ascending, parse_key, key_of) = HRService.filter_volunteers(args)
+        limit = parse_page_size(args.get('limit', 50))
+        return keyset_page(query, column, Volunteer.id, ascending, limit,
+                           cursor=args.get('cursor'), parse_key=parse_key, key_of=key_of)
+
+    @staticmethod
+    def search_volunteer_text(q, limit=20):
+        """
+        Free-text search over the volunteers' experience, courses, languages, interests, summary
+        and education. Every word must match (as a prefix). Returns [(volunteer, score, snippet)]
+        best first, using the FTS5 index on SQLite; elsewhere, or if the index was never created,
+        an unranked LIKE scan with score and snippet set to None.
+        """
+        terms = re.findall(r'\w+', (q or '').lower())
+        if not terms:
+            raise BadRequest('q must contain at least one word')
+
+        if db.engine.dialect.name == 'sqlite':
+            try:
+                return HRService._fts_search(terms, limit)
+            except OperationalError as e:
+                logger.warning('Volunteer FTS search unavailable, falling back to LIKE: %s', e.orig)
+
+        query = HRService.volunteer_list_query()
+        for term in terms:
+            pattern = f'%{term}%'
+            query = query.filter(or_(*(getattr(Volunteer, c).ilike(pattern) for c in VOLUNTEER_SEARCH_COLUMNS)))
+        return [(v, None, None) for v in query.order_by(Volunteer.id).limit(limit)]
+
+    @staticmethod
+    def _fts_search(terms, limit):
+        # each word becomes a quoted prefix term, so user input can never be read as FTS syntax
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(w) for w in SEARCH_COLUMN_WEIGHTS)
+        hits = db.session.execute(
+            text(f"""
+                SELECT rowid AS id,
+                       bm25({VOLUNTEER_SEARCH_TABLE}, {weights}) AS rank,
+                       snippet({VOLUNTEER_SEARCH_TABLE}, -1, '<mark>', '</mark>', '…', {SEARCH_SNIPPET_TOKENS}) AS snippet
+                FROM {VOLUNTEER_SEARCH_TABLE}
+                WHERE {VOLUNTEER_SEARCH_TABLE} MATCH :match
+                ORDER BY rank
+                LIMIT :limit
+            """).columns(column('id', Integer), column('rank', Float), column('snippet', String)),
+            {'match': match, 'limit': limit}
+        ).all()
+        if not hits:
+            return []
+        volunteers = {v.id: v for v in HRService.volunteer_list_query().filter(Volunteer.id.in_([h.id for h in hits]))}
+        # bm25 is lower-is-better; flip it so clients get a higher-is-better score
+        return [(volunteers[h.id], round(-h.rank, 4), h.snippet) for h in hits if h.id in volunteers]
 
     @staticmethod
     def get_volunteer_by_id(volunteer_id):
-        return Volunteer.query.get_or_404(volunteer_id)
+        return HRService.volunteer_list_query().filter(Volunteer.id == volunteer_id).first()
 
     @staticmethod
     def get_all_jobs():
-        return Job.query.all()
+        return HRService.job_list_query().all()
+
+    @staticmethod
+    def job_list_query():
+        return CommanderService.jobs_with_application_counts(
+            Job.query.options(joinedload(Job.commander)).order_by(Job.id)
+        )
 
     @staticmethod
     def assign_volunteer_to_job(volunteer_id, job_id):
@@ -0,0 +1,203 @@
+import json
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app
+from googleapiclient.errors import HttpError
+from sqlalchemy import and_, or_, update
+from werkzeug.exceptions import BadRequest
+
+from db import db
+from models import InvitationJob
+from utils.google_calendar import (INVITATION_REQUIRED_FIELDS, build_interview_event, event_links,
+                                   get_calendar_service, insert_event_request, parse_interview_time,
+                                   send_invitation_batch)
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = timedelta(seconds=10)
+BACKOFF_MAX = timedelta(minutes=15)
+# a worker that dies mid-send loses its claim after this long and the job is picked up again
+LEASE = timedelta(minutes=2)
+POLL_INTERVAL = 5  # seconds between polls when nobody wakes the workers up
+
+_wakeup = threading.Event()
+_workers = []
+_workers_pid = None
+_workers_lock = threading.Lock()
+
+
+class InvitationService:
+    @staticmethod
+    def validate(data):
+        if not data or not all(field in data for field in INVITATION_REQUIRED_FIELDS):
+            raise BadRequest('Missing required fields')
+        try:
+            parse_interview_time(data['interview_time'])
+        except (ValueError, AttributeError):
+            raise BadRequest('Invalid interview time format. Use ISO 8601 format')
+
+    @staticmethod
+    def enqueue(commander_id, data):
+        InvitationService.validate(data)
+        job = InvitationJob(commander_id=commander_id, payload=json.dumps(data))
+        db.session.add(job)
+        db.session.flush()
+        # client-chosen event id (base32hex) so a retried insert cannot create a duplicate event
+        job.event_id = f'invite{job.id}t{int(job.created_at.timestamp())}'
+        db.session.commit()
+
+        start_workers(current_app._get_current_object())
+        _wakeup.set()
+        return job
+
+    @staticmethod
+    def get_job(job_id, commander_id):
+        return InvitationJob.query.filter_by(id=job_id, commander_id=commander_id).first()
+
+    @staticmethod
+    def claim_next(now=None):
+        """Atomically take the oldest due job (or one whose sender's lease ran out); None if idle."""
+        now = now or datetime.utcnow()
+        due = or_(and_(InvitationJob.status == 'queued', InvitationJob.next_attempt_at <= now),
+                  and_(InvitationJob.status == 'sending', InvitationJob.locked_until <= now))
+        while True:
+            candidate = db.session.query(InvitationJob.id).filter(due).order_by(InvitationJob.next_attempt_at).first()
+            if not candidate:
+                return None
+            # conditional UPDATE: if another worker claimed the row first, rowcount is 0 and we look again
+            result = db.session.execute(
+                update(InvitationJob)
+                .where(InvitationJob.id == candidate.id, due)
+                .values(status='sending', locked_until=now + LEASE, attempts=InvitationJob.attempts + 1)
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+            if result.rowcount == 1:
+                return db.session.get(InvitationJob, candidate.id)
+
+    @staticmethod
+    def send(job, service):
+        """Create the calendar event for a claimed job and record the outcome."""
+        try:
+            event = build_interview_event(json.loads(job.payload), event_id=job.event_id)
+            try:
+                result = insert_event_request(service, event).execute()
+            except HttpError as error:
+                if error.resp.status != 409:
+                    raise
+                # an earlier attempt went through but we never saw the response
+                result = service.events().get(calendarId='primary', eventId=job.event_id).execute()
+            InvitationService.mark_sent(job, result)
+        except HttpError as error:
+            # 403 covers Calendar's rate limit errors; other 4xx will not get better by retrying
+            retryable = error.resp.status >= 500 or error.resp.status in (403, 429)
+            InvitationService.mark_failed(job, f'Calendar API error: {error}', retryable)
+        except Exception as error:
+            InvitationService.mark_failed(job, str(error), retryable=True)
+
+    @staticmethod
+    def mark_sent(job, event_result):
+        job.event_link, job.meeting_link = event_links(event_result)
+        job.status = 'sent'
+        job.locked_until = None
+        job.last_error = None
+        db.session.commit()
+
+    @staticmethod
+    def mark_failed(job, error, retryable):
+        job.last_error = error
+        job.locked_until = None
+        if not retryable or job.attempts >= MAX_ATTEMPTS:
+            job.status = 'failed'
+        else:
+            # exponential backoff with jitter so a burst of failures does not retry in lockstep
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (job.attempts - 1))
+            job.status = 'queued'
+            job.next_attempt_at = datetime.utcnow() + delay * random.uniform(0.5, 1.0)
+        db.session.commit()
+        logger.warning('Invitation job %s attempt %s failed: %s', job.id, job.attempts, error)
+
+    @staticmethod
+    def send_batch(items):
+        """
+        Send many invitations right away through Calendar HTTP batch requests.
+        Returns one result dict per item, in order; invalid items are reported and not sent.
+        """
+        results = [None] * len(items)
+        events, positions = [], []
+        for index, data in enumerate(items):
+            try:
+                InvitationService.validate(data)
+            except BadRequest as e:
+                results[index] = {'index': index, 'status': 'invalid', 'error': e.description}
+                continue
+            events.append(build_interview_event(data))
+            positions.append(index)
+
+        if events:
+            factory = current_app.config.get('CALENDAR_SERVICE_FACTORY') or get_calendar_service
+            batch_uri = current_app.config.get('CALENDAR_BATCH_URI')
+            for index, (event_result, error) in zip(positions, send_invitation_batch(factory(), events, batch_uri)):
+                if error is not None:
+                    results[index] = {'index': index, 'status': 'failed', 'error': f'Calendar API error: {error}'}
+                    continue
+                event_link, meeting_link = event_links(event_result)
+                results[index] = {
+                    'index': index,
+                    'status': 'sent',
+                    'event_link': event_link,
+                    'meeting_link': meeting_link,
+                    'scheduled_time': parse_interview_time(items[index]['interview_time']).isoformat()
+                }
+        return results
+
+    @staticmethod
+    def run_pending(max_jobs=None):
+        """Send due jobs until none are left (or max_jobs were handled). Returns how many were handled."""
+        factory = current_app.config.get('CALENDAR_SERVICE_FACTORY') or get_calendar_service
+        handled = 0
+        while max_jobs is None or handled < max_jobs:
+            job = InvitationService.claim_next()
+            if job is None:
+                break
+            try:
+                service = factory()
+            except Exception as error:
+                InvitationService.mark_failed(job, f'Calendar is not available: {error}', retryable=True)
+            else:
+                InvitationService.send(job, service)
+            handled += 1
+        return handled
+
+
+def start_workers(app):
+    """Start the in-process sender threads once per process (INVITATION_WORKERS, 0 disables)."""
+    global _workers_pid
+    if _workers_pid == os.getpid():
+        return
+    with _workers_lock:
+        # threads do not survive a fork, so a pre-forked gunicorn worker starts its own
+        if _workers_pid == os.getpid():
+            return
+        _workers.clear()
+        _workers_pid = os.getpid()
+        for i in range(app.config.get('INVITATION_WORKERS', 1)):
+            worker = threading.Thread(target=_worker_loop, args=(app,), name=f'invitation-worker-{i}', daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def _worker_loop(app):
+    while True:
+        try:
+            with app.app_context():
+                InvitationService.run_pending()
+        except Exception:
+            logger.exception('Invitation worker crashed while sending; will retry')
+        _wakeup.wait(POLL_INTERVAL)
+        _wakeup.clear()
@@ -0,0 +1,373 @@
+import heapq
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, event, insert
+from sqlalchemy.orm import joinedload
+
+from db import db, RoutingSession
+from models import Job, JobMatch, Volunteer
+from models.job import JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Volunteer and job text fields, by the kind of feature they describe. A job feature only
+# matches a volunteer feature of the same kind ('lang:english' never matches 'skill:english').
+VOLUNTEER_FIELDS = {
+    'lang': ['languages'],
+    'course': ['courses'],
+    'skill': ['experience', 'courses'],
+    'edu': ['education'],
+}
+JOB_FIELDS = {
+    'lang': ['required_languages'],
+    'course': ['required_certificates', 'passed_courses'],
+    'skill': ['tech_skills'],
+    'edu': ['education'],
+}
+VOLUNTEER_COLUMNS = sorted({name for names in VOLUNTEER_FIELDS.values() for name in names})
+KIND_WEIGHTS = {'lang': 1.0, 'course': 1.5, 'skill': 2.0, 'edu': 0.5}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'as', 'at', 'by', 'for', 'from', 'in', 'is', 'of', 'on', 'or', 'the', 'to', 'with',
+    'years', 'year', 'experience', 'course', 'courses', 'level', 'good', 'basic', 'knowledge',
+}
+# a full rebuild also picks up writes made by other app processes, which this one never hears about;
+# it runs in a background thread and swaps the new index in, so requests never wait for it
+REBUILD_INTERVAL = 600  # seconds
+# slack for float rounding when deciding that nobody new can reach the top k
+SCORE_TOLERANCE = 1e-9
+LOOKUP_CHUNK_SIZE = 500
+# `flask matches rebuild`: candidates kept per job, and jobs scored per process-pool task
+BATCH_TOP_N = 50
+BATCH_JOB_CHUNK = 100
+
+
+def tokenize(text):
+    """Lowercase words of `text` minus stopwords and one-letter noise, with a crude plural strip."""
+    tokens = set()
+    for word in re.findall(r'\w+', (text or '').lower()):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.add(word)
+    return tokens
+
+
+def features(obj, fields):
+    """The set of 'kind:token' features of a volunteer or job."""
+    result = set()
+    for kind, columns in fields.items():
+        for name in columns:
+            result.update(f'{kind}:{token}' for token in tokenize(getattr(obj, name)))
+    return result
+
+
+def _index_volunteer(postings, volunteer_features, volunteer_id, new_features):
+    for feature in volunteer_features.pop(volunteer_id, ()):
+        feature_postings = postings[feature]
+        feature_postings.discard(volunteer_id)
+        if not feature_postings:
+            del postings[feature]
+    if new_features is not None:
+        volunteer_features[volunteer_id] = new_features
+        for feature in new_features:
+            postings[feature].add(volunteer_id)
+
+
+class MatchIndex:
+    """
+    Inverted index feature -> volunteer ids, kept in process memory. Writes only mark ids as
+    dirty (see the session hooks below); dirty rows are re-read in one query the next time
+    the index is used, so commits never pay for index maintenance.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._postings = defaultdict(set)
+        self._volunteer_features = {}
+        self._job_features = {}
+        self._dirty_volunteers = set()
+        self._dirty_jobs = set()
+        self._built_at = None
+
+    def mark_dirty(self, volunteer_ids=(), job_ids=()):
+        with self._lock:
+            self._dirty_volunteers.update(volunteer_ids)
+            self._dirty_jobs.update(job_ids)
+
+    def rebuild(self):
+        """
+        Re-read every volunteer into a new index and swap it in. Only the swap takes the lock,
+        so requests keep matching against the old index while this runs.
+        """
+        with self._build_lock:
+            self._build()
+
+    def _build(self):
+        """Caller holds _build_lock."""
+        postings, volunteer_features = defaultdict(set), {}
+        for row in _volunteer_rows().execution_options(yield_per=1000):
+            _index_volunteer(postings, volunteer_features, row.id, features(row, VOLUNTEER_FIELDS))
+        with self._lock:
+            # volunteers marked dirty meanwhile stay dirty; re-reading one twice is harmless
+            self._postings, self._volunteer_features = postings, volunteer_features
+            self._job_features.clear()
+            self._dirty_jobs.clear()
+            self._built_at = time.monotonic()
+
+    def _ensure_built(self):
+        # first use in this process: there is nothing to match against until one build is done
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self._build()
+
+    def _refresh(self):
+        """Re-read the volunteers marked dirty. Caller holds _lock."""
+        dirty, self._dirty_volunteers = list(self._dirty_volunteers), set()
+        for start in range(0, len(dirty), LOOKUP_CHUNK_SIZE):
+            chunk = dirty[start:start + LOOKUP_CHUNK_SIZE]
+            found = {row.id: row for row in _volunteer_rows().filter(Volunteer.id.in_(chunk))}
+            for volunteer_id in chunk:
+                volunteer = found.get(volunteer_id)
+                # deleted volunteers leave the index
+                _index_volunteer(self._postings, self._volunteer_features, volunteer_id,
+                                 features(volunteer, VOLUNTEER_FIELDS) if volunteer else None)
+        for job_id in self._dirty_jobs:
+            self._job_features.pop(job_id, None)
+        self._dirty_jobs.clear()
+
+    def top_matches(self, job, k):
+        """[(volunteer_id, score, matched features)] for the k best volunteers, best first."""
+        self._ensure_built()
+        with self._lock:
+            self._refresh()
+            if job.id not in self._job_features:
+                self._job_features[job.id] = features(job, JOB_FIELDS)
+            total = len(self._volunteer_features) or 1
+            weighted = []
+            for feature in self._job_features[job.id]:
+                postings = self._postings.get(feature)
+                if postings:
+                    weight = KIND_WEIGHTS[feature.split(':', 1)[0]] * math.log(1 + total / len(postings))
+                    weighted.append((weight, feature, postings))
+            # heaviest (rarest) features first; remaining[i] is the most a volunteer can still
+            # gain from feature i onwards
+            weighted.sort(key=lambda item: (-item[0], item[1]))
+            remaining = [0.0] * (len(weighted) + 1)
+            for i in range(len(weighted) - 1, -1, -1):
+                remaining[i] = remaining[i + 1] + weighted[i][0]
+
+            scores = defaultdict(float)
+            matched = defaultdict(list)
+            closed = False
+            for i, (weight, feature, postings) in enumerate(weighted):
+                # MaxScore: once even matching every remaining feature scores below the current
+                # k-th best, no new volunteer can reach the top k, so common features (e.g.
+                # 'lang:english') only add to known candidates instead of walking their postings
+                if not closed and 0 < k <= len(scores):
+                    kth = heapq.nlargest(k, scores.values())[-1]
+                    closed = remaining[i] + SCORE_TOLERANCE < kth
+                if closed:
+                    if len(scores) < len(postings):
+                        candidates = [volunteer_id for volunteer_id in scores if volunteer_id in postings]
+                    else:
+                        candidates = [volunteer_id for volunteer_id in postings if volunteer_id in scores]
+                else:
+                    candidates = postings
+                for volunteer_id in candidates:
+                    scores[volunteer_id] += weight
+                    matched[volunteer_id].append(feature)
+            best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+            return [(volunteer_id, score, sorted(matched[volunteer_id])) for volunteer_id, score in best]
+
+
+def _volunteer_rows():
+    # plain column rows: building the index must not fill the session's identity map
+    return db.session.query(Volunteer.id, *(getattr(Volunteer, name) for name in VOLUNTEER_COLUMNS))
+
+
+match_index = MatchIndex()
+_rebuilder_pid = None
+_rebuilder_lock = threading.Lock()
+
+
+def start_rebuilder(app):
+    """Start the thread that rebuilds match_index every REBUILD_INTERVAL, once per process."""
+    global _rebuilder_pid
+    with _rebuilder_lock:
+        # threads do not survive a fork, so a pre-forked gunicorn worker starts its own
+        if _rebuilder_pid == os.getpid():
+            return
+        _rebuilder_pid = os.getpid()
+        threading.Thread(target=_rebuild_loop, args=(app,), name='match-index-rebuilder', daemon=True).start()
+
+
+def _rebuild_loop(app):
+    while True:
+        time.sleep(REBUILD_INTERVAL)
+        try:
+            with app.app_context():
+                match_index.rebuild()
+        except Exception:
+            logger.exception('Rebuilding the match index failed; keeping the old one')
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Volunteer):
+            session.info.setdefault('match_volunteers', set()).add(obj.id)
+        elif isinstance(obj, Job):
+            session.info.setdefault('match_jobs', set()).add(obj.id)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _publish_changes(session):
+    volunteers = session.info.pop('match_volunteers', ())
+    jobs = session.info.pop('match_jobs', ())
+    if volunteers or jobs:
+        match_index.mark_dirty(volunteers, jobs)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _drop_changes(session):
+    session.info.pop('match_volunteers', None)
+    session.info.pop('match_jobs', None)
+
+
+class MatchingService:
+    @staticmethod
+    def get_job_matches(job_id, commander_id, k=20):
+        """
+        Top-k volunteers for one of the commander's jobs: [(volunteer, score, matched features)],
+        or None when the job is not this commander's.
+        """
+        job = Job.query.filter_by(id=job_id, commander_id=commander_id).first()
+        if not job:
+            return None
+        start_rebuilder(current_app._get_current_object())
+        matches = match_index.top_matches(job, k)
+        if not matches:
+            return []
+        volunteers = {v.id: v for v in Volunteer.query.options(joinedload(Volunteer.user))
+                      .filter(Volunteer.id.in_([volunteer_id for volunteer_id, _, _ in matches]))}
+        return [(volunteers[volunteer_id], score, matched)
+                for volunteer_id, score, matched in matches if volunteer_id in volunteers]
+
+    @staticmethod
+    def get_batch_matches(job_id, commander_id):
+        """
+        The job's candidates from the last `flask matches rebuild`, best first, or None when the
+        job is not this commander's.
+        """
+        job = Job.query.filter_by(id=job_id, commander_id=commander_id).first()
+        if not job:
+            return None
+        return JobMatch.query.options(joinedload(JobMatch.volunteer).joinedload(Volunteer.user)) \
+            .filter(JobMatch.job_id == job_id).order_by(JobMatch.rank).all()
+
+    @staticmethod
+    def rebuild_job_matches(top_n=BATCH_TOP_N, workers=None, chunk_size=BATCH_JOB_CHUNK):
+        """
+        Score every open job against every volunteer and replace the job_matches table with the
+        top_n candidates per job. Jobs and volunteers become TF-IDF vectors over the same
+        features the live index uses; scores are cosine similarities from sparse matrix
+        products, computed chunk_size jobs at a time across a process pool.
+        Returns (jobs scored, rows written).
+        """
+        import numpy as np
+        from scipy import sparse
+
+        volunteers = _volunteer_rows().all()
+        jobs = db.session.query(Job).filter(Job.status == JobStatus.OPEN).order_by(Job.id).all()
+        computed_at = datetime.utcnow()
+        rows = []
+        if volunteers and jobs:
+            vocabulary = {}
+            volunteer_features = [features(v, VOLUNTEER_FIELDS) for v in volunteers]
+            for feature_set in volunteer_features:
+                for feature in feature_set:
+                    vocabulary.setdefault(feature, len(vocabulary))
+
+            volunteer_matrix = _feature_matrix(volunteer_features, vocabulary, sparse)
+            document_frequency = np.asarray(volunteer_matrix.sum(axis=0)).ravel()
+            idf = np.log((1 + len(volunteers)) / (1 + document_frequency)) + 1
+            kind_weight = np.empty(len(vocabulary))
+            for feature, column_index in vocabulary.items():
+                kind_weight[column_index] = KIND_WEIGHTS[feature.split(':', 1)[0]]
+            weights = sparse.diags(idf * kind_weight)
+            # job features the volunteers never mention cannot match anyone and are dropped
+            job_matrix = _feature_matrix([features(job, JOB_FIELDS) for job in jobs], vocabulary, sparse)
+            volunteer_matrix = _l2_normalize(volunteer_matrix @ weights, np, sparse)
+            job_matrix = _l2_normalize(job_matrix @ weights, np, sparse)
+
+            volunteer_ids = np.array([v.id for v in volunteers])
+            chunks = [(start, job_matrix[start:start + chunk_size]) for start in range(0, len(jobs), chunk_size)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_score_worker,
+                                     initargs=(volunteer_matrix.T.tocsr(), top_n)) as pool:
+                for start, top in pool.map(_score_jobs, *zip(*chunks)):
+                    for offset, candidates in enumerate(top):
+                        job_id = jobs[start + offset].id
+                        for rank, (column_index, score) in enumerate(candidates, start=1):
+                            rows.append({'job_id': job_id, 'volunteer_id': int(volunteer_ids[column_index]),
+                                         'rank': rank, 'score': score, 'computed_at': computed_at})
+
+        # swap the whole snapshot in one transaction so readers never see a half-written table
+        db.session.execute(delete(JobMatch))
+        for start in range(0, len(rows), 5000):
+            db.session.execute(insert(JobMatch), rows[start:start + 5000])
+        db.session.commit()
+        return len(jobs), len(rows)
+
+
+def _feature_matrix(feature_sets, vocabulary, sparse):
+    """Binary CSR matrix, one row per feature set, one column per vocabulary entry."""
+    indptr, indices = [0], []
+    for feature_set in feature_sets:
+        indices.extend(vocabulary[f] for f in feature_set if f in vocabulary)
+        indptr.append(len(indices))
+    data = [1.0] * len(indices)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(feature_sets), len(vocabulary)))
+
+
+def _l2_normalize(matrix, np, sparse):
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags(1 / norms) @ matrix
+
+
+# Process pool state: the transposed volunteer matrix is shipped once per worker, not per task
+_volunteers_t = None
+_top_n = None
+
+
+def _init_score_worker(volunteers_t, top_n):
+    global _volunteers_t, _top_n
+    _volunteers_t = volunteers_t
+    _top_n = top_n
+
+
+def _score_jobs(start, job_chunk):
+    """(start, [[(volunteer column, score)] best first per job]) for one chunk of job rows."""
+    import numpy as np
+
+    scores = (job_chunk @ _volunteers_t).toarray()
+    n = min(_top_n, scores.shape[1])
+    top = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+    result = []
+    for row, columns in zip(scores, top):
+        columns = columns[np.argsort(-row[columns], kind='stable')]
+        result.append([(int(c), round(float(row[c]), 6)) for c in columns if row[c] > 0])
+    return start, result
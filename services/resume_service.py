@@ -0,0 +1,245 @@
+import gzip
+import hashlib
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app, request
+from sqlalchemy import delete, event, update
+from sqlalchemy.exc import IntegrityError
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+from db import db
+from models import JobApplication, Resume, ResumeBlob
+
+CHUNK_SIZE = 64 * 1024
+# text compresses well; pdf/doc/docx are already compressed containers
+COMPRESSED_EXTENSIONS = {'txt'}
+CONTENT_TYPES = {
+    'pdf': 'application/pdf',
+    'doc': 'application/msword',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'txt': 'text/plain',
+}
+TMP_DIR = 'tmp'
+SENDFILE_MODES = ('x-accel-redirect', 'x-sendfile')
+# unreferenced blobs and stray files younger than this are left alone by the GC, so it never
+# races an upload that is between writing its file and committing its row
+GC_GRACE = timedelta(hours=1)
+
+
+def resumes_folder():
+    return current_app.config['RESUMES_FOLDER']
+
+
+def blob_full_path(storage_path):
+    return os.path.join(resumes_folder(), storage_path)
+
+
+class ResumeService:
+    @staticmethod
+    def get_for_application(job_id, volunteer_id):
+        """
+        (application id, resume, blob) for one application in a single query. None when there
+        is no such application; resume/blob are None when nothing (or a legacy file) was uploaded.
+        """
+        return db.session.query(JobApplication.id, Resume, ResumeBlob) \
+            .outerjoin(Resume, Resume.application_id == JobApplication.id) \
+            .outerjoin(ResumeBlob, Resume.blob_id == ResumeBlob.id) \
+            .filter(JobApplication.job_id == job_id, JobApplication.volunteer_id == volunteer_id) \
+            .first()
+
+    @staticmethod
+    def send(resume, blob):
+        """
+        Download response for a resume, or None if its file is missing. ETag (the content hash)
+        and Last-Modified make repeat downloads a 304, Range requests get a 206. With
+        RESUME_SENDFILE set the front server sends the bytes instead of this worker.
+        """
+        if blob is None:
+            # legacy upload: flat file named after the upload, no content hash
+            path = safe_join(resumes_folder(), resume.file_path)
+            etag, last_modified, mimetype = True, None, None
+            download_name = resume.file_path
+        else:
+            path = blob_full_path(blob.storage_path)
+            etag, last_modified, mimetype = blob.sha256, blob.created_at, blob.content_type
+            download_name = resume.original_filename or os.path.basename(blob.storage_path)
+        if path is None or not os.path.isfile(path):
+            return None
+
+        if blob is not None and blob.encoding == 'gzip':
+            return ResumeService._send_gzip(path, blob, download_name)
+
+        mode = current_app.config.get('RESUME_SENDFILE')
+        if mode not in SENDFILE_MODES:
+            return send_file(path, request.environ, mimetype=mimetype, download_name=download_name, etag=etag,
+                             last_modified=last_modified, response_class=current_app.response_class)
+
+        # offloaded: answer 304/412 here, leave Range to the front server (it only sees the file)
+        response = send_file(path, request.environ, mimetype=mimetype, download_name=download_name,
+                             conditional=False, etag=etag, last_modified=last_modified, use_x_sendfile=True,
+                             response_class=current_app.response_class)
+        if mode == 'x-accel-redirect':
+            del response.headers['X-Sendfile']
+            relative = os.path.relpath(path, resumes_folder()).replace(os.sep, '/')
+            response.headers['X-Accel-Redirect'] = current_app.config['RESUME_ACCEL_PREFIX'] + relative
+        response = response.make_conditional(request.environ)
+        if response.status_code == 304:
+            response.headers.pop('X-Sendfile', None)
+            response.headers.pop('X-Accel-Redirect', None)
+        return response
+
+    @staticmethod
+    def _send_gzip(path, blob, download_name):
+        # Always sent by the worker: nginx drops Content-Encoding on X-Accel-Redirect, and
+        # these are small text files anyway
+        common = dict(mimetype=blob.content_type, download_name=download_name, last_modified=blob.created_at,
+                      response_class=current_app.response_class)
+        if request.accept_encodings['gzip']:
+            # the stored bytes as they are; a different representation, so a different (still strong) ETag
+            response = send_file(path, request.environ, etag=f'{blob.sha256}-gzip', **common)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = send_file(gzip.open(path, 'rb'), request.environ, conditional=False, etag=blob.sha256,
+                                 **common)
+            response.content_length = blob.size
+            response = response.make_conditional(request.environ, accept_ranges=True, complete_length=blob.size)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    @staticmethod
+    def _write_temp(stream, compress):
+        """
+        Copy the upload to a temp file chunk by chunk, hashing as it goes (and gzipping when
+        `compress`). Returns (sha256, original size, stored size, temp path).
+        """
+        tmp_dir = os.path.join(resumes_folder(), TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as raw:
+                # mtime=0 keeps the gzip bytes a pure function of the content
+                out = gzip.GzipFile(fileobj=raw, mode='wb', mtime=0) if compress else raw
+                try:
+                    while True:
+                        chunk = stream.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        size += len(chunk)
+                        out.write(chunk)
+                finally:
+                    if compress:
+                        out.close()
+            return digest.hexdigest(), size, os.path.getsize(tmp_path), tmp_path
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def store(file_storage, extension):
+        """
+        Store an uploaded file by content and return its ResumeBlob with one more reference
+        counted. The caller links it to a Resume and commits; identical content is kept once.
+        Call it before adding anything else to the session.
+        """
+        compress = extension in COMPRESSED_EXTENSIONS
+        sha256, size, stored_size, tmp_path = ResumeService._write_temp(file_storage.stream, compress)
+        storage_path = f'{sha256[:2]}/{sha256}.{extension}' + ('.gz' if compress else '')
+        full_path = blob_full_path(storage_path)
+        try:
+            for _ in range(3):
+                blob = ResumeBlob.query.filter_by(sha256=sha256).first()
+                if blob:
+                    result = db.session.execute(update(ResumeBlob).where(ResumeBlob.id == blob.id)
+                                                .values(ref_count=ResumeBlob.ref_count + 1))
+                    if result.rowcount != 1:
+                        # the GC deleted the unreferenced row after we read it; create it again
+                        db.session.expunge(blob)
+                        blob = None
+                if blob:
+                    if tmp_path and not os.path.exists(blob_full_path(blob.storage_path)):
+                        # the file went missing (or the GC got to it first); put it back
+                        os.makedirs(os.path.dirname(blob_full_path(blob.storage_path)), exist_ok=True)
+                        os.replace(tmp_path, blob_full_path(blob.storage_path))
+                    return blob
+
+                if tmp_path:
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    os.replace(tmp_path, full_path)
+                    tmp_path = None
+                elif not os.path.exists(full_path):
+                    break  # our copy was already handed over and then collected
+                blob = ResumeBlob(sha256=sha256, storage_path=storage_path, content_type=CONTENT_TYPES.get(extension),
+                                  encoding='gzip' if compress else None, size=size, stored_size=stored_size,
+                                  ref_count=1)
+                db.session.add(blob)
+                try:
+                    db.session.flush()
+                    return blob
+                except IntegrityError:
+                    # a concurrent upload of the same content created the row first (store runs
+                    # before the caller adds anything else, so nothing else is rolled back); our
+                    # file has the same bytes, so only the reference needs retrying
+                    db.session.rollback()
+            raise RuntimeError(f'Could not store resume blob {sha256}')
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    @staticmethod
+    def collect_garbage(grace=GC_GRACE, dry_run=False):
+        """
+        Delete unreferenced blobs, and files no blob row points at, once they are older than
+        `grace`. Returns (blobs removed, stray files removed).
+        """
+        cutoff = datetime.utcnow() - grace
+        blobs_removed = 0
+        for blob in ResumeBlob.query.filter(ResumeBlob.ref_count <= 0, ResumeBlob.updated_at < cutoff).all():
+            if dry_run:
+                blobs_removed += 1
+                continue
+            # conditional delete: an upload may have taken a new reference since we looked
+            result = db.session.execute(delete(ResumeBlob).where(ResumeBlob.id == blob.id,
+                                                                 ResumeBlob.ref_count <= 0))
+            db.session.commit()
+            if result.rowcount == 1:
+                blobs_removed += 1
+                if db.session.query(ResumeBlob.id).filter_by(storage_path=blob.storage_path).first():
+                    continue  # an upload re-created the blob (and its file) right after the delete
+                try:
+                    os.remove(blob_full_path(blob.storage_path))
+                except FileNotFoundError:
+                    pass
+
+        # stray files: uploads whose transaction rolled back, interrupted temp files
+        known = {path for (path,) in db.session.query(ResumeBlob.storage_path)}
+        known.update(path for (path,) in db.session.query(Resume.file_path).filter(Resume.blob_id.is_(None)))
+        folder = resumes_folder()
+        cutoff_ts = time.time() - grace.total_seconds()
+        files_removed = 0
+        for directory, _, files in os.walk(folder):
+            for name in files:
+                full_path = os.path.join(directory, name)
+                relative = os.path.relpath(full_path, folder).replace(os.sep, '/')
+                if relative in known or os.path.getmtime(full_path) >= cutoff_ts:
+                    continue
+                if directory == folder:
+                    continue  # flat files are legacy uploads, never ours to delete
+                files_removed += 1
+                if not dry_run:
+                    os.remove(full_path)
+        return blobs_removed, files_removed
+
+
+@event.listens_for(Resume, 'after_delete')
+def _release_blob(mapper, connection, resume):
+    """Deleting a Resume (directly or with its application) drops its reference to the blob."""
+    if resume.blob_id is not None:
+        connection.execute(update(ResumeBlob).where(ResumeBlob.id == resume.blob_id)
+                           .values(ref_count=ResumeBlob.ref_count - 1))
@@ -0,0 +1,188 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import or_
+from werkzeug.exceptions import BadRequest
+
+from db import db
+from models import Interview, Job, JobApplication
+
+# interviews created before they had a length (or by hand without one) are assumed to take this long
+DEFAULT_INTERVIEW_MINUTES = 30
+MAX_SLOT_MINUTES = 8 * 60
+CANCELLED = 'cancelled'
+
+
+def parse_datetime(value, field):
+    """ISO 8601 string -> naive UTC datetime, the way scheduled_date is stored."""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        raise BadRequest(f"Invalid {field}. Use ISO 8601 format (YYYY-MM-DDTHH:MM:SS).")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class IntervalIndex:
+    """
+    Busy intervals [start, end) kept sorted by start. Intervals may overlap each other (old
+    interviews were booked by hand), so a lookup scans the starts that can still reach the
+    query: those after `start - longest interval`. That range holds a handful of entries no
+    matter how many intervals are indexed, so a check is two bisects and a short scan.
+    """
+
+    def __init__(self, intervals=()):
+        self._starts = []
+        self._ends = []
+        self._longest = timedelta(0)
+        for start, end in sorted(intervals):
+            self.add(start, end)
+
+    def __len__(self):
+        return len(self._starts)
+
+    def add(self, start, end):
+        i = bisect_left(self._starts, start)
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+        self._longest = max(self._longest, end - start)
+
+    def conflict_end(self, start, end):
+        """Latest end among intervals overlapping [start, end), or None when it is free."""
+        lo = bisect_left(self._starts, start - self._longest)
+        hi = bisect_left(self._starts, end)
+        latest = None
+        for i in range(lo, hi):
+            if self._ends[i] > start and (latest is None or self._ends[i] > latest):
+                latest = self._ends[i]
+        return latest
+
+
+class SchedulingService:
+    @staticmethod
+    def _busy_intervals(query, range_start, range_end):
+        """(key, start, end) for the non-cancelled interviews in `query` touching the range."""
+        default_length = timedelta(minutes=DEFAULT_INTERVIEW_MINUTES)
+        longest = timedelta(minutes=MAX_SLOT_MINUTES)
+        rows = query.with_entities(JobApplication.volunteer_id, Interview.scheduled_date, Interview.duration_minutes) \
+            .filter(Interview.scheduled_date > range_start - longest,
+                    Interview.scheduled_date < range_end,
+                    or_(Interview.status.is_(None), Interview.status != CANCELLED))
+        for volunteer_id, start, minutes in rows:
+            yield volunteer_id, start, start + (timedelta(minutes=minutes) if minutes else default_length)
+
+    @staticmethod
+    def commander_index(commander_id, range_start, range_end):
+        query = Interview.query.join(JobApplication, Interview.application_id == JobApplication.id) \
+            .join(Job, JobApplication.job_id == Job.id).filter(Job.commander_id == commander_id)
+        return IntervalIndex((start, end) for _, start, end in
+                             SchedulingService._busy_intervals(query, range_start, range_end))
+
+    @staticmethod
+    def find_conflict(commander_id, start, minutes=DEFAULT_INTERVIEW_MINUTES):
+        """End of the commander's interview overlapping [start, start + minutes), or None."""
+        end = start + timedelta(minutes=minutes)
+        return SchedulingService.commander_index(commander_id, start, end).conflict_end(start, end)
+
+    @staticmethod
+    def schedule(job_id, commander_id, data):
+        """
+        Book the given candidates of one job into the commander's availability windows,
+        earliest first, in non-overlapping slots that also avoid the commander's and each
+        candidate's existing interviews. All Interview rows are created in one transaction.
+        Returns None when the job is not this commander's, else (scheduled, unscheduled).
+        """
+        try:
+            slot = timedelta(minutes=int(data.get('slotMinutes', DEFAULT_INTERVIEW_MINUTES)))
+            gap = timedelta(minutes=int(data.get('bufferMinutes', 0)))
+        except (TypeError, ValueError):
+            raise BadRequest("'slotMinutes' and 'bufferMinutes' must be whole minutes")
+        if not timedelta(0) < slot <= timedelta(minutes=MAX_SLOT_MINUTES) or gap < timedelta(0):
+            raise BadRequest(f"'slotMinutes' must be between 1 and {MAX_SLOT_MINUTES}")
+
+        windows = []
+        for window in data.get('windows') or []:
+            if not isinstance(window, dict):
+                raise BadRequest("Each window needs 'start' and 'end'")
+            start = parse_datetime(window.get('start'), 'window start')
+            end = parse_datetime(window.get('end'), 'window end')
+            if end <= start:
+                raise BadRequest('A window must end after it starts')
+            windows.append((start, end))
+        if not windows:
+            raise BadRequest("'windows' must be a non-empty list")
+        windows.sort()
+
+        try:
+            volunteer_ids = list(dict.fromkeys(int(v) for v in data.get('volunteerIds') or []))
+        except (TypeError, ValueError):
+            raise BadRequest("'volunteerIds' must be a list of ids")
+        if not volunteer_ids:
+            raise BadRequest("'volunteerIds' must be a non-empty list")
+
+        owner = db.session.query(Job.commander_id).filter(Job.id == job_id).scalar()
+        if owner is None or owner != commander_id:
+            return None
+
+        applications = dict(db.session.query(JobApplication.volunteer_id, JobApplication)
+                            .filter(JobApplication.job_id == job_id, JobApplication.volunteer_id.in_(volunteer_ids)))
+        booked = {volunteer_id for (volunteer_id,) in db.session.query(JobApplication.volunteer_id)
+                  .join(Interview, Interview.application_id == JobApplication.id)
+                  .filter(JobApplication.job_id == job_id, JobApplication.volunteer_id.in_(applications))}
+
+        unscheduled = []
+        candidates = []
+        for volunteer_id in volunteer_ids:
+            if volunteer_id not in applications:
+                unscheduled.append({'volunteerId': volunteer_id, 'reason': 'no application to this job'})
+            elif volunteer_id in booked:
+                unscheduled.append({'volunteerId': volunteer_id, 'reason': 'already has an interview for this job'})
+            else:
+                candidates.append(volunteer_id)
+
+        range_start, range_end = windows[0][0], max(end for _, end in windows)
+        commander_busy = SchedulingService.commander_index(commander_id, range_start, range_end)
+        # the candidates' interviews for other jobs (with any commander) count too
+        candidate_query = Interview.query.join(JobApplication, Interview.application_id == JobApplication.id) \
+            .filter(JobApplication.volunteer_id.in_(candidates))
+        candidate_busy = {}
+        for volunteer_id, start, end in SchedulingService._busy_intervals(candidate_query, range_start, range_end):
+            candidate_busy.setdefault(volunteer_id, IntervalIndex()).add(start, end)
+
+        scheduled = []
+        pending = candidates
+        for window_start, window_end in windows:
+            t = window_start
+            while pending and t + slot <= window_end:
+                blocked = commander_busy.conflict_end(t, t + slot + gap)
+                if blocked is not None:
+                    t = blocked + gap
+                    continue
+                # first candidate (in request order) who is free now; the rest wait for later slots
+                for i, volunteer_id in enumerate(pending):
+                    busy = candidate_busy.get(volunteer_id)
+                    if busy is None or busy.conflict_end(t, t + slot) is None:
+                        break
+                else:
+                    # everybody left is busy right now; step to the earliest of their conflicts ending
+                    t = min(candidate_busy[v].conflict_end(t, t + slot) for v in pending)
+                    continue
+                pending = pending[:i] + pending[i + 1:]
+                commander_busy.add(t, t + slot)
+                scheduled.append((volunteer_id, t))
+                t += slot + gap
+
+        interviews = []
+        for volunteer_id, start in scheduled:
+            interview = Interview(application_id=applications[volunteer_id].id, scheduled_date=start,
+                                  duration_minutes=int(slot.total_seconds() // 60), status='scheduled',
+                                  general_info=data.get('interviewNotes'), schedule=data.get('automaticMessage'))
+            interviews.append((volunteer_id, interview))
+        if not data.get('dryRun'):
+            db.session.add_all(interview for _, interview in interviews)
+            db.session.commit()
+
+        unscheduled.extend({'volunteerId': volunteer_id, 'reason': 'no free slot left in the windows'}
+                           for volunteer_id in pending)
+        return interviews, unscheduled
@@ -0,0 +1,259 @@
+from collections import Counter
+
+from sqlalchemy import event, func, insert, inspect, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from db import RoutingSession, db
+from models import Commander, HRStat, Job, JobApplication
+from models.application import ApplicationStatus
+from models.job import JobStatus
+
+HIRES_BY_UNIT = 'hires_by_unit'
+OPEN_POSITIONS_BY_CATEGORY = 'open_positions_by_category'
+APPLICATIONS_BY_DEPARTMENT = 'applications_by_department'
+
+# dialects that can add to a counter row, creating it if needed, in one statement
+UPSERT_INSERTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
+
+
+def _enum(enum_cls, value, default):
+    """Enum member for a value set on a model: a member, a name ('HIRED') or a value ('hired')."""
+    if value is None:
+        return default
+    if isinstance(value, enum_cls):
+        return value
+    try:
+        return enum_cls[value]
+    except KeyError:
+        try:
+            return enum_cls(value)
+        except ValueError:
+            return None  # not a status we count
+
+
+def _positions(value):
+    try:
+        return max(int(value or 0), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _count_job(counts, sign, status, vacant_positions, category):
+    if _enum(JobStatus, status, JobStatus.OPEN) == JobStatus.OPEN:
+        counts[(OPEN_POSITIONS_BY_CATEGORY, category or '', '')] += sign * _positions(vacant_positions)
+
+
+def _count_applications(counts, sign, status, unit, department, n=1):
+    status = _enum(ApplicationStatus, status, ApplicationStatus.PENDING)
+    if status is None:
+        return
+    counts[(APPLICATIONS_BY_DEPARTMENT, department or '', status.value)] += sign * n
+    if status == ApplicationStatus.HIRED:
+        counts[(HIRES_BY_UNIT, unit or '', '')] += sign * n
+
+
+def _apply(connection, counts):
+    """Add the non-zero deltas in `counts` to hr_stats."""
+    rows = [{'metric': metric, 'key': key, 'subkey': subkey, 'value': value}
+            for (metric, key, subkey), value in counts.items() if value]
+    if not rows:
+        return
+    table = HRStat.__table__
+    upsert = UPSERT_INSERTS.get(connection.dialect.name)
+    if upsert is not None:
+        statement = upsert(table)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['metric', 'key', 'subkey'],
+            set_={'value': table.c.value + statement.excluded.value}), rows)
+        return
+    for row in rows:
+        result = connection.execute(
+            update(table).where(table.c.metric == row['metric'], table.c.key == row['key'],
+                                table.c.subkey == row['subkey'])
+            .values(value=table.c.value + row['value']))
+        if result.rowcount == 0:
+            connection.execute(insert(table), row)
+
+
+def _old(obj, name):
+    """Value of attribute `name` as the database has it (the tracked attributes always load it)."""
+    history = inspect(obj).attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    if history.added:
+        return None
+    return getattr(obj, name)
+
+
+def _new(obj, name):
+    """
+    Value of attribute `name` a pending object will be inserted with: what was set on it, else
+    the column's scalar default, which SQLAlchemy only fills in during the flush itself.
+    """
+    state = inspect(obj)
+    if name in state.dict:
+        return state.dict[name]
+    default = state.mapper.columns[name].default
+    return default.arg if default is not None and default.is_scalar else None
+
+
+def _current(obj, name, state):
+    return _new(obj, name) if state == 1 else getattr(obj, name)
+
+
+def _changed(obj, names):
+    attrs = inspect(obj).attrs
+    return any(attrs[name].history.has_changes() for name in names)
+
+
+def _department(session, commander_id):
+    commander = session.get(Commander, commander_id) if commander_id is not None else None
+    return commander.department if commander else None
+
+
+def _job_dimensions(session, job):
+    """(unit, department) a job's applications are counted under, as of this flush."""
+    if job is None:
+        return None, None
+    commander = job.__dict__.get('commander')
+    department = commander.department if commander is not None else _department(session, job.commander_id)
+    return job.unit, department
+
+
+def _application_job(session, application):
+    # a relationship set in code wins; pending applications do not lazy-load it
+    job = application.__dict__.get('job')
+    if job is None and application.job_id is not None:
+        job = session.get(Job, application.job_id)
+    return job
+
+
+def _status_counts(session, *criteria):
+    """[(status, count)] of the applications matching `criteria`, as committed so far."""
+    return session.query(JobApplication.status, func.count(JobApplication.id)) \
+        .join(Job, JobApplication.job_id == Job.id).filter(*criteria).group_by(JobApplication.status).all()
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _count_changes(session, flush_context, instances):
+    """
+    Turn the Job / JobApplication / Commander changes about to be flushed into hr_stats deltas,
+    written in the same transaction. Applications are always counted under their job's
+    dimensions as of this flush; when a job's unit or commander (or a commander's department)
+    changes, the rows already in the database are moved over first.
+    """
+    objects = [(obj, 1) for obj in session.new] + [(obj, 0) for obj in session.dirty] + \
+              [(obj, -1) for obj in session.deleted]
+    if not any(isinstance(obj, (Job, JobApplication, Commander)) for obj, _ in objects):
+        return
+
+    counts = Counter()
+    with session.no_autoflush:
+        for obj, state in objects:
+            if isinstance(obj, Job):
+                if state >= 0 and (state == 1 or _changed(obj, ('status', 'vacant_positions', 'category'))):
+                    _count_job(counts, 1, _current(obj, 'status', state), _current(obj, 'vacant_positions', state),
+                               _current(obj, 'category', state))
+                if state == -1 or (state == 0 and _changed(obj, ('status', 'vacant_positions', 'category'))):
+                    _count_job(counts, -1, _old(obj, 'status'), _old(obj, 'vacant_positions'), _old(obj, 'category'))
+                if state == 0 and _changed(obj, ('unit', 'commander_id')):
+                    old_unit, old_department = _old(obj, 'unit'), _department(session, _old(obj, 'commander_id'))
+                    unit, department = _job_dimensions(session, obj)
+                    for status, n in _status_counts(session, Job.id == obj.id):
+                        _count_applications(counts, -1, status, old_unit, old_department, n)
+                        _count_applications(counts, 1, status, unit, department, n)
+
+            elif isinstance(obj, JobApplication):
+                if state == 0 and not _changed(obj, ('status', 'job_id')):
+                    continue
+                unit, department = _job_dimensions(session, _application_job(session, obj))
+                if state >= 0:
+                    _count_applications(counts, 1, _current(obj, 'status', state), unit, department)
+                if state <= 0:
+                    if state == 0 and _changed(obj, ('job_id',)):
+                        unit, department = _job_dimensions(session, session.get(Job, _old(obj, 'job_id')))
+                    _count_applications(counts, -1, _old(obj, 'status'), unit, department)
+
+            elif isinstance(obj, Commander) and state == 0 and _changed(obj, ('department',)):
+                for status, n in _status_counts(session, Job.commander_id == obj.id):
+                    _count_applications(counts, -1, status, None, _old(obj, 'department'), n)
+                    _count_applications(counts, 1, status, None, obj.department, n)  # hires cancel out
+
+    _apply(session.connection(), counts)
+
+
+def _load_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+# make the ORM load the replaced value on assignment, so _old() works on expired objects too
+for _attribute in (Job.status, Job.vacant_positions, Job.category, Job.unit, Job.commander_id,
+                   JobApplication.status, JobApplication.job_id, Commander.department):
+    event.listen(_attribute, 'set', _load_old_value, active_history=True)
+
+
+class StatsService:
+    @staticmethod
+    def record_status_changes(job_id, changes):
+        """
+        hr_stats deltas for application statuses changed by a set-based UPDATE (which the
+        flush hook never sees). `changes` is [(old status, new status)] for applications of
+        one job; call it in the same transaction.
+        """
+        job = db.session.get(Job, job_id)
+        unit, department = _job_dimensions(db.session, job)
+        counts = Counter()
+        for (old, new), n in Counter(changes).items():
+            _count_applications(counts, -1, old, unit, department, n)
+            _count_applications(counts, 1, new, unit, department, n)
+        _apply(db.session.connection(), counts)
+
+    @staticmethod
+    def get_stats():
+        """hr_stats as nested dicts; reads only the summary rows, never jobs or applications."""
+        stats = {HIRES_BY_UNIT: {}, OPEN_POSITIONS_BY_CATEGORY: {}, APPLICATIONS_BY_DEPARTMENT: {}}
+        for metric, key, subkey, value in db.session.query(HRStat.metric, HRStat.key, HRStat.subkey, HRStat.value):
+            if not value or metric not in stats:
+                continue
+            if subkey:
+                stats[metric].setdefault(key, {})[subkey] = value
+            else:
+                stats[metric][key] = value
+        return stats
+
+    @staticmethod
+    def compute():
+        """The counters recomputed from jobs and applications: {(metric, key, subkey): value}."""
+        counts = Counter()
+        jobs = db.session.query(Job.status, Job.category, func.sum(Job.vacant_positions)) \
+            .filter(or_(Job.status == JobStatus.OPEN, Job.status.is_(None)), Job.vacant_positions > 0) \
+            .group_by(Job.status, Job.category)
+        for status, category, positions in jobs:
+            _count_job(counts, 1, status, positions, category)
+        applications = db.session.query(JobApplication.status, Job.unit, Commander.department,
+                                        func.count(JobApplication.id)) \
+            .join(Job, JobApplication.job_id == Job.id) \
+            .outerjoin(Commander, Job.commander_id == Commander.id) \
+            .group_by(JobApplication.status, Job.unit, Commander.department)
+        for status, unit, department, n in applications:
+            _count_applications(counts, 1, status, unit, department, n)
+        return {key: value for key, value in counts.items() if value}
+
+    @staticmethod
+    def rebuild(check_only=False):
+        """
+        Recompute every counter from scratch. Returns {(metric, key, subkey): (stored, expected)}
+        for the counters that were wrong; unless `check_only`, hr_stats is then replaced.
+        """
+        expected = StatsService.compute()
+        stored = {(metric, key, subkey): value for metric, key, subkey, value in
+                  db.session.query(HRStat.metric, HRStat.key, HRStat.subkey, HRStat.value) if value}
+        differences = {key: (stored.get(key, 0), expected.get(key, 0))
+                       for key in stored.keys() | expected.keys() if stored.get(key, 0) != expected.get(key, 0)}
+        if not check_only:
+            db.session.query(HRStat).delete()
+            if expected:
+                db.session.execute(insert(HRStat), [{'metric': metric, 'key': key, 'subkey': subkey, 'value': value}
+                                                    for (metric, key, subkey), value in expected.items()])
+            db.session.commit()
+        return differences
@@ -1,12 +1,12 @@
 from datetime import datetime
 
 from werkzeug.utils import secure_filename
-from flask import current_app
 from models import JobApplication, ApplicationAnswer, Resume, User, Interview
 from db import db
-import os
 from models.volunteer import Volunteer
 from models import Volunteer, Resume
+from sqlalchemy.exc import IntegrityError
+from services.resume_service import ResumeService
 from werkzeug.exceptions import BadRequest
 
 
@@ -25,7 +25,12 @@ class VolunteerService:
             **data  # Unpack data dictionary into keyword arguments
         )
         db.session.add(application)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # a concurrent request won the race; uq_job_applications_job_volunteer rejected this one
+            db.session.rollback()
+            raise BadRequest("You have already applied for this job")
         return application
 
     # @staticmethod
@@ -79,18 +84,13 @@ class VolunteerService:
         if existing_resume:
             raise BadRequest("A resume has already been uploaded for this application")
 
-        filename = secure_filename(resume_file.filename)
-        resumes_folder = current_app.config['RESUMES_FOLDER']
-        upload_folder = current_app.config['UPLOAD_FOLDER']
-        os.makedirs(os.path.join(upload_folder, resumes_folder), exist_ok=True)
-
-        full_file_path = os.path.join(upload_folder, resumes_folder, filename)
-
-        resume_file.save(full_file_path)
-
+        # stored once per distinct content, shared by every application that uses the same file
+        blob = ResumeService.store(resume_file, file_extension)
         resume = Resume(
             application_id=application.id,
-            file_path=filename  # Store ONLY the filename in the database
+            blob_id=blob.id,
+            file_path=blob.storage_path,  # relative to RESUMES_FOLDER
+            original_filename=secure_filename(resume_file.filename)
         )
         db.session.add(resume)
         db.session.commit()
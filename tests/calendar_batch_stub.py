@@ -0,0 +1,82 @@
+"""
+Local stand-in for Google's HTTP batch endpoint (https://www.googleapis.com/batch/calendar/v3).
+It answers every events.insert in a multipart/mixed batch with 200 and a fake event, or with
+400 when the candidate's address is in `rejected_emails`, and records each batch it received.
+Any other path gets a 404, failing the whole round trip.
+"""
+import json
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BATCH_PATH = '/batch/calendar/v3'
+RESPONSE_BOUNDARY = 'batch_stub_boundary'
+
+
+class BatchHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.path != BATCH_PATH:
+            self.send_error(404)
+            return
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body)
+        parts = []
+        for part in message.iter_parts():
+            inner = part.get_payload(decode=True).decode()
+            event = json.loads(inner[inner.index('{'):inner.rindex('}') + 1])
+            parts.append((part['Content-ID'].strip('<>'), event))
+        self.server.batches.append([event for _, event in parts])
+
+        chunks = []
+        for content_id, event in parts:
+            candidate = event['attendees'][1]['email']
+            if candidate in self.server.rejected_emails:
+                status, payload = '400 Bad Request', {'error': {'code': 400, 'message': f'Invalid attendee {candidate}'}}
+            else:
+                status, payload = '200 OK', {'id': f'stub{len(self.server.created)}',
+                                             'htmlLink': f"https://calendar.test/{candidate}"}
+                self.server.created.append(event)
+            chunks.append(
+                f'--{RESPONSE_BOUNDARY}\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id}>\r\n\r\n'
+                f'HTTP/1.1 {status}\r\nContent-Type: application/json\r\n\r\n{json.dumps(payload)}\r\n')
+        data = (''.join(chunks) + f'--{RESPONSE_BOUNDARY}--\r\n').encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', f'multipart/mixed; boundary={RESPONSE_BOUNDARY}')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BatchStub:
+    def __init__(self, rejected_emails=()):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), BatchHandler)
+        self.server.rejected_emails = set(rejected_emails)
+        self.server.batches = []
+        self.server.created = []
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/'
+        self.batch_uri = self.url + BATCH_PATH.lstrip('/')
+
+    @property
+    def batches(self):
+        """Events of every batch request received, one list per round trip."""
+        return self.server.batches
+
+    @property
+    def created(self):
+        return self.server.created
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# read by config.Config on import: importing app.py must not start invitation senders
+os.environ['INVITATION_WORKERS'] = '0'
+
+from app import create_app  # noqa: E402
+from config import Config  # noqa: E402
+from db import db  # noqa: E402
+from models import Commander, HR, Job, User  # noqa: E402
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """create_app() against a fresh SQLite file in tmp_path; keyword arguments override Config."""
+    apps = []
+
+    def make(**config):
+        overrides = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'primary.db'}",
+            'SQLALCHEMY_BINDS': {},
+            'INVITATION_WORKERS': 0,  # tests send queued invitations themselves
+            'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+            'RESUMES_FOLDER': str(tmp_path / 'uploads' / 'resumes'),
+        }
+        overrides.update(config)
+        for name, value in overrides.items():
+            monkeypatch.setattr(Config, name, value, raising=False)
+        app = create_app()
+        app.config['TESTING'] = True
+        with app.app_context():
+            # every model lives on the default bind; replicas are copies made by `flask replica sync`
+            db.create_all(bind_key=None)
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            for engine in db.engines.values():
+                engine.dispose()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def add_user(email, role, **fields):
+    user = User(email=email, role=role, password_hash='x', **fields)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def add_commander(email='commander@example.com', department='Ops'):
+    user = add_user(email, 'commander', full_name='Commander')
+    commander = Commander(user_id=user.id, name='Commander', department=department)
+    db.session.add(commander)
+    db.session.flush()
+    return commander
+
+
+def add_hr(email='hr@example.com'):
+    user = add_user(email, 'hr')
+    db.session.add(HR(user_id=user.id, department='HR'))
+    db.session.flush()
+    return user
+
+
+def add_job(commander, title='Job', **fields):
+    job = Job(commander_id=commander.id, title=title, **fields)
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def auth_headers(app, user_id, role):
+    with app.app_context():
+        token = create_access_token(identity=str(user_id), additional_claims={'role': role})
+    return {'Authorization': f'Bearer {token}'}
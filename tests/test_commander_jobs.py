@@ -0,0 +1,78 @@
+from sqlalchemy import event
+
+from conftest import add_commander, add_hr, add_job, add_user, auth_headers
+from db import db
+from models import Commander, JobApplication, Volunteer
+from models.application import ApplicationStatus
+from services.commander_service import CommanderService
+
+
+def seed(app):
+    with app.app_context():
+        mine, other = add_commander(), add_commander('other@example.com')
+        jobs = [add_job(mine, 'Driver'), add_job(mine, 'Cook'), add_job(other, 'Medic')]
+        statuses = [ApplicationStatus.PENDING, ApplicationStatus.HIRED, ApplicationStatus.PENDING]
+        for i in range(6):
+            user = add_user(f'volunteer{i}@example.com', 'volunteer')
+            volunteer = Volunteer(user_id=user.id, full_name=f'Volunteer {i}', national_id=str(i))
+            db.session.add(volunteer)
+            db.session.flush()
+            for job in jobs[:i % 3 + 1]:
+                db.session.add(JobApplication(job_id=job.id, volunteer_id=volunteer.id, status=statuses[i % 3]))
+        db.session.commit()
+        return mine.id, [job.id for job in jobs]
+
+
+def test_application_counts_only_scan_the_selected_jobs(app):
+    commander_id, (driver, cook, medic) = seed(app)
+
+    with app.app_context():
+        engine = db.engine
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if 'GROUP BY job_applications.job_id' in statement:
+                statements.append((statement, parameters))
+
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            rows = CommanderService.get_commander_jobs(commander_id)
+            single = CommanderService.get_job_with_application_counts(medic)
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+
+        counts = {row[0].id: CommanderService.application_counts(row) for row in rows}
+        assert counts[driver] == (6, {'pending': 4, 'preferred': 0, 'rejected': 0, 'hired': 2, 'preferred_final': 0})
+        assert counts[cook] == (4, {'pending': 2, 'preferred': 0, 'rejected': 0, 'hired': 2, 'preferred_final': 0})
+        assert CommanderService.application_counts(single)[0] == 2
+
+        # every statement seeks job_applications by job id instead of counting the whole table
+        for statement, parameters in statements:
+            plan = ' '.join(row[-1] for row in
+                            db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters))
+            assert 'SCAN job_applications' not in plan
+        assert len(statements) == 2
+
+
+def test_other_commanders_jobs_are_a_json_404(app, client):
+    commander_id, (driver, cook, medic) = seed(app)
+    with app.app_context():
+        commander = db.session.get(Commander, commander_id)
+        headers = auth_headers(app, commander.user_id, 'commander')
+        hr = add_hr()
+        db.session.commit()
+        hr_headers = auth_headers(app, hr.id, 'hr')
+
+    for path in (f'/api/commander/jobs/{medic}/applications', f'/api/commander/jobs/{medic}/matches',
+                 f'/api/commander/jobs/{medic}/matches/batch', f'/api/commander/jobs/{medic}/applications/export'):
+        response = client.get(path, headers=headers)
+        assert (response.status_code, response.get_json()) == (404, {'message': 'Job not found'}), path
+
+    response = client.get('/api/hr/volunteers/12345', headers=hr_headers)
+    assert (response.status_code, response.get_json()) == (404, {'message': 'Volunteer not found'})
+
+    # the commander's own jobs still answer
+    response = client.get(f'/api/commander/jobs/{driver}/applications', headers=headers)
+    assert response.status_code == 200 and len(response.get_json()) == 6
+    response = client.get(f'/api/commander/jobs/{cook}/applications/export', headers=headers)
+    assert response.status_code == 200 and response.mimetype == 'text/csv'
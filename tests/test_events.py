@@ -0,0 +1,98 @@
+import logging
+
+import pytest
+
+from conftest import add_commander, add_job, add_user, auth_headers
+from db import db
+from models import JobApplication, Volunteer
+from models.application import ApplicationStatus
+from services.event_service import HR_CHANNEL, commander_channel, volunteer_channel
+from utils import events
+
+
+@pytest.fixture
+def seeded(app):
+    with app.app_context():
+        commander = add_commander()
+        job = add_job(commander, title='Driver')
+        applications = []
+        for i in range(2):
+            user = add_user(f'volunteer{i}@example.com', 'volunteer')
+            volunteer = Volunteer(user_id=user.id, full_name=f'Volunteer {i}', national_id=str(1000 + i))
+            db.session.add(volunteer)
+            db.session.flush()
+            application = JobApplication(job_id=job.id, volunteer_id=volunteer.id)
+            db.session.add(application)
+            db.session.flush()
+            applications.append((application.id, volunteer.id))
+        db.session.commit()
+        return {'commander_id': commander.id, 'commander_user_id': commander.user_id, 'job_id': job.id,
+                'applications': applications}
+
+
+def subscribe(app, *channels):
+    return events.get_backend(app).broker.subscribe(channels)
+
+
+def received(subscription):
+    """Everything published to `subscription` so far, as (channel, event)."""
+    items = []
+    while (item := subscription.get(timeout=0)) is not None:
+        items.append(item)
+    return items
+
+
+def test_status_change_is_published_after_commit_and_dropped_on_rollback(app, seeded):
+    (application_id, volunteer_id), _ = seeded['applications']
+    channels = (volunteer_channel(volunteer_id), commander_channel(seeded['commander_id']), HR_CHANNEL)
+    subscription = subscribe(app, *channels)
+
+    with app.app_context():
+        application = db.session.get(JobApplication, application_id)
+        application.status = ApplicationStatus.PREFERRED
+        db.session.flush()
+        assert received(subscription) == []  # flushed, not yet committed
+        db.session.commit()
+
+    expected = {'type': 'application.status', 'applicationId': application_id, 'jobId': seeded['job_id'],
+                'volunteerId': volunteer_id, 'status': 'preferred', 'previousStatus': 'pending'}
+    assert sorted(received(subscription)) == sorted((channel, expected) for channel in channels)
+
+    with app.app_context():
+        application = db.session.get(JobApplication, application_id)
+        application.status = ApplicationStatus.REJECTED
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()  # nothing pending any more
+
+    assert received(subscription) == []
+    subscription.close()
+
+
+def test_bulk_status_update_publishes_one_event_per_changed_application(app, client, seeded):
+    (first_id, first_volunteer), (second_id, second_volunteer) = seeded['applications']
+    subscription = subscribe(app, commander_channel(seeded['commander_id']))
+
+    response = client.patch(f"/api/commander/jobs/{seeded['job_id']}/volunteers/status",
+                            headers=auth_headers(app, seeded['commander_user_id'], 'commander'),
+                            json={'updates': [{'volunteerId': first_volunteer, 'status': 'rejected'},
+                                              {'volunteerId': second_volunteer, 'status': 'pending'}]})
+    assert response.status_code == 200
+
+    # the second application already was pending: no change, no event
+    assert [event for _, event in received(subscription)] == [
+        {'type': 'application.status', 'applicationId': first_id, 'jobId': seeded['job_id'],
+         'volunteerId': first_volunteer, 'status': 'rejected', 'previousStatus': 'pending'}]
+    subscription.close()
+
+
+def test_startup_warns_without_a_cross_process_backend(make_app, caplog):
+    with caplog.at_level(logging.WARNING, logger=events.__name__):
+        make_app()
+    assert any('EVENT_BACKEND_URL' in record.getMessage() for record in caplog.records)
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger=events.__name__):
+        make_app(EVENT_BACKEND_FACTORY=lambda app, broker: events.InProcessBackend(broker))
+        make_app(DEBUG=True)
+    assert caplog.records == []
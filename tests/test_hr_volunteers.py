@@ -0,0 +1,122 @@
+from datetime import date
+
+from sqlalchemy import event, text
+
+from conftest import add_commander, add_hr, add_job, add_user, auth_headers
+from db import db
+from models import JobApplication, Volunteer
+from models.application import ApplicationStatus
+from utils.pagination import encode_cursor
+
+
+def seed_volunteers(count):
+    commander = add_commander(f'commander{count}@example.com')
+    jobs = [add_job(commander, f'Job {i}') for i in range(3)]
+    statuses = list(ApplicationStatus)
+    for i in range(count):
+        user = add_user(f'volunteer{count}-{i}@example.com', 'volunteer', full_name=f'Volunteer {i}')
+        volunteer = Volunteer(user_id=user.id, full_name=f'Volunteer {i}', national_id=f'{count}-{i}',
+                              date_of_birth=date(1990, 1, 1 + i % 28))
+        db.session.add(volunteer)
+        db.session.flush()
+        for j, job in enumerate(jobs[:i % len(jobs) + 1]):
+            db.session.add(JobApplication(job_id=job.id, volunteer_id=volunteer.id,
+                                          status=statuses[(i + j) % len(statuses)]))
+
+
+def count_volunteer_list_queries(make_app, count):
+    app = make_app()
+    with app.app_context():
+        hr = add_hr()
+        seed_volunteers(count)
+        db.session.commit()
+        hr_id = hr.id
+        engine = db.engine
+    headers = auth_headers(app, hr_id, 'hr')
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = app.test_client().get('/api/hr/volunteers', headers=headers)
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+    volunteers = response.get_json()
+    assert len(volunteers) == count
+    assert all(v['jobStatuses'] for v in volunteers)
+    return len(statements)
+
+
+def test_volunteer_list_query_count_does_not_grow_with_volunteers(make_app, tmp_path):
+    small = count_volunteer_list_queries(make_app, 10)
+    large = count_volunteer_list_queries(
+        lambda: make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'large.db'}"), 80)
+    assert small == large
+
+
+def page_through(client, headers, sort, limit):
+    ids, cursor = [], None
+    while True:
+        params = {'sort': sort, 'limit': limit, **({'cursor': cursor} if cursor else {})}
+        response = client.get('/api/hr/volunteers', headers=headers, query_string=params)
+        assert response.status_code == 200
+        body = response.get_json()
+        ids += [v['id'] for v in body['items']]
+        cursor = body['nextCursor']
+        if cursor is None:
+            return ids
+
+
+def test_age_pages_cover_volunteers_without_a_birth_date(app, client):
+    with app.app_context():
+        hr = add_hr()
+        births = [date(1990, 5, 1), None, date(1985, 1, 1), None, date(1990, 5, 1), date(2000, 2, 2), None,
+                  date(1985, 1, 1), None]
+        volunteers = []
+        for i, born in enumerate(births):
+            user = add_user(f'volunteer{i}@example.com', 'volunteer')
+            volunteer = Volunteer(user_id=user.id, full_name=f'Volunteer {i}', national_id=str(i), date_of_birth=born)
+            db.session.add(volunteer)
+            db.session.flush()
+            volunteers.append((born or date.min, volunteer.id))
+        db.session.commit()
+        headers = auth_headers(app, hr.id, 'hr')
+
+    # youngest first; volunteers without a birth date count as the oldest
+    youngest_first = [volunteer_id for _, volunteer_id in sorted(volunteers, reverse=True)]
+    for limit in (1, 2, 4):
+        assert page_through(client, headers, 'age', limit) == youngest_first
+        assert page_through(client, headers, '-age', limit) == youngest_first[::-1]
+
+
+def test_age_page_seeks_on_the_birth_date_index(app, client):
+    with app.app_context():
+        hr = add_hr()
+        db.session.commit()
+        headers = auth_headers(app, hr.id, 'hr')
+        engine = db.engine
+    cursor = encode_cursor(date(1990, 1, 1), 5)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM volunteers' in statement:
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.get('/api/hr/volunteers', headers=headers,
+                              query_string={'sort': 'age', 'limit': 10, 'cursor': cursor})
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert response.status_code == 200
+
+    (statement, parameters), = statements
+    with engine.connect() as conn:
+        plan = ' '.join(row[-1] for row in conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters))
+    assert 'ix_volunteers_date_of_birth' in plan
+    assert 'TEMP B-TREE' not in plan  # the index also provides the order
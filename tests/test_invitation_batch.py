@@ -0,0 +1,81 @@
+import httplib2
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from calendar_batch_stub import BatchStub
+from conftest import add_commander, auth_headers
+from db import db
+from utils.google_calendar import BATCH_LIMIT, build_interview_event, send_invitation_batch
+
+
+def invitation(candidate_email, job_title='Developer'):
+    return {'candidate_email': candidate_email, 'commander_email': 'commander@example.com',
+            'job_title': job_title, 'interview_time': '2025-05-01T10:00:00'}
+
+
+def stub_service(stub):
+    # the real discovery document, pointed at the stub
+    return build('calendar', 'v3', http=httplib2.Http(), static_discovery=True,
+                 client_options={'api_endpoint': stub.url})
+
+
+@pytest.fixture
+def stub():
+    with BatchStub(rejected_emails={'rejected@example.com'}) as stub:
+        yield stub
+
+
+def test_batch_is_split_into_chunks_of_batch_limit(stub):
+    count = 2 * BATCH_LIMIT + 20
+    emails = [f'candidate{i}@example.com' if i % 7 else 'rejected@example.com' for i in range(count)]
+    events = [build_interview_event(invitation(email)) for email in emails]
+
+    results = send_invitation_batch(stub_service(stub), events, stub.batch_uri)
+
+    assert [len(batch) for batch in stub.batches] == [BATCH_LIMIT, BATCH_LIMIT, 20]
+    assert [event['attendees'][1]['email'] for batch in stub.batches for event in batch] == emails
+    assert len(results) == count
+    for email, (event_result, error) in zip(emails, results):
+        if email == 'rejected@example.com':
+            assert event_result is None
+            assert isinstance(error, HttpError) and error.resp.status == 400
+        else:
+            assert error is None
+            assert event_result['htmlLink'] == f'https://calendar.test/{email}'
+    # every event got its own conference request
+    request_ids = {event['conferenceData']['createRequest']['requestId'] for event in events}
+    assert len(request_ids) == count
+
+
+def test_failed_round_trip_fails_every_call_in_the_chunk(stub):
+    events = [build_interview_event(invitation(f'candidate{i}@example.com')) for i in range(3)]
+
+    results = send_invitation_batch(stub_service(stub), events, stub.url + 'missing')
+
+    assert not stub.batches
+    assert all(event_result is None and isinstance(error, HttpError) and error.resp.status == 404
+               for event_result, error in results)
+
+
+def test_batch_endpoint_reports_each_invitation(app, client, stub):
+    app.config['CALENDAR_SERVICE_FACTORY'] = lambda: stub_service(stub)
+    app.config['CALENDAR_BATCH_URI'] = stub.batch_uri
+    with app.app_context():
+        commander = add_commander()
+        db.session.commit()
+        headers = auth_headers(app, commander.user_id, 'commander')
+
+    items = [invitation('first@example.com'), invitation('rejected@example.com'),
+             {'candidate_email': 'incomplete@example.com'}, invitation('second@example.com')]
+    response = client.post('/api/commander/send-interview-invitations/batch', headers=headers,
+                           json={'invitations': items})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['sent'], body['failed']) == (2, 2)
+    assert [r['status'] for r in body['results']] == ['sent', 'failed', 'invalid', 'sent']
+    assert [r['index'] for r in body['results']] == [0, 1, 2, 3]
+    assert body['results'][0]['event_link'] == 'https://calendar.test/first@example.com'
+    assert 'Calendar API error' in body['results'][1]['error']
+    assert len(stub.batches) == 1 and len(stub.batches[0]) == 3  # the invalid item was never sent
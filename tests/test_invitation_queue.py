@@ -0,0 +1,174 @@
+import json
+from datetime import datetime, timedelta
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from conftest import add_commander
+from db import db
+from models import InvitationJob
+from services import invitation_service
+from services.invitation_service import MAX_ATTEMPTS, InvitationService
+
+INVITATION = {'candidate_email': 'candidate@example.com', 'commander_email': 'commander@example.com',
+              'job_title': 'Developer', 'interview_time': '2025-05-01T10:00:00'}
+
+
+def http_error(status):
+    return HttpError(httplib2.Response({'status': status}), b'{}')
+
+
+class FakeRequest:
+    def __init__(self, run):
+        self.run = run
+
+    def execute(self):
+        return self.run()
+
+
+class FakeCalendar:
+    """Calendar client stand-in: events().insert / events().get on an in-memory calendar."""
+
+    def __init__(self, failures=()):
+        self.events_by_id = {}
+        self.inserts = 0
+        # per insert call: an HTTP status to fail with, or 'lost' to create the event and then fail
+        self.failures = list(failures)
+
+    def events(self):
+        return self
+
+    def insert(self, calendarId, body, **params):
+        def run():
+            self.inserts += 1
+            failure = self.failures.pop(0) if self.failures else None
+            if body['id'] in self.events_by_id:
+                raise http_error(409)
+            if isinstance(failure, int):
+                raise http_error(failure)
+            self.events_by_id[body['id']] = {'id': body['id'], 'htmlLink': f"https://calendar.test/{body['id']}"}
+            if failure == 'lost':
+                # created, but the response never reached us
+                raise http_error(503)
+            return self.events_by_id[body['id']]
+        return FakeRequest(run)
+
+    def get(self, calendarId, eventId):
+        return FakeRequest(lambda: self.events_by_id[eventId])
+
+
+@pytest.fixture
+def calendar(app):
+    calendar = FakeCalendar()
+    app.config['CALENDAR_SERVICE_FACTORY'] = lambda: calendar
+    return calendar
+
+
+def enqueue(app):
+    with app.app_context():
+        commander = add_commander()
+        return InvitationService.enqueue(commander.id, INVITATION).id
+
+
+def make_due(app, job_id):
+    with app.app_context():
+        db.session.get(InvitationJob, job_id).next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+        db.session.commit()
+
+
+def run_once(app, job_id):
+    with app.app_context():
+        assert InvitationService.run_pending(max_jobs=1) == 1
+        job = db.session.get(InvitationJob, job_id)
+        return job.status, job.attempts, job.next_attempt_at
+
+
+def test_transient_failure_is_retried_with_backoff(app, calendar):
+    calendar.failures = [503, 429]
+    job_id = enqueue(app)
+
+    status, attempts, first_retry = run_once(app, job_id)
+    assert (status, attempts) == ('queued', 1)
+    assert first_retry > datetime.utcnow()
+    with app.app_context():
+        assert InvitationService.run_pending() == 0  # not due yet
+
+    make_due(app, job_id)
+    before = datetime.utcnow()
+    status, attempts, second_retry = run_once(app, job_id)
+    assert (status, attempts) == ('queued', 2)
+    assert second_retry > before
+
+    make_due(app, job_id)
+    status, attempts, _ = run_once(app, job_id)
+    assert (status, attempts) == ('sent', 3)
+    assert len(calendar.events_by_id) == 1
+
+
+def test_persistent_failure_fails_after_max_attempts(app, calendar):
+    calendar.failures = [503] * MAX_ATTEMPTS
+    job_id = enqueue(app)
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        status, attempts, _ = run_once(app, job_id)
+        assert attempts == attempt
+        assert status == ('failed' if attempt == MAX_ATTEMPTS else 'queued')
+        make_due(app, job_id)
+
+    with app.app_context():
+        assert InvitationService.run_pending() == 0
+        assert 'Calendar API error' in db.session.get(InvitationJob, job_id).last_error
+    assert calendar.inserts == MAX_ATTEMPTS
+
+
+def test_client_error_fails_without_retrying(app, calendar):
+    calendar.failures = [400]
+    job_id = enqueue(app)
+
+    status, attempts, _ = run_once(app, job_id)
+    assert (status, attempts) == ('failed', 1)
+
+
+def test_resend_of_created_event_counts_as_sent(app, calendar):
+    calendar.failures = ['lost']
+    job_id = enqueue(app)
+
+    status, _, _ = run_once(app, job_id)
+    assert status == 'queued'
+    assert len(calendar.events_by_id) == 1
+
+    make_due(app, job_id)
+    status, attempts, _ = run_once(app, job_id)
+    assert (status, attempts) == ('sent', 2)
+    assert calendar.inserts == 2  # the retry got a 409 ...
+    assert len(calendar.events_by_id) == 1  # ... and created nothing new
+    with app.app_context():
+        job = db.session.get(InvitationJob, job_id)
+        assert job.event_link == f'https://calendar.test/{job.event_id}'
+        assert json.loads(job.payload) == INVITATION
+
+
+def test_workers_started_with_the_app_send_jobs_queued_before_a_restart(make_app, monkeypatch):
+    app = make_app()
+    job_id = enqueue(app)  # INVITATION_WORKERS=0: stays queued, as if the process died here
+
+    calendar = FakeCalendar()
+    passes = []
+
+    def worker_loop(app):
+        # one polling pass of the real loop, so the thread ends with the test
+        with app.app_context():
+            passes.append(InvitationService.run_pending())
+
+    monkeypatch.setattr(invitation_service, '_worker_loop', worker_loop)
+    monkeypatch.setattr(invitation_service, '_workers_pid', None)
+    monkeypatch.setattr(invitation_service, '_workers', [])
+    restarted = make_app(INVITATION_WORKERS=1, CALENDAR_SERVICE_FACTORY=lambda: calendar)
+    for worker in invitation_service._workers:
+        worker.join(5)
+
+    assert passes == [1]
+    with restarted.app_context():
+        assert db.session.get(InvitationJob, job_id).status == 'sent'
+    assert len(calendar.events_by_id) == 1
@@ -0,0 +1,116 @@
+import math
+import random
+import threading
+from collections import Counter
+
+import pytest
+
+from conftest import add_commander, add_job, add_user
+from db import db
+from models import Volunteer
+from services import matching_service
+from services.matching_service import JOB_FIELDS, KIND_WEIGHTS, VOLUNTEER_FIELDS, MatchIndex, features
+
+LANGUAGES = ['english', 'hebrew', 'russian', 'arabic', 'french', 'amharic']
+SKILLS = ['python', 'sql', 'driver', 'medic', 'rust', 'welding', 'radio', 'cooking']
+
+
+def add_volunteer(i, **fields):
+    user = add_user(f'volunteer{i}@example.com', 'volunteer')
+    volunteer = Volunteer(user_id=user.id, full_name=f'Volunteer {i}', national_id=str(1000 + i), **fields)
+    db.session.add(volunteer)
+    db.session.flush()
+    return volunteer
+
+
+def brute_force(job, volunteers):
+    """Score every volunteer directly with the index's weighting: [(volunteer_id, score)], best first."""
+    volunteer_features = {v.id: features(v, VOLUNTEER_FIELDS) for v in volunteers}
+    frequency = Counter(f for fs in volunteer_features.values() for f in fs)
+    weights = {f: KIND_WEIGHTS[f.split(':', 1)[0]] * math.log(1 + len(volunteers) / frequency[f])
+               for f in features(job, JOB_FIELDS) if frequency[f]}
+    scores = {volunteer_id: sum(weights[f] for f in fs if f in weights)
+              for volunteer_id, fs in volunteer_features.items()}
+    return sorted(((v, s) for v, s in scores.items() if s > 0), key=lambda item: (-item[1], item[0]))
+
+
+def assert_top_k(actual, ranking, k):
+    """`actual` is a valid top k of `ranking`; volunteers with equal scores may come in any order."""
+    assert [s for _, s, _ in actual] == pytest.approx([s for _, s in ranking[:k]])
+    by_score = {}
+    for volunteer_id, score in ranking:
+        by_score.setdefault(round(score, 9), set()).add(volunteer_id)
+    for volunteer_id, score, _ in actual:
+        assert volunteer_id in by_score[round(score, 9)]
+    assert len({volunteer_id for volunteer_id, _, _ in actual}) == len(actual)
+
+
+def test_volunteers_matching_only_common_features_still_make_the_top_k(app):
+    with app.app_context():
+        job = add_job(add_commander(), tech_skills='rust welding', required_languages=' '.join(LANGUAGES))
+        # one volunteer each for the rare (heaviest) skills, nothing else in common with the job
+        rare = [add_volunteer(0, experience='rust'), add_volunteer(1, experience='welding')]
+        # matches none of the rare features but every common one, which adds up to more
+        common = add_volunteer(2, languages=' '.join(LANGUAGES))
+        others = [add_volunteer(i, languages=LANGUAGES[i % len(LANGUAGES)]) for i in range(3, 45)]
+        db.session.commit()
+
+        matches = MatchIndex().top_matches(job, 2)
+
+        assert [volunteer_id for volunteer_id, _, _ in matches] == [common.id, rare[0].id]
+        assert_top_k(matches, brute_force(job, rare + [common] + others), 2)
+
+
+def test_top_matches_agree_with_brute_force(app):
+    rng = random.Random(7)
+    with app.app_context():
+        commander = add_commander()
+        volunteers = [add_volunteer(i, languages=' '.join(rng.sample(LANGUAGES, rng.randint(0, 3))),
+                                    experience=' '.join(rng.sample(SKILLS, rng.randint(0, 3))),
+                                    education=rng.choice(['engineering', 'nursing', 'law', None]))
+                      for i in range(300)]
+        jobs = [add_job(commander, f'Job {i}', required_languages=' '.join(rng.sample(LANGUAGES, 3)),
+                        tech_skills=' '.join(rng.sample(SKILLS, 3)), education=rng.choice(['engineering', 'law']))
+                for i in range(20)]
+        db.session.commit()
+
+        index = MatchIndex()
+        for job in jobs:
+            for k in (1, 5, 20):
+                assert_top_k(index.top_matches(job, k), brute_force(job, volunteers), k)
+
+
+def test_rebuild_does_not_block_matching(app, monkeypatch):
+    with app.app_context():
+        job = add_job(add_commander(), tech_skills='python')
+        volunteer = add_volunteer(0, experience='python')
+        db.session.commit()
+        index = MatchIndex()
+        assert [v for v, _, _ in index.top_matches(job, 5)] == [volunteer.id]
+
+    # hold a rebuild halfway through reading the volunteers
+    reading, release = threading.Event(), threading.Event()
+    volunteer_rows = matching_service._volunteer_rows
+
+    def slow_volunteer_rows():
+        reading.set()
+        release.wait(5)
+        return volunteer_rows()
+
+    def rebuild():
+        with app.app_context():
+            index.rebuild()
+
+    monkeypatch.setattr(matching_service, '_volunteer_rows', slow_volunteer_rows)
+    rebuilder = threading.Thread(target=rebuild)
+    rebuilder.start()
+    try:
+        assert reading.wait(5)
+        monkeypatch.setattr(matching_service, '_volunteer_rows', volunteer_rows)
+        with app.app_context():
+            # answered from the old index while the rebuild is still running
+            assert [v for v, _, _ in index.top_matches(job, 5)] == [volunteer.id]
+    finally:
+        release.set()
+        rebuilder.join(5)
+    assert not rebuilder.is_alive()
@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+from flask import g
+from sqlalchemy import event, select
+
+from conftest import add_commander, add_hr, add_job, auth_headers
+from db import db
+from models import Job, User
+
+
+@pytest.fixture
+def replica_app(make_app, tmp_path):
+    """App with the primary and one replica as two SQLite files, the replica synced from the primary."""
+    app = make_app(SQLALCHEMY_BINDS={'replica_0': f"sqlite:///{tmp_path / 'replica.db'}"})
+    with app.app_context():
+        add_hr()
+        add_job(add_commander(), 'Synced')
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['replica', 'sync'])
+    assert result.exit_code == 0, result.output
+    return app
+
+
+@pytest.fixture
+def executed(replica_app):
+    """Statements run on each engine: {'primary': [...], 'replica': [...]}."""
+    statements = {'primary': [], 'replica': []}
+    with replica_app.app_context():
+        engines = {'primary': db.engines[None], 'replica': db.engines['replica_0']}
+    listeners = []
+    for name, engine in engines.items():
+        def record(conn, cursor, statement, parameters, context, executemany, name=name):
+            statements[name].append(statement)
+        event.listen(engine, 'before_cursor_execute', record)
+        listeners.append((engine, record))
+    yield statements
+    for engine, record in listeners:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def job_titles(url):
+    with sqlite3.connect(url.database) as connection:
+        return {title for (title,) in connection.execute('SELECT title FROM jobs')}
+
+
+def test_writes_go_to_the_primary(replica_app, executed):
+    with replica_app.test_request_context('/api/hr/jobs', method='GET'):
+        with db.session.begin():
+            add_job(db.session.get(Job, 1).commander, 'Written')
+        primary, replica = db.engines[None].url, db.engines['replica_0'].url
+
+    assert any(s.startswith('INSERT INTO jobs') for s in executed['primary'])
+    assert not any(s.startswith(('INSERT', 'UPDATE', 'DELETE')) for s in executed['replica'])
+    assert 'Written' in job_titles(primary)
+    assert 'Written' not in job_titles(replica)
+
+
+def test_get_request_reads_from_the_replica(replica_app, executed):
+    with replica_app.app_context():
+        add_job(db.session.get(Job, 1).commander, 'Only on primary')
+        db.session.commit()
+        hr_user_id = User.query.filter_by(role='hr').one().id
+    executed['primary'].clear()
+    headers = auth_headers(replica_app, hr_user_id, 'hr')
+
+    response = replica_app.test_client().get('/api/hr/jobs', headers=headers)
+
+    assert response.status_code == 200
+    assert [job['jobName'] for job in response.get_json()] == ['Synced']
+    assert any(s.startswith('SELECT') for s in executed['replica'])
+    assert executed['primary'] == []
+
+
+def test_reads_stick_to_the_primary_after_a_write(replica_app, executed):
+    with replica_app.test_request_context('/api/hr/jobs', method='GET'):
+        db.session.execute(select(Job.title)).all()
+        assert len(executed['replica']) == 1 and executed['primary'] == []
+
+        db.session.get(Job, 1).title = 'Renamed'
+        db.session.flush()
+        assert g.db_use_primary
+
+        executed['replica'].clear()
+        executed['primary'].clear()
+        titles = db.session.execute(select(Job.title)).scalars().all()
+        assert titles == ['Renamed']  # reads its own uncommitted write
+        assert executed['primary'] and executed['replica'] == []
+        db.session.rollback()
+
+
+def test_non_get_requests_and_background_work_read_from_the_primary(replica_app, executed):
+    with replica_app.test_request_context('/api/hr/jobs', method='POST'):
+        db.session.execute(select(Job.title)).all()
+        db.session.remove()
+    with replica_app.app_context():
+        db.session.execute(select(Job.title)).all()
+
+    assert len(executed['primary']) == 2
+    assert executed['replica'] == []
@@ -0,0 +1,62 @@
+import hashlib
+import io
+import os
+import sqlite3
+
+from sqlalchemy import event
+from werkzeug.datastructures import FileStorage
+
+from db import db
+from models import ResumeBlob
+from services.resume_service import ResumeService, blob_full_path
+
+CONTENT = b'%PDF-1.4 resume'
+
+
+def upload():
+    return FileStorage(stream=io.BytesIO(CONTENT), filename='resume.pdf')
+
+
+def test_store_reuses_blobs_with_the_same_content(app):
+    with app.app_context():
+        first = ResumeService.store(upload(), 'pdf')
+        db.session.commit()
+        second = ResumeService.store(upload(), 'pdf')
+        db.session.commit()
+
+        assert second.id == first.id
+        assert db.session.get(ResumeBlob, first.id).ref_count == 2
+
+
+def test_store_recreates_a_blob_collected_between_lookup_and_reference(app):
+    with app.app_context():
+        blob = ResumeService.store(upload(), 'pdf')
+        blob.ref_count = 0  # its last resume was deleted
+        db.session.commit()
+        old_id, path = blob.id, blob_full_path(blob.storage_path)
+        engine = db.engine
+        database = engine.url.database
+
+        collected = []
+
+        def collect(conn, cursor, statement, parameters, context, executemany):
+            # the GC deletes the zero-ref row (and its file) just before our UPDATE runs
+            if statement.startswith('UPDATE resume_blobs SET ref_count') and not collected:
+                collected.append(old_id)
+                with sqlite3.connect(database) as gc:
+                    gc.execute('DELETE FROM resume_blobs WHERE id = ?', (old_id,))
+                os.remove(path)
+
+        event.listen(engine, 'before_cursor_execute', collect)
+        try:
+            stored = ResumeService.store(upload(), 'pdf')
+            db.session.commit()
+        finally:
+            event.remove(engine, 'before_cursor_execute', collect)
+
+        assert collected == [old_id]
+        # a fresh row (SQLite may hand out the freed id again) holding the new reference
+        assert [(b.id, b.ref_count) for b in ResumeBlob.query.all()] == [(stored.id, 1)]
+        assert stored.sha256 == hashlib.sha256(CONTENT).hexdigest()
+        with open(blob_full_path(stored.storage_path), 'rb') as f:
+            assert f.read() == CONTENT
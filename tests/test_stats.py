@@ -0,0 +1,88 @@
+import pytest
+
+from conftest import add_commander, add_hr, add_user, auth_headers
+from db import db
+from models import Job, JobApplication, Volunteer
+from models.application import ApplicationStatus
+from services.stats_service import OPEN_POSITIONS_BY_CATEGORY, StatsService
+
+
+@pytest.fixture
+def seeded(app):
+    with app.app_context():
+        commander = add_commander(department='Ops')
+        hr = add_hr()
+        volunteers = []
+        for i in range(4):
+            user = add_user(f'volunteer{i}@example.com', 'volunteer')
+            volunteer = Volunteer(user_id=user.id, full_name=f'Volunteer {i}', national_id=str(1000 + i))
+            db.session.add(volunteer)
+            db.session.flush()
+            volunteers.append((volunteer.id, user.id))
+        db.session.commit()
+        return {
+            'commander': auth_headers(app, commander.user_id, 'commander'),
+            'commander_id': commander.id,
+            'hr': auth_headers(app, hr.id, 'hr'),
+            'volunteers': volunteers,
+        }
+
+
+def assert_in_sync(app):
+    with app.app_context():
+        assert StatsService.rebuild(check_only=True) == {}
+
+
+def test_job_inserted_without_vacant_positions_counts_the_column_default(app, seeded):
+    with app.app_context():
+        db.session.add(Job(commander_id=seeded['commander_id'], title='T', category='cat'))
+        db.session.commit()
+        assert StatsService.get_stats()[OPEN_POSITIONS_BY_CATEGORY] == {'cat': 1}
+    assert_in_sync(app)
+
+
+def test_counters_stay_in_sync_through_every_write_path(app, client, seeded):
+    commander, hr = seeded['commander'], seeded['hr']
+    (v0, u0), (v1, u1), (v2, u2), (v3, _) = seeded['volunteers']
+
+    response = client.post('/api/commander/jobs', headers=commander, json={
+        'name': 'Driver', 'description': 'Drives', 'positions': 2, 'category': 'logistics', 'unit': 'North'})
+    assert response.status_code == 201
+    job_id = response.get_json()['job_id']
+    assert_in_sync(app)
+
+    response = client.patch(f'/api/commander/jobs/{job_id}', headers=commander,
+                            json={'positions': 3, 'category': 'transport', 'unit': 'South'})
+    assert response.status_code == 200
+    assert_in_sync(app)
+
+    for user_id in (u0, u1, u2):
+        response = client.post(f'/api/volunteer/jobs/{job_id}/apply', json={},
+                               headers=auth_headers(app, user_id, 'volunteer'))
+        assert response.status_code == 201
+    with app.app_context():
+        # inserted without a status: counted as the column default, pending
+        db.session.add(JobApplication(job_id=job_id, volunteer_id=v3))
+        db.session.commit()
+    assert_in_sync(app)
+
+    response = client.patch(f'/api/commander/jobs/{job_id}/volunteers/{v0}', headers=commander,
+                            json={'status': ApplicationStatus.PREFERRED_FINAL.value})
+    assert response.status_code == 200
+    assert_in_sync(app)
+
+    response = client.post('/api/hr/assignments', headers=hr, json={'volunteer_id': v0, 'job_id': job_id})
+    assert response.status_code == 200
+    assert_in_sync(app)
+
+    response = client.patch(f'/api/commander/jobs/{job_id}/volunteers/status', headers=commander, json={
+        'updates': [{'volunteerId': v1, 'status': 'rejected'}, {'volunteerId': v2, 'status': 'preferred'},
+                    {'volunteerId': v3, 'status': 'preferred'}]})
+    assert response.status_code == 200
+    assert_in_sync(app)
+
+    with app.app_context():
+        stats = StatsService.get_stats()
+        assert stats['hires_by_unit'] == {'South': 1}
+        assert stats[OPEN_POSITIONS_BY_CATEGORY] == {'transport': 2}
+        assert stats['applications_by_department'] == {'Ops': {'hired': 1, 'rejected': 1, 'preferred': 2}}
@@ -0,0 +1,114 @@
+import sqlite3
+
+import pytest
+
+from conftest import add_hr, add_user, auth_headers
+from db import db
+from models import User, Volunteer
+from services import hr_service
+from utils import passwords
+
+
+@pytest.fixture(autouse=True)
+def shutdown_pools():
+    yield  # the hash pools outlive the app; don't leak their processes into later tests
+    for pool in passwords._pools.values():
+        pool.shutdown()
+    passwords._pools.clear()
+
+
+@pytest.fixture
+def app(make_app):
+    # cheap hashes keep the test fast; two import processes still exercise the pool
+    return make_app(PASSWORD_HASH_METHOD='pbkdf2:sha256:1000', PASSWORD_HASH_WORKERS=2,
+                    PASSWORD_VERIFY_WORKERS=0)
+
+
+@pytest.fixture
+def hr_headers(app):
+    with app.app_context():
+        hr = add_hr()
+        taken = add_user('taken@example.com', 'volunteer')
+        db.session.add(Volunteer(user_id=taken.id, full_name='Existing', national_id='999'))
+        db.session.commit()
+        return auth_headers(app, hr.id, 'hr')
+
+
+def row(i, **fields):
+    return {'email': f'volunteer{i}@example.com', 'full_name': f'Volunteer {i}', 'national_id': str(100 + i),
+            **fields}
+
+
+def import_rows(client, headers, rows):
+    response = client.post('/api/hr/volunteers/import', headers=headers, json={'volunteers': rows})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_import_reports_every_row(app, client, hr_headers):
+    rows = [
+        row(1, date_of_birth='1990-05-01', gender='male', languages='English'),
+        row(2, email='volunteer1@example.com'),  # email repeated in the file
+        row(3, national_id='101'),  # national id repeated in the file
+        row(4, email='taken@example.com'),  # email already in the database
+        row(5, national_id='999'),  # national id already in the database
+        {'email': 'incomplete@example.com'},
+        row(7),
+    ]
+
+    body = import_rows(client, hr_headers, rows)
+
+    assert (body['created'], body['failed']) == (2, 5)
+    report = body['rows']
+    assert [r['row'] for r in report] == list(range(1, 8))
+    assert [r['status'] for r in report] == ['created', 'error', 'error', 'error', 'error', 'error', 'created']
+    assert report[1]['error'] == 'Duplicate email volunteer1@example.com in import'
+    assert report[2]['error'] == 'Duplicate national ID 101 in import'
+    assert report[3]['error'] == 'User with email taken@example.com already exists'
+    assert report[4]['error'] == 'Volunteer with national ID 999 already exists'
+    assert report[5]['error'].startswith('Missing required fields')
+
+    with app.app_context():
+        volunteer = db.session.get(Volunteer, report[0]['volunteer_id'])
+        assert volunteer.user_id == report[0]['user_id']
+        assert (volunteer.national_id, str(volunteer.date_of_birth), volunteer.languages) == \
+               ('101', '1990-05-01', 'English')
+        assert User.query.filter_by(email='volunteer1@example.com').count() == 1
+
+
+def test_imported_volunteers_can_log_in_with_their_national_id(app, client, hr_headers):
+    body = import_rows(client, hr_headers, [row(1), row(2)])
+    assert body['created'] == 2
+
+    for i in (1, 2):
+        response = client.post('/api/auth/login', json={'email': f'volunteer{i}@example.com',
+                                                         'password': str(100 + i)})
+        assert response.status_code == 200
+        assert response.get_json()['role'] == 'volunteer'
+    response = client.post('/api/auth/login', json={'email': 'volunteer1@example.com', 'password': 'wrong'})
+    assert response.status_code == 401
+
+
+def test_failed_batch_leaves_earlier_batches_committed(app, client, hr_headers, monkeypatch):
+    monkeypatch.setattr(hr_service, 'IMPORT_BATCH_SIZE', 2)
+    with app.app_context():
+        database = db.engine.url.database
+    hash_passwords = hr_service.hash_passwords
+
+    def hash_after_concurrent_signup(values):
+        # another request registers a row of the second batch after the duplicate check
+        with sqlite3.connect(database) as other:
+            other.execute("INSERT INTO users (email, password_hash, role) VALUES ('volunteer3@example.com', 'x', 'volunteer')")
+        return hash_passwords(values)
+
+    monkeypatch.setattr(hr_service, 'hash_passwords', hash_after_concurrent_signup)
+
+    body = import_rows(client, hr_headers, [row(i) for i in range(1, 6)])
+
+    assert [r['status'] for r in body['rows']] == ['created', 'created', 'error', 'error', 'created']
+    assert body['rows'][2]['error'] == body['rows'][3]['error'] == 'Database error: IntegrityError'
+    with app.app_context():
+        imported = {national_id for (national_id,) in db.session.query(Volunteer.national_id)}
+        assert imported == {'999', '101', '102', '105'}
+        assert User.query.filter_by(email='volunteer4@example.com').count() == 0
+
@@ -0,0 +1,59 @@
+from functools import wraps
+
+from flask import g, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+from sqlalchemy.orm import joinedload
+
+from models import User
+
+# EventSource cannot send an Authorization header, so event streams also take ?jwt=<token>
+STREAM_TOKEN_LOCATIONS = ['headers', 'query_string']
+
+# role -> relationship holding that role's profile row
+PROFILE_RELATIONSHIPS = {
+    'volunteer': User.volunteer,
+    'commander': User.commander,
+    'hr': User.hr,
+}
+
+
+def role_required(*roles, locations=None):
+    """
+    jwt_required() plus a role check on the token's 'role' claim (set by AuthService.generate_token).
+    Authorizing on the claim costs no database round trip; views that need the user or profile
+    call current_user()/current_profile() and pay for a single joined query at most.
+    `locations` overrides JWT_TOKEN_LOCATION, e.g. STREAM_TOKEN_LOCATIONS.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request(locations=locations)
+            role = get_jwt().get('role')
+            if role is None:
+                # tokens issued before the claim existed
+                user = current_user()
+                role = user.role if user else None
+            if role not in roles:
+                return jsonify({'message': 'Unauthorized'}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_user():
+    """The authenticated User with its role profile joined in, cached on flask.g for the request."""
+    if 'identity_user' not in g:
+        query = User.query
+        relationship = PROFILE_RELATIONSHIPS.get(get_jwt().get('role'))
+        if relationship is not None:
+            query = query.options(joinedload(relationship))
+        g.identity_user = query.filter(User.id == int(get_jwt_identity())).first()
+    return g.identity_user
+
+
+def current_profile():
+    """The Volunteer/Commander/HR row of the authenticated user, or None."""
+    user = current_user()
+    if user is None:
+        return None
+    return getattr(user, user.role, None) if user.role in PROFILE_RELATIONSHIPS else None
@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from flask import Response, current_app
+
+logger = logging.getLogger(__name__)
+
+REDIS_CHANNEL_PREFIX = 'events:'
+RECONNECT_DELAY = 2  # seconds before a lost backend subscription is retried
+RETRY_MS = 3000  # how long EventSource waits before reconnecting
+
+
+class Subscription:
+    """One client's bounded queue of events on a set of channels."""
+
+    def __init__(self, broker, channels, size):
+        self.broker = broker
+        self.channels = channels
+        self.queue = queue.Queue(maxsize=size)
+        # set when events were dropped because the client did not keep up; it should refetch
+        self.overflowed = False
+
+    def put(self, channel, event):
+        try:
+            self.queue.put_nowait((channel, event))
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next (channel, event), or None after `timeout` seconds without one."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    """In-process fan-out from channels to the subscriptions of this process."""
+
+    def __init__(self):
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channels, size=100):
+        subscription = Subscription(self, tuple(channels), size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def dispatch(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(channel, event)
+
+
+class InProcessBackend:
+    """Delivers events to this process only; enough for a single worker process."""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def publish(self, channel, event):
+        self.broker.dispatch(channel, event)
+
+
+class RedisBackend:
+    """
+    Cross-worker delivery through Redis pub/sub: every process publishes to Redis and one
+    listener thread per process feeds what comes back into its own broker.
+    """
+
+    def __init__(self, broker, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('EVENT_BACKEND_URL is a Redis URL but redis is not installed: pip install redis')
+        self.broker = broker
+        self._redis = redis.Redis.from_url(url)
+        threading.Thread(target=self._listen, name='event-listener', daemon=True).start()
+
+    def publish(self, channel, event):
+        self._redis.publish(REDIS_CHANNEL_PREFIX + channel, json.dumps(event))
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(REDIS_CHANNEL_PREFIX + '*')
+                for message in pubsub.listen():
+                    channel = message['channel'].decode()[len(REDIS_CHANNEL_PREFIX):]
+                    self.broker.dispatch(channel, json.loads(message['data']))
+            except Exception:
+                logger.exception('Lost the Redis event subscription; reconnecting')
+                time.sleep(RECONNECT_DELAY)
+
+
+def warn_if_in_process(app):
+    """
+    Log a warning when `app` would deliver events in-process outside debug mode: with more
+    than one worker process, streams would miss every event published by the other workers.
+    """
+    if app.config.get('EVENT_BACKEND_URL') or app.config.get('EVENT_BACKEND_FACTORY') is not None or app.debug:
+        return
+    logger.warning('Neither EVENT_BACKEND_URL nor EVENT_BACKEND_FACTORY is set: events reach only the '
+                   'streams of the process that published them, so run a single worker process or '
+                   'configure a backend')
+
+
+_backends = {}
+_backends_pid = None
+_backends_lock = threading.Lock()
+
+
+def get_backend(app=None):
+    """
+    This process's backend for `app`: EVENT_BACKEND_FACTORY(app, broker) if configured, Redis
+    for a redis:// EVENT_BACKEND_URL, otherwise in-process. A backend has publish(channel,
+    event) and delivers every event, from any process, to `broker.dispatch` in each process.
+    """
+    global _backends_pid
+    app = app or current_app._get_current_object()
+    with _backends_lock:
+        # listener threads and their connections do not survive a fork
+        if _backends_pid != os.getpid():
+            _backends.clear()
+            _backends_pid = os.getpid()
+        if app not in _backends:
+            broker = Broker()
+            factory = app.config.get('EVENT_BACKEND_FACTORY')
+            url = app.config.get('EVENT_BACKEND_URL')
+            if factory is not None:
+                _backends[app] = factory(app, broker)
+            elif url and url.startswith(('redis://', 'rediss://', 'unix://')):
+                _backends[app] = RedisBackend(broker, url)
+            else:
+                _backends[app] = InProcessBackend(broker)
+        return _backends[app]
+
+
+def publish(channel, event):
+    get_backend().publish(channel, event)
+
+
+def format_event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def event_stream(channels):
+    """
+    text/event-stream response relaying events published on `channels`. Comments keep idle
+    proxies from closing the connection; after SSE_MAX_SECONDS the stream ends and the
+    browser's EventSource reconnects, so a worker thread is never held forever. A 'resync'
+    event means events were dropped and the client should refetch its state.
+    """
+    config = current_app.config
+    keepalive = config.get('SSE_KEEPALIVE_SECONDS', 15)
+    deadline = time.monotonic() + config.get('SSE_MAX_SECONDS', 600)
+    subscription = get_backend().broker.subscribe(channels, config.get('SSE_QUEUE_SIZE', 100))
+
+    def generate():
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            while time.monotonic() < deadline:
+                item = subscription.get(timeout=min(keepalive, max(deadline - time.monotonic(), 0)))
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield format_event('resync', {})
+                if item is None:
+                    yield ': keepalive\n\n'
+                    continue
+                _, event = item
+                yield format_event(event['type'], event)
+        finally:
+            subscription.close()
+
+    # no stream_with_context: the generator needs neither the request nor the database
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
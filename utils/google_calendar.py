@@ -0,0 +1,242 @@
+import logging
+import os
+import pickle
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+from googleapiclient.discovery import build
+from googleapiclient.http import BatchHttpRequest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN_FILE = os.getenv('GOOGLE_CALENDAR_TOKEN_FILE', os.path.join(BASE_DIR, 'utils', 'token1.pickle'))
+SCOPES = ['https://www.googleapis.com/auth/calendar']
+REDIRECT_URI = 'http://localhost:8080/'
+
+# Refresh this long before the access token expires, and retry this often if a refresh fails
+REFRESH_MARGIN = timedelta(minutes=5)
+REFRESH_RETRY = timedelta(minutes=1)
+
+logger = logging.getLogger(__name__)
+
+
+class CalendarUnavailable(Exception):
+    """No usable Google credentials; run `flask calendar authorize` on the server."""
+
+
+# Credentials are shared by the whole process. Service objects are cached per thread because
+# the httplib2 transport underneath them is not thread safe.
+_lock = threading.Lock()
+_credentials = None
+_refresh_timer = None
+_local = threading.local()
+
+
+def get_calendar_service():
+    """Calendar API client backed by process-wide cached credentials; never prompts."""
+    credentials = _get_credentials()
+    service = getattr(_local, 'service', None)
+    if service is None or getattr(_local, 'credentials', None) is not credentials:
+        service = build('calendar', 'v3', credentials=credentials, cache_discovery=False)
+        _local.service = service
+        _local.credentials = credentials
+    return service
+
+
+def client_secret_file():
+    name = os.getenv('GOOGLE_CLIENT_SECRET')
+    if not name:
+        raise CalendarUnavailable('GOOGLE_CLIENT_SECRET environment variable is not set')
+    return os.path.join(BASE_DIR, 'utils', name)
+
+
+def save_credentials(credentials):
+    """Persist credentials and make them the process-wide ones."""
+    global _credentials
+    os.makedirs(os.path.dirname(TOKEN_FILE), exist_ok=True)
+    with open(TOKEN_FILE, 'wb') as token:
+        pickle.dump(credentials, token)
+    with _lock:
+        _credentials = credentials
+        _schedule_refresh()
+
+
+def _get_credentials():
+    global _credentials
+    with _lock:
+        if _credentials is None:
+            _credentials = _load_credentials()
+            _schedule_refresh()
+        if not _credentials.valid:
+            # the background refresh did not run in time (or failed); do it inline
+            _refresh()
+        return _credentials
+
+
+def _load_credentials():
+    if not os.path.exists(TOKEN_FILE):
+        raise CalendarUnavailable(f'Google token file not found at {TOKEN_FILE}')
+    with open(TOKEN_FILE, 'rb') as token:
+        credentials = pickle.load(token)
+    if not credentials.valid and not (credentials.expired and credentials.refresh_token):
+        raise CalendarUnavailable('Stored Google credentials are invalid and cannot be refreshed')
+    return credentials
+
+
+def _refresh():
+    """Refresh the cached credentials in place. Caller holds _lock."""
+    try:
+        _credentials.refresh(Request())
+    except RefreshError as e:
+        raise CalendarUnavailable(f'Could not refresh Google credentials: {e}')
+    with open(TOKEN_FILE, 'wb') as token:
+        pickle.dump(_credentials, token)
+
+
+def _schedule_refresh(delay=None):
+    """Arm a daemon timer that refreshes the token shortly before it expires. Caller holds _lock."""
+    global _refresh_timer
+    if _refresh_timer is not None:
+        _refresh_timer.cancel()
+    if _credentials is None or not _credentials.refresh_token:
+        return
+    if delay is None:
+        if _credentials.expiry is None:
+            return
+        # google-auth keeps expiry as naive UTC
+        delay = _credentials.expiry - REFRESH_MARGIN - datetime.utcnow()
+    _refresh_timer = threading.Timer(max(delay.total_seconds(), 0), _background_refresh)
+    _refresh_timer.daemon = True
+    _refresh_timer.start()
+
+
+def _background_refresh():
+    with _lock:
+        try:
+            _refresh()
+            _schedule_refresh()
+        except Exception as e:
+            logger.warning('Background Google credential refresh failed: %s', e)
+            _schedule_refresh(REFRESH_RETRY)
+
+
+INVITATION_REQUIRED_FIELDS = ['candidate_email', 'commander_email', 'job_title', 'interview_time']
+INTERVIEW_LENGTH = timedelta(hours=1)
+TIME_ZONE = 'Asia/Jerusalem'
+# Calendar accepts at most 50 calls per HTTP batch request
+BATCH_LIMIT = 50
+
+
+def parse_interview_time(value):
+    """ISO 8601 local (Asia/Jerusalem) time; a trailing Z is ignored like the UI has always sent it."""
+    return datetime.fromisoformat(value.replace('Z', ''))
+
+
+def build_interview_event(data, event_id=None):
+    """
+    Calendar event body for an interview invitation request.
+    `event_id` makes the insert idempotent: retrying an insert that already went through
+    gets a 409 instead of creating a second event (and a second round of emails).
+    """
+    interview_time = parse_interview_time(data['interview_time'])
+    interview_end = interview_time + INTERVIEW_LENGTH
+
+    event = {
+        'summary': f'Interview for {data["job_title"]} Position',
+        'location': 'Online',
+        'description': f'''Interview for the position of {data["job_title"]}
+
+        Commander: {data.get("commander_name", "Interview Commander")}
+        Candidate: {data.get("candidate_name", "Candidate")}
+
+        Additional Info: {data.get("additional_info", "")}''',
+        'start': {
+            'dateTime': interview_time.isoformat(),
+            'timeZone': TIME_ZONE,
+        },
+        'end': {
+            'dateTime': interview_end.isoformat(),
+            'timeZone': TIME_ZONE,
+        },
+        'attendees': [
+            {
+                'email': data['commander_email'],
+                'responseStatus': 'accepted',  # Auto-accept for organizer
+                'optional': False  # Mark as required attendee
+            },
+            {
+                'email': data['candidate_email'],
+                'responseStatus': 'needsAction',
+                'optional': False  # Mark as required attendee
+            }
+        ],
+        'reminders': {
+            'useDefault': False,
+            'overrides': [
+                {'method': 'email', 'minutes': 24 * 60},
+                {'method': 'popup', 'minutes': 30}
+            ]
+        },
+        'guestsCanModify': False,  # Prevents attendees from modifying the event
+        'guestsCanInviteOthers': False,  # Prevents attendees from inviting others
+        'sendNotifications': True  # Explicitly request notifications
+    }
+    if event_id:
+        event['id'] = event_id
+
+    if data.get('include_meet_link', True):
+        event['conferenceData'] = {
+            'createRequest': {
+                # must differ per event: Calendar treats a repeated requestId as the same conference
+                'requestId': event_id or uuid.uuid4().hex,
+                'conferenceSolutionKey': {'type': 'hangoutsMeet'}
+            }
+        }
+    return event
+
+
+def insert_event_request(service, event):
+    """The events.insert request for an invitation, not yet executed (so it can also go into a batch)."""
+    return service.events().insert(
+        calendarId='primary',
+        body=event,
+        conferenceDataVersion=1,
+        sendUpdates='all',  # This ensures all attendees get notifications
+        sendNotifications=True  # Additional parameter to force notifications
+    )
+
+
+def event_links(event_result):
+    """(event_link, meeting_link) of an inserted event."""
+    return (event_result.get('htmlLink'),
+            event_result.get('conferenceData', {}).get('entryPoints', [{}])[0].get('uri', None))
+
+
+def send_invitation_batch(service, events, batch_uri=None):
+    """
+    Insert many invitation events with Calendar HTTP batch requests (BATCH_LIMIT calls per round trip).
+    Returns one (event_result, error) pair per event, in input order; exactly one side is None.
+    `batch_uri` points the batch at another endpoint, e.g. a local stub.
+    """
+    results = [None] * len(events)
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = (None, exception) if exception is not None else (response, None)
+
+    for start in range(0, len(events), BATCH_LIMIT):
+        if batch_uri:
+            batch = BatchHttpRequest(callback=callback, batch_uri=batch_uri)
+        else:
+            batch = service.new_batch_http_request(callback=callback)
+        for index in range(start, min(start + BATCH_LIMIT, len(events))):
+            batch.add(insert_event_request(service, events[index]), request_id=str(index))
+        try:
+            batch.execute()
+        except Exception as error:
+            # the whole round trip failed; every call in this chunk gets the same error
+            for index in range(start, min(start + BATCH_LIMIT, len(events))):
+                if results[index] is None:
+                    results[index] = (None, error)
+    return results
@@ -1,3 +1,4 @@
+from calendar import isleap
 from datetime import date
 
 
@@ -10,4 +11,17 @@ def calculate_age(born):
     if birthday > today:
         return today.year - born.year - 1
     else:
-        return today.year - born.year
\ No newline at end of file
+        return today.year - born.year
+
+def date_years_ago(years, today=None):
+    """Latest date of birth that makes someone `years` old today (matches calculate_age)."""
+    today = today or date.today()
+    year = today.year - years
+    try:
+        cutoff = today.replace(year=year)
+    except ValueError:  # today is February 29 and the target year is not a leap year
+        return today.replace(year=year, day=28)
+    # calculate_age treats a February 29 birthday as February 28 in non-leap years
+    if today.month == 2 and today.day == 28 and isleap(year) and not isleap(today.year):
+        return cutoff.replace(day=29)
+    return cutoff
@@ -1,11 +1,20 @@
+# Usage (from the repository root):
+#   python -m utils.invitation invitations.csv
+#   python -m utils.invitation invitations.json --batch-uri http://localhost:8089/batch --no-auth
+import argparse
+import csv
+import json
 import os
 import pickle
-import datetime
+import sys
+
 import google_auth_oauthlib.flow
+import httplib2
 from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from google.auth.transport.requests import Request
 
+from utils.google_calendar import INVITATION_REQUIRED_FIELDS, build_interview_event, send_invitation_batch
+
 # Define the API scope for Google Calendar
 SCOPES = ['https://www.googleapis.com/auth/calendar']
 
@@ -15,14 +24,17 @@ CLIENT_SECRET_FILE = 'client_secret_575701819091-bu3aitbj73b3c7df63440tga3v8itdn
 API_NAME = 'calendar'
 API_VERSION = 'v3'
 REDIRECT_URI = 'http://localhost:8080/'
+# Resolved next to this script so `python -m utils.invitation` works from the repository root
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TOKEN_FILE = os.path.join(SCRIPT_DIR, 'token.pickle')
 
 
 # Authenticate the user and get the credentials
 def get_credentials():
     creds = None
     # Token file stores the user's access and refresh tokens
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
+    if os.path.exists(TOKEN_FILE):
+        with open(TOKEN_FILE, 'rb') as token:
             creds = pickle.load(token)
 
     # If there's no valid credentials available, let the user log in
@@ -31,60 +43,75 @@ def get_credentials():
             creds.refresh(Request())
         else:
             flow = google_auth_oauthlib.flow.InstalledAppFlow.from_client_secrets_file(
-                CLIENT_SECRET_FILE, SCOPES, redirect_uri=REDIRECT_URI)
+                os.path.join(SCRIPT_DIR, CLIENT_SECRET_FILE), SCOPES, redirect_uri=REDIRECT_URI)
             creds = flow.run_local_server(port=8080)
 
         # Save the credentials for the next run
-        with open('token.pickle', 'wb') as token:
+        with open(TOKEN_FILE, 'wb') as token:
             pickle.dump(creds, token)
 
     return creds
 
 
-# Create and send a Google Calendar event invitation
-def create_event(service):
-    event = {
-        'summary': 'Test Meeting',
-        'location': 'Somewhere',
-        'description': 'A chance to discuss important topics.',
-        'start': {
-            'dateTime': '2025-01-25T09:00:00-07:00',  # Start time in RFC3339 format
-            'timeZone': 'America/Los_Angeles',
-        },
-        'end': {
-            'dateTime': '2025-01-25T10:00:00-07:00',  # End time in RFC3339 format
-            'timeZone': 'America/Los_Angeles',
-        },
-        'attendees': [
-            {'email': 'avrdvir@gmail.com'},
-            # {'email': 'oiluridze@gmail.com'},
-            # {'email': 'javakhishviliannabelle@gmail.com'},
-        ],
-        'reminders': {
-            'useDefault': True,
-        },
-    }
-
-    try:
-        event_result = service.events().insert(
-            calendarId='primary', body=event).execute()
-        print(f"Event created: {event_result.get('htmlLink')}")
-    except HttpError as error:
-        print(f"An error occurred: {error}")
-
-
-# Main function to run the script
-def main():
-    # Get the credentials and create a service object
-    creds = get_credentials()
-    service = build(API_NAME, API_VERSION, credentials=creds)
-
-    # Create the event and send invitations
-    create_event(service)
+def load_invitations(path):
+    """Rows from a CSV (header row with the API field names) or a JSON list of objects."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.json'):
+            return json.load(f)
+        return list(csv.DictReader(f))
+
+
+def build_service(no_auth=False):
+    if no_auth:
+        # for a local stub of the batch endpoint: no OAuth round trip, no real calendar
+        return build(API_NAME, API_VERSION, http=httplib2.Http(), static_discovery=True)
+    return build(API_NAME, API_VERSION, credentials=get_credentials())
+
+
+# Send every invitation in the file through the same batch path as
+# POST /api/commander/send-interview-invitations/batch
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Send interview invitations in bulk via Calendar batch requests.')
+    parser.add_argument('file', help='CSV or JSON file with candidate_email, commander_email, job_title, '
+                                     'interview_time and optional candidate_name, commander_name, additional_info')
+    parser.add_argument('--batch-uri', help='Send batches to this URI instead of Google (e.g. a local stub)')
+    parser.add_argument('--no-auth', action='store_true', help='Skip OAuth; only useful together with --batch-uri')
+    parser.add_argument('--dry-run', action='store_true', help='Validate and print the events without sending')
+    args = parser.parse_args(argv)
+
+    rows = load_invitations(args.file)
+    events, positions = [], []
+    for index, row in enumerate(rows):
+        row = {k: v for k, v in row.items() if v not in (None, '')}
+        missing = [field for field in INVITATION_REQUIRED_FIELDS if field not in row]
+        if missing:
+            print(f"row {index}: skipped, missing {', '.join(missing)}")
+            continue
+        try:
+            events.append(build_interview_event(row))
+        except ValueError:
+            print(f'row {index}: skipped, invalid interview_time {row["interview_time"]!r}')
+            continue
+        positions.append(index)
+
+    if args.dry_run:
+        print(json.dumps(events, indent=2, ensure_ascii=False))
+        return 0
+
+    service = build_service(args.no_auth)
+    failed = 0
+    for index, (event_result, error) in zip(positions, send_invitation_batch(service, events, args.batch_uri)):
+        if error is not None:
+            failed += 1
+            print(f'row {index}: failed, {error}')
+        else:
+            print(f"row {index}: sent, {event_result.get('htmlLink')}")
+    print(f'{len(positions) - failed} sent, {failed} failed, {len(rows) - len(positions)} skipped')
+    return 1 if failed else 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
 
 # from google.oauth2.service_account import Credentials
 # from googleapiclient.discovery import build
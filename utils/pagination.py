@@ -0,0 +1,76 @@
+import base64
+import json
+
+from sqlalchemy import and_, or_
+from werkzeug.exceptions import BadRequest
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(key, row_id):
+    value = key.isoformat() if hasattr(key, 'isoformat') else key
+    raw = json.dumps([value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, parse_key):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, row_id = json.loads(raw)
+        return (parse_key(value) if value is not None else None), int(row_id)
+    except (ValueError, TypeError):
+        raise BadRequest('Invalid cursor')
+
+
+def parse_page_size(value):
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise BadRequest('limit must be an integer')
+    if limit < 1:
+        raise BadRequest('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _after(key_column, id_column, ascending, last_key, last_id, nullable):
+    """Rows past (last_key, last_id) in (key_column, id_column) order; NULL keys sort first."""
+    if last_key is None:
+        # still inside the NULL run: ascending continues it then moves on to every non-NULL key
+        past_nulls = and_(key_column.is_(None), id_column > last_id if ascending else id_column < last_id)
+        return or_(past_nulls, key_column.isnot(None)) if ascending else past_nulls
+    if ascending:
+        return or_(key_column > last_key, and_(key_column == last_key, id_column > last_id))
+    after = or_(key_column < last_key, and_(key_column == last_key, id_column < last_id))
+    # descending, the NULL keys come after every value; comparisons with NULL never match them
+    return or_(after, key_column.is_(None)) if nullable else after
+
+
+def keyset_page(query, key_column, id_column, ascending, limit, cursor=None, parse_key=str, key_of=None):
+    """
+    Return one page of `query` ordered by (key_column, id_column) and the cursor for the next one.
+
+    Pages are addressed by the last (key, id) pair seen rather than an OFFSET, so the
+    database seeks straight to the page start no matter how deep the client has scrolled.
+    A nullable key_column is paged as is, with NULL before every value as SQLite orders it,
+    so an index on the column still serves both the seek and the ORDER BY. `key_of`
+    extracts the sort key from a loaded row; it is needed when key_column is an
+    expression rather than a mapped attribute.
+    """
+    if cursor:
+        last_key, last_id = decode_cursor(cursor, parse_key)
+        nullable = getattr(getattr(key_column, 'expression', key_column), 'nullable', False)
+        query = query.filter(_after(key_column, id_column, ascending, last_key, last_id, nullable))
+
+    if ascending:
+        query = query.order_by(key_column.asc(), id_column.asc())
+    else:
+        query = query.order_by(key_column.desc(), id_column.desc())
+
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        key = key_of(last) if key_of else getattr(last, key_column.key)
+        next_cursor = encode_cursor(key, last.id)
+    return rows, next_cursor
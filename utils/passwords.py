@@ -0,0 +1,104 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordQueueFull(Exception):
+    """Too many password checks are already waiting for the verification pool."""
+
+
+# Process pools are created on first use so importing the app does not fork anything.
+# 'import' hashes bulk uploads, 'verify' checks logins; keeping them apart means a big
+# import cannot hold up logins.
+_pools = {}
+_pools_pid = None
+_slots = None  # bounds running + queued verifications in this process
+_pools_lock = threading.Lock()
+_method_prefixes = {}
+
+
+def hash_method():
+    """Configured werkzeug hash method, e.g. 'scrypt' or 'pbkdf2:sha256:600000'."""
+    return current_app.config.get('PASSWORD_HASH_METHOD') or 'scrypt'
+
+
+def hash_password(password):
+    return generate_password_hash(password, method=hash_method())
+
+
+def needs_rehash(password_hash, method):
+    """True if the stored hash was made with different parameters than `method` would use now."""
+    return password_hash.split('$', 1)[0] != _method_prefix(method)
+
+
+def _method_prefix(method):
+    # 'scrypt' and 'pbkdf2' expand to their full parameter lists, so ask werkzeug once per method
+    if method not in _method_prefixes:
+        _method_prefixes[method] = generate_password_hash('', method=method).split('$', 1)[0]
+    return _method_prefixes[method]
+
+
+def _get_pool(name):
+    global _pools_pid, _slots
+    with _pools_lock:
+        # pools inherited through fork (e.g. gunicorn --preload) are unusable in the child
+        if _pools_pid != os.getpid():
+            _pools.clear()
+            _pools_pid = os.getpid()
+            _slots = None
+        if name not in _pools:
+            config = current_app.config
+            if name == 'verify':
+                workers = config.get('PASSWORD_VERIFY_WORKERS') or 1
+                _slots = threading.BoundedSemaphore(workers + config.get('PASSWORD_VERIFY_QUEUE_LIMIT', 0))
+            else:
+                workers = config.get('PASSWORD_HASH_WORKERS') or os.cpu_count() or 1
+            _pools[name] = ProcessPoolExecutor(max_workers=workers)
+        return _pools[name]
+
+
+def hash_passwords(passwords):
+    """Hash many passwords in parallel across the import pool; results are in input order."""
+    passwords = list(passwords)
+    if not passwords:
+        return []
+    pool = _get_pool('import')
+    chunksize = max(1, len(passwords) // (pool._max_workers * 4))
+    return list(pool.map(partial(generate_password_hash, method=hash_method()), passwords, chunksize=chunksize))
+
+
+def _verify(password_hash, password, method):
+    """(matches, new_hash); new_hash is set when the password matched but the hash is outdated."""
+    if not check_password_hash(password_hash, password):
+        return False, None
+    if needs_rehash(password_hash, method):
+        return True, generate_password_hash(password, method=method)
+    return True, None
+
+
+def verify_password(password_hash, password):
+    """
+    Check a password in the verification pool so the hashing does not hold the request
+    worker's CPU. Returns (matches, new_hash) like _verify. Raises PasswordQueueFull when
+    PASSWORD_VERIFY_WORKERS + PASSWORD_VERIFY_QUEUE_LIMIT checks are already in flight.
+    PASSWORD_VERIFY_WORKERS = 0 verifies inline.
+    """
+    method = hash_method()
+    if not current_app.config.get('PASSWORD_VERIFY_WORKERS'):
+        return _verify(password_hash, password, method)
+
+    pool = _get_pool('verify')
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        raise PasswordQueueFull()
+    try:
+        future = pool.submit(_verify, password_hash, password, method)
+    except Exception:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future.result()
@@ -0,0 +1,48 @@
+from flask import Response, current_app, stream_with_context
+
+# Rows fetched per database round trip and serialized rows per chunk written to the socket
+YIELD_PER = 500
+CHUNK_ROWS = 200
+
+
+def stream_format(args):
+    """Return 'json' or 'ndjson' when the client opted into streaming with ?stream=, else None."""
+    value = (args.get('stream') or '').lower()
+    if value in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if value in ('1', 'true', 'json'):
+        return 'json'
+    return None
+
+
+def stream_query(query, serialize, fmt='json'):
+    """
+    Stream a query as a JSON array (or newline delimited JSON) without building the full
+    payload in memory. The query is iterated with yield_per, so only one batch of ORM
+    objects and one chunk of encoded text are alive at any time.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        rows = query.yield_per(YIELD_PER)
+        chunk = []
+        first = True
+        if fmt == 'json':
+            yield '['
+        for row in rows:
+            encoded = dumps(serialize(row))
+            if fmt == 'ndjson':
+                chunk.append(encoded + '\n')
+            else:
+                chunk.append(encoded if first else ',' + encoded)
+            first = False
+            if len(chunk) >= CHUNK_ROWS:
+                yield ''.join(chunk)
+                chunk = []
+        if chunk:
+            yield ''.join(chunk)
+        if fmt == 'json':
+            yield ']'
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(generate()), mimetype=mimetype)